@@ -30,19 +30,21 @@ SPIDER_TIMEOUT=${SPIDER_TIMEOUT:-28800} # default to 8 hours
 
 mkdir -p "${SPIDER_RUN_DIR}"
 
+# Import every spider once up front so each `scrapy crawl` only imports its own module
+(>&2 echo "Generating spider index")
+uv run scrapy spider_index -s REQUESTS_CACHE_ENABLED=False
+
+# Compile the vendored NSI data once so spider processes can memory map it
+(>&2 echo "Generating NSI snapshot")
+uv run scrapy nsi_snapshot
+
 (>&2 echo "Writing to ${SPIDER_RUN_DIR}")
-for spider in $(uv run scrapy list -s REQUESTS_CACHE_ENABLED=False)
-do
-    # The CLOSESPIDER_TIMEOUT setting is used to limit the maximum run time of each spider.
-    # Sometimes spiders can hang during network operations, so we use the timeout command to enforce
-    # a hard limit slightly longer than CLOSESPIDER_TIMEOUT to ensure the spider is killed.
-    echo "timeout -k 15m 495m uv run scrapy crawl --output ${SPIDER_RUN_DIR}/output/${spider}.geojson:geojson --output ${SPIDER_RUN_DIR}/output/${spider}.ndgeojson:ndgeojson --logfile ${SPIDER_RUN_DIR}/logs/${spider}.txt --loglevel ERROR --set TELNETCONSOLE_ENABLED=0 --set CLOSESPIDER_TIMEOUT=${SPIDER_TIMEOUT} --set LOGSTATS_FILE=${SPIDER_RUN_DIR}/stats/${spider}.json ${spider}" >> ${SPIDER_RUN_DIR}/commands.txt
-done
+uv run scrapy list -s REQUESTS_CACHE_ENABLED=False > "${SPIDER_RUN_DIR}/spider_list.txt"
 
 mkdir -p "${SPIDER_RUN_DIR}/logs"
 mkdir -p "${SPIDER_RUN_DIR}/stats"
 mkdir -p "${SPIDER_RUN_DIR}/output"
-SPIDER_COUNT=$(wc -l < "${SPIDER_RUN_DIR}/commands.txt" | tr -d ' ')
+SPIDER_COUNT=$(wc -l < "${SPIDER_RUN_DIR}/spider_list.txt" | tr -d ' ')
 
 # Send a message to Slack that we're starting
 if [ -z "${SLACK_WEBHOOK_URL}" ]; then
@@ -73,12 +75,32 @@ else
     }' EXIT
 fi
 
+# Run spiders longest first, using the elapsed time of each spider in the previous run
+CRAWL_MANY_ARGS=()
+PREVIOUS_STATS_URL=$(uv run aws s3 cp --only-show-errors "s3://${S3_BUCKET}/runs/latest.json" - | jq --raw-output '.stats_url // empty')
+if [ -n "${PREVIOUS_STATS_URL}" ] && curl --silent --fail --output "${SPIDER_RUN_DIR}/previous_results.json" "${PREVIOUS_STATS_URL}"; then
+    CRAWL_MANY_ARGS+=(--timings "${SPIDER_RUN_DIR}/previous_results.json")
+else
+    (>&2 echo "Couldn't fetch spider timings of the previous run, running spiders in list order")
+fi
+
 (>&2 echo "Running ${SPIDER_COUNT} spiders ${PARALLELISM} at a time")
-xargs -P "${PARALLELISM}" -a "${SPIDER_RUN_DIR}/commands.txt" -I CMD sh -c "CMD || true"
+# The CLOSESPIDER_TIMEOUT setting is used to limit the maximum run time of each spider.
+# Sometimes spiders can hang during network operations, so crawl_many kills (and replaces)
+# any worker still running a spider 15 minutes after CLOSESPIDER_TIMEOUT.
+uv run scrapy crawl_many \
+    --spiders-file "${SPIDER_RUN_DIR}/spider_list.txt" \
+    --output-dir "${SPIDER_RUN_DIR}" \
+    --processes "${PARALLELISM}" \
+    --kill-after 900 \
+    --loglevel ERROR \
+    --set TELNETCONSOLE_ENABLED=0 \
+    --set CLOSESPIDER_TIMEOUT=${SPIDER_TIMEOUT} \
+    "${CRAWL_MANY_ARGS[@]}"
 
 retval=$?
 if [ ! $retval -eq 0 ]; then
-    (>&2 echo "xargs failed with exit code ${retval}")
+    (>&2 echo "crawl_many failed with exit code ${retval}")
     exit 1
 fi
 (>&2 echo "Done running spiders")
@@ -35,6 +35,14 @@ mkdir -p "${SPIDER_RUN_DIR}/logs"
 mkdir -p "${SPIDER_RUN_DIR}/stats"
 mkdir -p "${SPIDER_RUN_DIR}/output"
 
+# Import every spider once up front so each `scrapy crawl` only imports its own module
+(>&2 echo "Generating spider index")
+uv run scrapy spider_index -s REQUESTS_CACHE_ENABLED=False
+
+# Compile the vendored NSI data once so spider processes can memory map it
+(>&2 echo "Generating NSI snapshot")
+uv run scrapy nsi_snapshot
+
 # Save the spider list for the manifest builder
 (>&2 echo "Listing spiders in group ${RUN_GROUP}")
 uv run scrapy list_group "${RUN_GROUP}" -s REQUESTS_CACHE_ENABLED=False > "${SPIDER_RUN_DIR}/spider_list.txt"
@@ -46,9 +54,6 @@ if [ "${SPIDER_COUNT}" -eq 0 ]; then
 fi
 
 (>&2 echo "Writing to ${SPIDER_RUN_DIR}")
-while IFS= read -r spider; do
-    echo "timeout -k 15m 495m uv run scrapy crawl --output ${SPIDER_RUN_DIR}/output/${spider}.geojson:geojson --output ${SPIDER_RUN_DIR}/output/${spider}.ndgeojson:ndgeojson --logfile ${SPIDER_RUN_DIR}/logs/${spider}.txt --loglevel ERROR --set TELNETCONSOLE_ENABLED=0 --set CLOSESPIDER_TIMEOUT=${SPIDER_TIMEOUT} --set LOGSTATS_FILE=${SPIDER_RUN_DIR}/stats/${spider}.json ${spider}" >> "${SPIDER_RUN_DIR}/commands.txt"
-done < "${SPIDER_RUN_DIR}/spider_list.txt"
 
 # Send a message to Slack that we're starting
 if [ -z "${SLACK_WEBHOOK_URL:-}" ]; then
@@ -79,12 +84,33 @@ else
     }' EXIT
 fi
 
+# Download previous manifest (if it exists), used to run spiders longest first
+# and to build the group manifest of this run
+uv run aws s3 cp \
+    --only-show-errors \
+    "s3://${S3_BUCKET}/runs/latest/${RUN_GROUP}.manifest.json" \
+    "${SPIDER_RUN_DIR}/previous_manifest.json" || true
+
+CRAWL_MANY_ARGS=()
+if [ -s "${SPIDER_RUN_DIR}/previous_manifest.json" ]; then
+    CRAWL_MANY_ARGS+=(--timings "${SPIDER_RUN_DIR}/previous_manifest.json")
+fi
+
 (>&2 echo "Running ${SPIDER_COUNT} spiders ${PARALLELISM} at a time")
-xargs -t -L 1 -P "${PARALLELISM}" -a "${SPIDER_RUN_DIR}/commands.txt" -i sh -c "{} || true"
+# crawl_many kills (and replaces) any worker still running a spider 15 minutes after CLOSESPIDER_TIMEOUT.
+uv run scrapy crawl_many \
+    --spiders-file "${SPIDER_RUN_DIR}/spider_list.txt" \
+    --output-dir "${SPIDER_RUN_DIR}" \
+    --processes "${PARALLELISM}" \
+    --kill-after 900 \
+    --loglevel ERROR \
+    --set TELNETCONSOLE_ENABLED=0 \
+    --set CLOSESPIDER_TIMEOUT=${SPIDER_TIMEOUT} \
+    "${CRAWL_MANY_ARGS[@]}"
 
 retval=$?
 if [ ! $retval -eq 0 ]; then
-    (>&2 echo "xargs failed with exit code ${retval}")
+    (>&2 echo "crawl_many failed with exit code ${retval}")
     exit 1
 fi
 (>&2 echo "Done running spiders")
@@ -323,12 +349,6 @@ fi
 # Build group manifest
 (>&2 echo "Building group manifest for ${RUN_GROUP}")
 
-# Download previous manifest (if it exists)
-uv run aws s3 cp \
-    --only-show-errors \
-    "s3://${S3_BUCKET}/runs/latest/${RUN_GROUP}.manifest.json" \
-    "${SPIDER_RUN_DIR}/previous_manifest.json" || true
-
 MANIFEST_ARGS=(
     --group "${RUN_GROUP}"
     --run-id "${RUN_TIMESTAMP}"
@@ -9,8 +9,9 @@ class AddressSpider(Spider):
     @classmethod
     def from_crawler(cls, crawler: Crawler, *args: Any, **kwargs: Any) -> Self:
         spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.settings.set("ITEM_PIPELINES", {"locations.pipelines.fused.FusedItemPipeline": 200})
         spider.settings.set(
-            "ITEM_PIPELINES",
+            "FUSED_ITEM_PIPELINES",
             {
                 "locations.pipelines.duplicates.DuplicatesPipeline": None,
                 "locations.pipelines.drop_attributes.DropAttributesPipeline": 250,
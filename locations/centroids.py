@@ -0,0 +1,229 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+import shapely
+
+from locations.geo import EARTH_RADIUS, ISEADGG_RADIUSES, MILES_TO_KILOMETERS, country_iseadgg_centroids
+from locations.reprojection import get_transformer
+from locations.searchable_points import get_cache_dir
+from locations.searchable_points.store import get_searchable_points_store
+
+# Version of the centroid generator, part of the key of cached centroids.
+CENTROIDS_VERSION = 1
+# Circles are generated slightly smaller than the requested radius, to allow
+# for APIs rounding coordinates and distances.
+COVER_MARGIN = 0.99
+# Lattice offsets tried for each cover, as fractions of the lattice spacing.
+# The cover with the fewest circles is kept.
+LATTICE_OFFSETS = [0.0, 1 / 3, 2 / 3]
+# Searchable points files of circles covering the subdivisions of a country,
+# and their radius in kilometres.
+SUBDIVISION_POINTS_FILES = {
+    "CA": ("ca_centroids_10mile_radius_territory.csv", 10 * MILES_TO_KILOMETERS),
+    "US": ("us_centroids_10mile_radius_state.csv", 10 * MILES_TO_KILOMETERS),
+}
+
+
+def aeqd_crs(lat: float, lon: float) -> str:
+    """
+    Azimuthal equidistant projection, in kilometres, centred on a point.
+    Distances measured on this projection are never shorter than distances on
+    the Earth's surface, so circles covering an area on the projection also
+    cover it on the Earth's surface.
+    """
+    return f"+proj=aeqd +lat_0={lat} +lon_0={lon} +datum=WGS84 +units=km"
+
+
+def spherical_centre(latitudes: np.ndarray, longitudes: np.ndarray) -> tuple[float, float]:
+    """
+    :return: (lat, lon) centre of points, safe across the antimeridian
+    """
+    lat_rad, lon_rad = np.radians(latitudes), np.radians(longitudes)
+    x = np.mean(np.cos(lat_rad) * np.cos(lon_rad))
+    y = np.mean(np.cos(lat_rad) * np.sin(lon_rad))
+    z = np.mean(np.sin(lat_rad))
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
+
+
+def hexagonal_cover(region: shapely.Geometry, radius: float) -> np.ndarray:
+    """
+    Cover a region of a plane with circles centred on a hexagonal lattice,
+    which is the thinnest covering of the plane with equal circles. Only
+    circles whose hexagonal lattice cell intersects the region are kept.
+    :param region: region to cover
+    :param radius: radius of the circles
+    :return: (n, 2) array of the centres of the circles
+    """
+    dx = math.sqrt(3) * radius
+    dy = 1.5 * radius
+    # Pointy-top hexagon of circumradius radius, around the origin.
+    angles = np.radians(np.arange(30, 390, 60))
+    hexagon = np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+    shapely.prepare(region)
+    xmin, ymin, xmax, ymax = region.bounds
+
+    candidates = []
+    for offset_x in LATTICE_OFFSETS:
+        for offset_y in LATTICE_OFFSETS:
+            rows = np.arange(math.floor((ymin - radius) / dy - offset_y), math.ceil((ymax + radius) / dy) + 1)
+            columns = np.arange(math.floor((xmin - dx) / dx - offset_x), math.ceil((xmax + dx) / dx) + 1)
+            row, column = np.meshgrid(rows, columns, indexing="ij")
+            ys = (row + offset_y) * dy
+            xs = (column + offset_x + (row % 2) / 2) * dx
+            centres = np.column_stack([xs.ravel(), ys.ravel()])
+            cells = shapely.polygons(centres[:, np.newaxis, :] + hexagon)
+            candidates.append(centres[shapely.intersects(cells, region)])
+    return min(candidates, key=len)
+
+
+def cover_points_region(latitudes: np.ndarray, longitudes: np.ndarray, points_radius: float, radius: float) -> list:
+    """
+    Cover the region searched by radius searches of points_radius around
+    each point with circles of radius.
+    :return: list of (lat, lon) centres of the circles
+    """
+    centre = spherical_centre(latitudes, longitudes)
+    x, y = get_transformer(4326, aeqd_crs(*centre)).transform(latitudes, longitudes)
+    # Circles on the Earth's surface are slightly larger on the projection,
+    # more so further from its centre.
+    arc = (np.hypot(x, y) + points_radius) / EARTH_RADIUS
+    scale = np.where(arc > 1e-9, arc / np.sin(np.minimum(arc, math.pi - 1e-9)), 1.0)
+    region = shapely.union_all(shapely.buffer(shapely.points(x, y), points_radius * scale * 1.01))
+
+    parts = list(getattr(region, "geoms", [region]))
+    if len(parts) > 1:
+        # Cover separate parts of the region (such as Alaska and Hawaii) on
+        # projections centred on each, to keep distortion low.
+        in_part = [shapely.intersects_xy(part, x, y) for part in parts]
+        return [
+            centroid
+            for mask in in_part
+            for centroid in cover_points_region(latitudes[mask], longitudes[mask], points_radius, radius)
+        ]
+    return cover_projected_region(region, centre, radius)
+
+
+def cover_projected_region(region: shapely.Geometry, centre: tuple[float, float], radius: float) -> list:
+    """
+    Cover a region of the azimuthal equidistant projection centred on centre
+    with circles of radius.
+    :return: list of (lat, lon) centres of the circles
+    """
+    centres = hexagonal_cover(region, radius * COVER_MARGIN)
+    if len(centres) == 0:
+        return []
+    lats, lons = get_transformer(aeqd_crs(*centre), 4326).transform(centres[:, 0], centres[:, 1])
+    return [
+        (round(lat, 7), round(lon, 7)) for lat, lon in zip(np.atleast_1d(lats).tolist(), np.atleast_1d(lons).tolist())
+    ]
+
+
+def cover_polygon(polygon: shapely.Geometry, radius: float) -> list:
+    """
+    Cover a lon/lat polygon with circles of radius (in kilometres).
+    :return: list of (lat, lon) centres of the circles
+    """
+    centroid = polygon.centroid
+    centre = (centroid.y, centroid.x)
+    transformer = get_transformer(4326, aeqd_crs(*centre))
+    # Densify edges so they follow the same path on the projection.
+    projected = shapely.transform(
+        shapely.segmentize(polygon, 0.1),
+        lambda coords: np.column_stack(transformer.transform(coords[:, 1], coords[:, 0])),
+    )
+    return cover_projected_region(shapely.buffer(projected, radius * 0.01), centre, radius)
+
+
+def region_key(region: str | dict | shapely.Geometry) -> str:
+    if isinstance(region, str):
+        return region.lower()
+    if isinstance(region, dict):
+        region = shapely.geometry.shape(region)
+    return "polygon-" + hashlib.sha1(shapely.to_wkb(shapely.normalize(region))).hexdigest()[:16]
+
+
+def generate_region_centroids(region: str | dict | shapely.Geometry, radius: float) -> list[tuple[float, float]]:
+    if not isinstance(region, str):
+        if isinstance(region, dict):
+            region = shapely.geometry.shape(region)
+        return cover_polygon(region, radius)
+
+    store = get_searchable_points_store()
+    if "-" in region:
+        country_code, subdivision = region.upper().split("-", 1)
+        if country_code not in SUBDIVISION_POINTS_FILES:
+            raise ValueError(f"Subdivisions of {country_code} are not supported.")
+        points_file, points_radius = SUBDIVISION_POINTS_FILES[country_code]
+        points = store.get_points(points_file, [subdivision])
+        if len(points) == 0:
+            raise ValueError(f"Unknown subdivision {region}.")
+    else:
+        try:
+            points = store.get_points(f"iseadgg/{region.lower()}_centroids_iseadgg_24km_radius.csv")
+        except FileNotFoundError:
+            raise ValueError(f"Unknown country {region}.")
+        points_radius = ISEADGG_RADIUSES[0]
+    centroids = cover_points_region(np.asarray(points.latitudes), np.asarray(points.longitudes), points_radius, radius)
+
+    if "-" not in region and radius >= ISEADGG_RADIUSES[0]:
+        # A finer ISEADGG grid may still need fewer searches.
+        iseadgg = country_iseadgg_centroids(region, max(r for r in ISEADGG_RADIUSES if r <= radius))
+        if len(iseadgg) <= len(centroids):
+            return iseadgg
+    return centroids
+
+
+def region_centroids(region: str | dict | shapely.Geometry, radius: float) -> list[tuple[float, float]]:
+    """
+    Get WGS84 point locations for radius searches of any radius which
+    together cover a country, subdivision or polygon.
+
+    Countries are covered using the ISEADGG centroids of the country if the
+    radius is an ISEADGG radius (see country_iseadgg_centroids), or if a
+    finer ISEADGG grid needs fewer searches. Otherwise, the area covered by
+    the 24km ISEADGG grid of the country (or for US and CA subdivisions, the
+    10 mile grid of the subdivision) is covered with a hexagonal grid of
+    circles of the radius.
+
+    Results are cached on disk keyed by region and radius.
+
+    Usage examples:
+        region_centroids("GB", 100)
+        region_centroids("US-NY", 40)
+        region_centroids({"type": "Polygon", "coordinates": [...]}, 30)
+
+    :param region: ISO 3166-1 alpha-2 country code, ISO 3166-2 code of a US
+                   or CA subdivision, or a shapely or GeoJSON (Multi)Polygon
+                   in lon/lat coordinates which does not cross the
+                   antimeridian
+    :param radius: search radius in kilometres
+    :return: list of locations being a tuple consisting of latitude then
+             longitude WGS84 coordinates.
+    """
+    if radius <= 0:
+        raise ValueError("Search radius must be more than 0 (kilometres).")
+    if isinstance(region, str) and "-" not in region and radius in ISEADGG_RADIUSES:
+        return country_iseadgg_centroids(region, int(radius))
+
+    path = os.path.join(
+        get_cache_dir("centroids"), f"{region_key(region)}_{radius:g}km_radius_v{CENTROIDS_VERSION}.json"
+    )
+    try:
+        with open(path) as file:
+            return [tuple(point) for point in json.load(file)]
+    except (OSError, ValueError):
+        pass
+
+    centroids = generate_region_centroids(region, radius)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(path), delete=False) as file:
+            json.dump(centroids, file)
+        os.replace(file.name, path)
+    except OSError:
+        pass
+    return centroids
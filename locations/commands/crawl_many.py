@@ -0,0 +1,411 @@
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from typing import Any
+
+from scrapy.commands import ScrapyCommand
+from scrapy.crawler import Crawler, CrawlerProcess
+from scrapy.exceptions import UsageError
+from scrapy.settings import SETTINGS_PRIORITIES
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+from twisted.internet.defer import inlineCallbacks
+from twisted.internet.threads import deferToThread
+
+# Settings which are set per spider by the worker and must not be inherited
+# from the command line of the parent process.
+PER_SPIDER_SETTINGS = ["FEEDS", "LOG_FILE", "LOGSTATS_FILE"]
+
+# Seconds a stopped worker is given to exit before it is killed.
+STOP_TIMEOUT = 60
+
+
+def spider_settings(settings, spider_name: str, output_dir: str, formats: list[str]):
+    """
+    Settings for a single crawl, mirroring `scrapy crawl --output <spider>.<format>:<format>
+    --logfile logs/<spider>.txt --set LOGSTATS_FILE=stats/<spider>.json <spider>`.
+    """
+    crawl_settings = settings.copy()
+    crawl_settings.set(
+        "FEEDS",
+        {os.path.join(output_dir, "output", f"{spider_name}.{fmt}"): {"format": fmt} for fmt in formats},
+        priority="cmdline",
+    )
+    crawl_settings.set("LOG_FILE", os.path.join(output_dir, "logs", f"{spider_name}.txt"), priority="cmdline")
+    crawl_settings.set("LOGSTATS_FILE", os.path.join(output_dir, "stats", f"{spider_name}.json"), priority="cmdline")
+    return crawl_settings
+
+
+def load_timings(path: str) -> dict[str, float]:
+    """
+    Elapsed seconds of each spider in a previous run, read from a directory
+    of stats JSON files ("elapsed_time_seconds"), the "stats/_results.json"
+    of a run or a group manifest (see ci/build_group_manifest.py). Spiders
+    without an elapsed time, such as spiders which were killed, have 0.
+    """
+    if os.path.isdir(path):
+        timings = {}
+        for filename in os.listdir(path):
+            spider_name, ext = os.path.splitext(filename)
+            if ext != ".json" or spider_name.startswith("_"):
+                continue
+            try:
+                with open(os.path.join(path, filename)) as f:
+                    stats = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue
+            timings[spider_name] = stats.get("elapsed_time_seconds") or 0.0
+        return timings
+
+    with open(path) as f:
+        data = json.load(f)
+    if "results" in data:
+        return {result["spider"]: result.get("elapsed_time") or 0.0 for result in data["results"]}
+    return {spider_name: entry.get("elapsed_time") or 0.0 for spider_name, entry in data.get("spiders", {}).items()}
+
+
+def predict_durations(
+    spider_names: list[str], timings: dict[str, float], timeout: float | None = None
+) -> dict[str, float]:
+    """
+    Predicted run time of each spider, being its previous elapsed time, or
+    the median of the previous elapsed times of the other spiders for spiders
+    without timings. Spiders with timings but no elapsed time were killed or
+    timed out, so are predicted to run until timeout (or for as long as the
+    longest spider if there is no timeout).
+    """
+    known = sorted(timings[spider_name] for spider_name in spider_names if timings.get(spider_name))
+    default = known[len(known) // 2] if known else 0.0
+    if timeout is None:
+        timeout = known[-1] if known else 0.0
+    return {
+        spider_name: (timings[spider_name] or timeout) if spider_name in timings else default
+        for spider_name in spider_names
+    }
+
+
+def longest_first(spider_names: list[str], durations: dict[str, float]) -> list[str]:
+    """
+    Order spiders longest predicted run time first. As each worker takes the
+    next spider when it becomes free, this is longest processing time first
+    scheduling: the long spiders start straight away and the quick spiders
+    are run as workers become free, filling the gaps while the long spiders
+    finish.
+    """
+    return sorted(spider_names, key=lambda spider_name: durations[spider_name], reverse=True)
+
+
+def predict_makespan(spider_names: list[str], durations: dict[str, float], processes: int) -> float:
+    """
+    :return: predicted seconds to run spiders in order with processes workers
+    """
+    if not spider_names:
+        return 0.0
+    finish_times = [0.0] * min(processes, len(spider_names))
+    for spider_name in spider_names:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + durations[spider_name])
+    return max(finish_times)
+
+
+def run_worker(conn: Connection, overrides: dict[str, Any], output_dir: str, formats: list[str]) -> None:
+    """
+    Worker process entry point. Receives spider names over `conn` and runs
+    each one to completion in a single long lived reactor, replying with a
+    result dictionary after each crawl. A None spider name stops the worker.
+    """
+    settings = get_project_settings()
+    settings.setdict(overrides, priority="cmdline")
+    if reactor_path := settings["TWISTED_REACTOR"]:
+        install_reactor(reactor_path, settings["ASYNCIO_EVENT_LOOP"])
+    process = CrawlerProcess(settings)
+
+    from twisted.internet import reactor
+
+    @inlineCallbacks
+    def crawl_loop():
+        while True:
+            spider_name = yield deferToThread(conn.recv)
+            if spider_name is None:
+                break
+
+            result = {"spider": spider_name, "error": None, "finish_reason": None}
+            try:
+                spidercls = process.spider_loader.load(spider_name)
+                crawler = Crawler(spidercls, spider_settings(settings, spider_name, output_dir, formats))
+                yield process.crawl(crawler)
+                result["finish_reason"] = crawler.stats.get_value("finish_reason")
+            except Exception as e:
+                result["error"] = repr(e)
+            conn.send(result)
+        reactor.callFromThread(reactor.stop)
+
+    reactor.callWhenRunning(crawl_loop)
+    process.start(stop_after_crawl=False, install_signal_handlers=False)
+
+
+class Worker:
+    def __init__(self, context, overrides: dict[str, Any], output_dir: str, formats: list[str]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_worker, args=(child_conn, overrides, output_dir, formats))
+        self.process.start()
+        child_conn.close()
+        self.spider_name: str = ""
+        self.started_at: float = 0.0
+        self.crawls: int = 0
+        self.stopped_at: float = 0.0
+
+    def assign(self, spider_name: str) -> None:
+        self.spider_name = spider_name
+        self.started_at = time.monotonic()
+        self.crawls += 1
+        self.conn.send(spider_name)
+
+    def poll(self, ready: list, now: float, hard_timeout: int | None) -> tuple[str | None, bool] | None:
+        """
+        Check whether the spider of the worker has finished, by the worker
+        replying or exiting, or has overrun hard_timeout.
+        :param ready: objects found ready by multiprocessing.connection.wait()
+        :return: None while the spider is running, else the error of the
+                 spider (None if it succeeded) and whether the worker can run
+                 another spider
+        """
+        if self.conn in ready:
+            try:
+                return self.conn.recv()["error"], True
+            except (EOFError, OSError):
+                return "worker exited", False
+        if not self.process.is_alive():
+            return f"worker exited with code {self.process.exitcode}", False
+        if hard_timeout and now - self.started_at > hard_timeout:
+            return f"killed after {hard_timeout} seconds", False
+        return None
+
+    def stop(self) -> None:
+        """
+        Ask the worker to exit after its current spider, without waiting for
+        it to do so, see `reap`.
+        """
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.stopped_at = time.monotonic()
+
+    def reap(self) -> bool:
+        """
+        Clean up a stopped worker once it has exited, killing it if it has
+        not exited within STOP_TIMEOUT seconds of being stopped.
+        :return: True if the worker has been cleaned up
+        """
+        if self.process.is_alive() and time.monotonic() - self.stopped_at < STOP_TIMEOUT:
+            return False
+        self.kill()
+        return True
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class CrawlManyCommand(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+
+    def syntax(self) -> str:
+        return "[options] <spider> [<spider> ...]"
+
+    def short_desc(self) -> str:
+        return "Run many spiders in a pool of long lived worker processes"
+
+    def long_desc(self) -> str:
+        return (
+            "Run many spiders using a pool of worker processes, each running one spider at a time in a single "
+            "reactor, instead of one `scrapy crawl` process per spider. Each spider writes "
+            "<output-dir>/output/<spider>.<format>, <output-dir>/logs/<spider>.txt and "
+            "<output-dir>/stats/<spider>.json. A worker whose spider overruns CLOSESPIDER_TIMEOUT by more than "
+            "--kill-after seconds, or which dies, is replaced without affecting the other spiders. With "
+            "--timings, spiders are run longest first using their elapsed times in previous runs, and the "
+            "predicted and actual total run times are reported."
+        )
+
+    def add_options(self, parser: argparse.ArgumentParser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            "--spiders-file", dest="spiders_file", help="file listing spider names to run, one per line"
+        )
+        parser.add_argument("--output-dir", dest="output_dir", required=True, help="directory to write results to")
+        parser.add_argument(
+            "--format",
+            dest="formats",
+            action="append",
+            help="feed format to write for each spider, may be repeated [default: geojson and ndgeojson]",
+        )
+        parser.add_argument(
+            "-p", "--processes", dest="processes", type=int, default=12, help="number of worker processes"
+        )
+        parser.add_argument(
+            "--max-crawls-per-worker",
+            dest="max_crawls_per_worker",
+            type=int,
+            default=50,
+            help="replace a worker after it has run this many spiders [default: %(default)s]",
+        )
+        parser.add_argument(
+            "--kill-after",
+            dest="kill_after",
+            type=int,
+            default=15 * 60,
+            help="seconds past CLOSESPIDER_TIMEOUT after which a worker is killed [default: %(default)s]",
+        )
+        parser.add_argument(
+            "--timings",
+            dest="timings",
+            action="append",
+            help="stats directory, _results.json or group manifest of a previous run to schedule spiders longest "
+            "first with, may be repeated with later files taking precedence",
+        )
+
+    def run(self, args: list[str], opts: argparse.Namespace) -> None:
+        if not self.settings:
+            raise RuntimeError("Settings not defined")
+
+        spider_names = list(args)
+        if opts.spiders_file:
+            with open(opts.spiders_file) as f:
+                spider_names.extend(line.strip() for line in f if line.strip())
+        if not spider_names:
+            raise UsageError("No spiders given")
+
+        formats = opts.formats or ["geojson", "ndgeojson"]
+        for directory in ["output", "logs", "stats"]:
+            os.makedirs(os.path.join(opts.output_dir, directory), exist_ok=True)
+
+        cmdline_priority = SETTINGS_PRIORITIES["cmdline"]
+        overrides = {
+            name: self.settings[name]
+            for name in self.settings
+            if self.settings.getpriority(name) == cmdline_priority and name not in PER_SPIDER_SETTINGS
+        }
+
+        hard_timeout = None
+        if closespider_timeout := self.settings.getint("CLOSESPIDER_TIMEOUT"):
+            hard_timeout = closespider_timeout + opts.kill_after
+
+        durations = None
+        if opts.timings:
+            timings = {}
+            for path in opts.timings:
+                try:
+                    timings.update(load_timings(path))
+                except (json.JSONDecodeError, OSError) as e:
+                    sys.stderr.write(f"Ignoring timings {path}: {e}\n")
+            durations = predict_durations(spider_names, timings, hard_timeout)
+            given_makespan = predict_makespan(spider_names, durations, opts.processes)
+            spider_names = longest_first(spider_names, durations)
+            predicted_makespan = predict_makespan(spider_names, durations, opts.processes)
+            known = sum(1 for spider_name in set(spider_names) if spider_name in timings)
+            sys.stderr.write(
+                f"Running longest first, predicted makespan {predicted_makespan:.0f}s "
+                f"({given_makespan:.0f}s in the given order), "
+                f"{known} of {len(set(spider_names))} spiders have previous timings\n"
+            )
+
+        start = time.monotonic()
+        failures, elapsed = self.run_pool(spider_names, overrides, opts, formats, hard_timeout)
+        makespan = time.monotonic() - start
+        sys.stderr.write(f"Ran {len(spider_names)} spiders, {len(failures)} failed\n")
+        for spider_name, reason in failures.items():
+            sys.stderr.write(f"  {spider_name}: {reason}\n")
+        if durations is not None:
+            self.report_makespan(predicted_makespan, makespan, durations, elapsed)
+
+    @staticmethod
+    def report_makespan(
+        predicted_makespan: float, makespan: float, durations: dict[str, float], elapsed: dict[str, float]
+    ) -> None:
+        sys.stderr.write(f"Makespan {makespan:.0f}s, predicted {predicted_makespan:.0f}s\n")
+        overruns = sorted(
+            (spider_name for spider_name in elapsed if elapsed[spider_name] > durations[spider_name]),
+            key=lambda spider_name: elapsed[spider_name] - durations[spider_name],
+            reverse=True,
+        )[:10]
+        if overruns:
+            sys.stderr.write("Spiders most over their predicted run time:\n")
+        for spider_name in overruns:
+            sys.stderr.write(f"  {spider_name}: {elapsed[spider_name]:.0f}s, predicted {durations[spider_name]:.0f}s\n")
+
+    def run_pool(
+        self,
+        spider_names: list[str],
+        overrides: dict[str, Any],
+        opts: argparse.Namespace,
+        formats: list[str],
+        hard_timeout: int | None,
+    ) -> tuple[dict[str, str], dict[str, float]]:
+        """
+        :return: failure reason of each failed spider, and seconds taken by
+                 each spider
+        """
+        context = multiprocessing.get_context("spawn")
+        pending = deque(spider_names)
+        failures: dict[str, str] = {}
+        elapsed: dict[str, float] = {}
+
+        def new_worker() -> Worker:
+            return Worker(context, overrides, opts.output_dir, formats)
+
+        def replace(worker: Worker) -> Worker | None:
+            worker.kill()
+            if pending:
+                return next_spider(new_worker())
+            return None
+
+        def stop(worker: Worker) -> None:
+            worker.stop()
+            stopping.append(worker)
+
+        def next_spider(worker: Worker) -> Worker | None:
+            if worker.crawls >= opts.max_crawls_per_worker and pending:
+                stop(worker)
+                worker = new_worker()
+            if pending:
+                worker.assign(pending.popleft())
+                return worker
+            stop(worker)
+            return None
+
+        busy = []
+        # Stopped workers, reaped once they exit so that the results of the
+        # other workers are never waited on.
+        stopping = []
+        for _ in range(min(opts.processes, len(pending))):
+            busy.append(new_worker())
+            busy[-1].assign(pending.popleft())
+
+        while busy or stopping:
+            ready = wait([w.conn for w in busy] + [w.process.sentinel for w in busy + stopping], timeout=30)
+            # Spiders are timed to here, as recycling workers below takes time.
+            now = time.monotonic()
+            stopping = [worker for worker in stopping if not worker.reap()]
+            still_busy = []
+            for worker in busy:
+                if (outcome := worker.poll(ready, now, hard_timeout)) is None:
+                    still_busy.append(worker)
+                    continue
+                error, reusable = outcome
+                elapsed[worker.spider_name] = now - worker.started_at
+                if error:
+                    failures[worker.spider_name] = error
+                if replacement := next_spider(worker) if reusable else replace(worker):
+                    still_busy.append(replacement)
+            busy = still_busy
+
+        return failures, elapsed
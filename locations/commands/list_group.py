@@ -5,6 +5,7 @@ from scrapy.commands import ScrapyCommand
 from scrapy.exceptions import UsageError
 
 from locations.extensions.add_lineage import VALID_GROUPS, lineage_for_group, spider_class_to_lineage
+from locations.spider_loader import IndexedSpiderLoader
 
 
 class ListGroupCommand(ScrapyCommand):
@@ -36,8 +37,11 @@ class ListGroupCommand(ScrapyCommand):
         if not self.crawler_process:
             raise RuntimeError("Crawler process not defined")
 
-        for spider_name in sorted(self.crawler_process.spider_loader.list()):
-            spidercls = self.crawler_process.spider_loader.load(spider_name)
-            spider_lineage = spider_class_to_lineage(spidercls)
-            if spider_lineage.group == group:
+        spider_loader = self.crawler_process.spider_loader
+        for spider_name in sorted(spider_loader.list()):
+            if isinstance(spider_loader, IndexedSpiderLoader):
+                spider_group = spider_loader.group(spider_name)
+            else:
+                spider_group = spider_class_to_lineage(spider_loader.load(spider_name)).group
+            if spider_group == group:
                 sys.stdout.write(f"{spider_name}\n")
@@ -0,0 +1,38 @@
+import argparse
+from pathlib import Path
+
+from scrapy.commands import ScrapyCommand
+
+from locations.name_suggestion_index import NSI_SNAPSHOT_FILE_PATH, NSISnapshot
+
+
+class NSISnapshotCommand(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {"LOG_ENABLED": False}
+
+    def short_desc(self) -> str:
+        return "Build the memory mapped NSI snapshot"
+
+    def long_desc(self) -> str:
+        return (
+            "Compile the vendored nsi.json and nsi-wikidata.json into a compact snapshot with precomputed indexes. "
+            "Processes memory map the snapshot instead of parsing the JSON files, for as long as the JSON files "
+            "are unchanged."
+        )
+
+    def add_options(self, parser: argparse.ArgumentParser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            "-o",
+            "--outfile",
+            dest="outfile",
+            default=str(NSI_SNAPSHOT_FILE_PATH),
+            type=str,
+            help="file to write the snapshot to [default: %(default)s]",
+        )
+
+    def run(self, args: list[str], opts: argparse.Namespace) -> None:
+        outfile = Path(opts.outfile)
+        NSISnapshot.write(outfile)
+        print(f"Wrote NSI snapshot to {outfile}")
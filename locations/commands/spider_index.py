@@ -0,0 +1,46 @@
+import argparse
+from pathlib import Path
+
+from scrapy.commands import ScrapyCommand
+from scrapy.spiderloader import SpiderLoader
+
+from locations.spider_loader import SPIDER_INDEX_FILE_PATH, build_spider_index, write_spider_index
+
+
+class SpiderIndexCommand(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {"LOG_ENABLED": False}
+
+    def short_desc(self) -> str:
+        return "Generate the spider index"
+
+    def long_desc(self) -> str:
+        return (
+            "Import every spider module once and write the index used by IndexedSpiderLoader, so that subsequent "
+            "scrapy commands only need to import the module of the spider they run."
+        )
+
+    def add_options(self, parser: argparse.ArgumentParser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            "-o",
+            "--outfile",
+            dest="outfile",
+            default=None,
+            type=str,
+            help="file to write the spider index to [default: SPIDER_INDEX_FILE setting]",
+        )
+
+    def run(self, args: list[str], opts: argparse.Namespace) -> None:
+        if not self.settings:
+            raise RuntimeError("Settings not defined")
+
+        # Always walk every module, an existing index may be stale.
+        spider_loader = SpiderLoader.from_settings(self.settings.frozencopy())
+        spider_classes = [spider_loader.load(spider_name) for spider_name in spider_loader.list()]
+        index = build_spider_index(spider_classes, spider_loader.spider_modules)
+
+        outfile = Path(opts.outfile or self.settings.get("SPIDER_INDEX_FILE") or SPIDER_INDEX_FILE_PATH)
+        write_spider_index(index, outfile)
+        print(f"Wrote {len(index['spiders'])} spiders to {outfile}")
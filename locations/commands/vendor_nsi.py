@@ -7,7 +7,7 @@ import requests
 import requests_cache
 from scrapy.commands import ScrapyCommand
 
-from locations.name_suggestion_index import NSI_FILE_PATH, WIKIDATA_FILE_PATH
+from locations.name_suggestion_index import NSI_FILE_PATH, WIKIDATA_FILE_PATH, NSISnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +47,9 @@ class VendorDataCommand(ScrapyCommand):
         self._report_version(Path(NSI_FILE_PATH))
         self._report_version(Path(WIKIDATA_FILE_PATH))
 
+        logger.info("Building NSI snapshot")
+        NSISnapshot.write()
+
     def _vendor_wikidata(self, opts: argparse.Namespace):
         wikidata = requests.get(opts.wikidata_url).json()
 
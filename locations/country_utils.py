@@ -1,14 +1,104 @@
 import unicodedata
+from functools import cache, lru_cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
 from urllib.parse import urlparse
 
 import geonamescache
 from babel import Locale, UnknownLocaleError
 
+from locations.iso3166 import fold, get_country_code
+
+# Number of distinct country strings to memoise the resolution of.
+COUNTRY_CACHE_SIZE = 4096
+
+# Languages whose names of countries, from the CLDR data shipped with babel,
+# are also understood, e.g. "Allemagne" and "Deutschland" -> "DE".
+LOCALISED_NAME_LANGUAGES = ["cs", "da", "de", "es", "fi", "fr", "it", "nb", "nl", "pl", "pt", "sv", "tr"]
+
 
 def strip_accents(s):
     return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
 
 
+class CountryIndex(NamedTuple):
+    # ISO alpha-2 codes of every geonames country.
+    alpha_2: frozenset[str]
+    # ISO alpha-3 codes to alpha-2 codes.
+    alpha_3: Mapping[str, str]
+    # Folded geonames country names to alpha-2 codes.
+    names: Mapping[str, str]
+    # Folded localised country names to alpha-2 codes. Names which refer to
+    # different countries in different languages are left out.
+    localised_names: Mapping[str, str]
+
+
+@cache
+def get_country_index() -> CountryIndex:
+    """
+    Build lookup tables of geonames countries and their localised names,
+    once per process. The tables are read only.
+    """
+    countries = geonamescache.GeonamesCache().get_countries()
+    alpha_2 = frozenset(countries)
+    names = {}
+    for country in countries.values():
+        names.setdefault(fold(country["name"]), country["iso"])
+
+    localised_names = {}
+    ambiguous = set()
+    for language in LOCALISED_NAME_LANGUAGES:
+        for code, name in Locale(language).territories.items():
+            if code not in alpha_2:
+                # Regions such as "001" (World) and "EU".
+                continue
+            name = fold(name)
+            if localised_names.setdefault(name, code) != code:
+                ambiguous.add(name)
+    for name in ambiguous:
+        del localised_names[name]
+
+    return CountryIndex(
+        alpha_2=alpha_2,
+        alpha_3=MappingProxyType({country["iso3"]: country["iso"] for country in countries.values()}),
+        names=MappingProxyType(names),
+        localised_names=MappingProxyType(localised_names),
+    )
+
+
+@lru_cache(maxsize=COUNTRY_CACHE_SIZE)
+def resolve_country_code(country_str: str) -> str | None:
+    """
+    Memoised implementation of CountryUtils.to_iso_alpha2_country_code.
+    :param country_str: the string to map to an ISO alpha-2 country code
+    :return: ISO alpha-2 country code or None if no clean mapping
+    """
+    # Clean up some common appendages we see on country strings.
+    country_str = strip_accents(country_str.replace(".", "").strip())
+    if len(country_str) < 2:
+        return None
+    index = get_country_index()
+    if len(country_str) == 2:
+        # Check for the clean/fast path, spider has given us a 2-alpha iso country code.
+        if country_str.upper() in index.alpha_2:
+            return country_str.upper()
+    if len(country_str) == 3:
+        # Check for a 3-alpha code.
+        if country_code := index.alpha_3.get(country_str.upper()):
+            return country_code
+    # Failed so far, now let's try a match by name.
+    country_name = fold(country_str)
+    if country_code := index.names.get(country_name):
+        return country_code
+    # Finally let's go digging in the random country string collection,
+    # ISO 3166-1 official and common names, and names in other languages.
+    return (
+        CountryUtils.UNHANDLED_COUNTRY_MAPPINGS.get(country_name)
+        or get_country_code(country_name)
+        or index.localised_names.get(country_name)
+    )
+
+
 class CountryUtils:
     def __init__(self):
         self.gc = geonamescache.GeonamesCache()
@@ -37,38 +127,20 @@ class CountryUtils:
         """
         Map country string to an ISO alpha-2 country string. This method understands
         ISO alpha-3 to ISO alpha-2 mapping. It also copes with a few common non
-        contentious mappings such as "UK" -> "GB", "United Kingdom." -> "GB"
+        contentious mappings such as "UK" -> "GB", "United Kingdom." -> "GB",
+        and country names in common languages such as "Allemagne" -> "DE".
+        Results are memoised, as spiders tend to repeat the same few strings.
         :param country_str: the string to map to an ISO alpha-2 country code
         :return: ISO alpha-2 country code or None if no clean mapping
         """
         if not country_str:
             return None
-        # Clean up some common appendages we see on country strings.
-        country_str = strip_accents(country_str.replace(".", "").strip())
-        if len(country_str) < 2:
-            return None
-        if len(country_str) == 2:
-            # Check for the clean/fast path, spider has given us a 2-alpha iso country code.
-            if self.gc.get_countries().get(country_str.upper()):
-                return country_str.upper()
-        if len(country_str) == 3:
-            # Check for a 3-alpha code, this is done by iteration.
-            country_str = country_str.upper()
-            for country in self.gc.get_countries().values():
-                if country["iso3"] == country_str:
-                    return country["iso"]
-        # Failed so far, now let's try a match by name.
-        country_name = country_str.lower()
-        for country in self.gc.get_countries().values():
-            if country["name"].lower() == country_name:
-                return country["iso"]
-        # Finally let's go digging in the random country string collection!
-        return self.UNHANDLED_COUNTRY_MAPPINGS.get(country_name)
+        return resolve_country_code(country_str)
 
     def _convert_to_iso2_country_code(self, candidate: str) -> str | None:
         if len(candidate) == 2:
             candidate = candidate.upper()
-            if self.gc.get_countries().get(candidate):
+            if candidate in get_country_index().alpha_2:
                 return candidate
             if candidate == "UK":
                 # United Kingdom uses the ccTLD of "UK" but the corresponding
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Iterable
 
 from locations.geo import extract_geojson_point_geometry
 from locations.items import Feature
@@ -14,6 +14,110 @@ class KeyVariations:
         return cls._cache[key]
 
 
+class KeyPlan:
+    """
+    Precompiled lookup from every variation of the candidate keys of one or
+    more fields to the fields it can fill, ranked by the position of its key
+    in the field's key list (and of the variation within that key's
+    variations). Resolving a dict is then a single pass over the dict's own
+    keys, finding the same values as probing the dict with each variation of
+    each key in turn.
+    """
+
+    _cache = {}
+
+    def __init__(self, fields: dict[str, list[str]]):
+        self.lookup: dict[str, list[tuple[str, tuple[int, int]]]] = {}
+        self.variations: dict[str, list[str]] = {}
+        for field, keys in fields.items():
+            ranks = {}
+            for i, key in enumerate(keys):
+                for j, variation in enumerate(KeyVariations.get_variations(key)):
+                    ranks.setdefault(variation, (i, j))
+            self.variations[field] = list(ranks.keys())
+            for variation, rank in ranks.items():
+                self.lookup.setdefault(variation, []).append((field, rank))
+
+    @classmethod
+    def for_keys(cls, keys: list[str]) -> "KeyPlan":
+        cache_key = tuple(keys)
+        if cache_key not in cls._cache:
+            cls._cache[cache_key] = KeyPlan({"": keys})
+        return cls._cache[cache_key]
+
+    def resolve(self, obj: dict) -> dict[str, Any]:
+        """
+        :param obj: the dict to look up keys in
+        :return: mapping of field to the (truthy) value of its highest ranked
+                 key variation found in obj, fields not found are omitted
+        """
+        values = {}
+        if type(obj) is not dict:
+            # Other mapping types may not find values by iterating their keys
+            # in the same way as their get() does, so probe them instead.
+            for field, variations in self.variations.items():
+                for variation in variations:
+                    if obj.get(variation):
+                        values[field] = obj[variation]
+                        break
+            return values
+
+        ranks = {}
+        for key, value in obj.items():
+            if (matches := self.lookup.get(key)) and value:
+                for field, rank in matches:
+                    if field not in ranks or rank < ranks[field]:
+                        ranks[field] = rank
+                        values[field] = value
+        return values
+
+    def compile(self, keys: Iterable[str]) -> list[tuple[str, list[str]]]:
+        """
+        :param keys: the keys of a dict
+        :return: for each field, those of the keys which are variations of its
+                 candidate keys, highest ranked first
+        """
+        candidates = {}
+        for key in keys:
+            for field, rank in self.lookup.get(key, []):
+                candidates.setdefault(field, []).append((rank, key))
+        return [(field, [key for _, key in sorted(ranked)]) for field, ranked in candidates.items()]
+
+
+class KeySchemaCache:
+    """
+    Records from the same source usually share the same keys. This remembers,
+    for each distinct set of keys (in order) seen, which keys fill which
+    fields of a `KeyPlan`, so that resolving a dict with a known key set only
+    looks at the few keys which matter. The values found are the same as
+    `KeyPlan.resolve`.
+    """
+
+    def __init__(self, plan: KeyPlan | None = None, max_size: int = 1024):
+        self.plan = plan or DictParser.get_parse_plan()
+        self.max_size = max_size
+        self.schemas: dict[tuple, list[tuple[str, list[str]]]] = {}
+
+    def resolve(self, obj: dict) -> dict[str, Any]:
+        if type(obj) is not dict:
+            return self.plan.resolve(obj)
+
+        signature = tuple(obj)
+        if (schema := self.schemas.get(signature)) is None:
+            if len(self.schemas) >= self.max_size:
+                # Not a homogeneous source, start again rather than growing without bound.
+                self.schemas.clear()
+            schema = self.schemas[signature] = self.plan.compile(signature)
+
+        values = {}
+        for field, keys in schema:
+            for key in keys:
+                if value := obj[key]:
+                    values[field] = value
+                    break
+        return values
+
+
 class DictParser:
     # Variations can't handle capitalised acronyms such as "ID" so
     # the common variants of case including such acronyms need to
@@ -316,12 +420,88 @@ class DictParser:
         "facebook-url",
     ]
 
+    location_keys = [
+        "location",
+        "geo-location",
+        "geo",
+        "geo-point",
+        "geocoded-coordinate",
+        "coordinates",
+        "coords",
+        "geo-position",
+        "position",
+        "positions",
+        "display-coordinate",
+        "location-geopoint",
+        "yextDisplayCoordinate",
+        # NO
+        "koordinat",
+    ]
+
+    contact_keys = [
+        "contact",
+    ]
+
+    _parse_plan: KeyPlan | None = None
+
+    @staticmethod
+    def get_parse_plan() -> KeyPlan:
+        """
+        :return: the precompiled lookup of every key used by `parse`, built on
+                 first use
+        """
+        if DictParser._parse_plan is None:
+            DictParser._parse_plan = KeyPlan(
+                {
+                    "ref": DictParser.ref_keys,
+                    "name": DictParser.name_keys,
+                    "location": DictParser.location_keys,
+                    "lat": DictParser.lat_keys,
+                    "lon": DictParser.lon_keys,
+                    "address": DictParser.full_address_keys,
+                    "housenumber": DictParser.house_number_keys,
+                    "street": DictParser.street_keys,
+                    "street_address": DictParser.street_address_keys,
+                    "city": DictParser.city_keys,
+                    "state": DictParser.region_keys,
+                    "postcode": DictParser.postcode_keys,
+                    "country": DictParser.country_keys,
+                    "isocode": DictParser.isocode_keys,
+                    "contact": DictParser.contact_keys,
+                    "email": DictParser.email_keys,
+                    "phone": DictParser.phone_keys,
+                    "website": DictParser.website_keys,
+                    "twitter": DictParser.twitter_keys,
+                    "facebook": DictParser.facebook_keys,
+                }
+            )
+        return DictParser._parse_plan
+
     @staticmethod
-    def parse(obj: dict) -> Feature:
+    def parse(obj: dict, key_cache: KeySchemaCache | None = None) -> Feature:
+        """
+        :param obj: the dict to extract a feature from
+        :param key_cache: optionally, a `KeySchemaCache` shared between calls
+                          for records of the same source, so that the keys of
+                          each distinct key set are only resolved once
+        :return: the extracted feature
+        """
         item = Feature()
 
-        item["ref"] = DictParser.get_first_key(obj, DictParser.ref_keys)
-        item["name"] = DictParser.get_first_key(obj, DictParser.name_keys)
+        plan = key_cache or DictParser.get_parse_plan()
+        resolved = {id(obj): plan.resolve(obj)}
+
+        def resolve(d: dict) -> dict[str, Any]:
+            # The same dict is often searched for several groups of keys,
+            # e.g. when there is no nested address or contact dict.
+            if id(d) not in resolved:
+                resolved[id(d)] = plan.resolve(d)
+            return resolved[id(d)]
+
+        values = resolved[id(obj)]
+
+        item["ref"] = values.get("ref")
+        item["name"] = values.get("name")
 
         if obj.get("geometry") and obj["geometry"].get("type") in [
             "Point",
@@ -340,40 +520,21 @@ class DictParser:
                 # GeoJSON or GJ2008 geometry.
                 item["geometry"] = obj["geometry"]
         else:
-            location = DictParser.get_first_key(
-                obj,
-                [
-                    "location",
-                    "geo-location",
-                    "geo",
-                    "geo-point",
-                    "geocoded-coordinate",
-                    "coordinates",
-                    "coords",
-                    "geo-position",
-                    "position",
-                    "positions",
-                    "display-coordinate",
-                    "location-geopoint",
-                    "yextDisplayCoordinate",
-                    # NO
-                    "koordinat",
-                ],
-            )
+            location = values.get("location")
             if location and isinstance(location, dict):
                 # First attempt to find coordinates:
                 #   Latitude/longitude are wrapped inside a "coordinates" /
                 #   "location" style of named dictionary.
-                item["lat"] = DictParser.get_first_key(location, DictParser.lat_keys)
-                item["lon"] = DictParser.get_first_key(location, DictParser.lon_keys)
+                item["lat"] = resolve(location).get("lat")
+                item["lon"] = resolve(location).get("lon")
             if item.get("lat", None) is None or item.get("lon", None) is None:
                 # Second attempt to find coordinates if first attempt failed:
                 #   Latitude/longitude are properties of the root dictionary
                 #   or any other nested dictionary of any name.
-                item["lat"] = DictParser.get_first_key(obj, DictParser.lat_keys)
-                item["lon"] = DictParser.get_first_key(obj, DictParser.lon_keys)
+                item["lat"] = values.get("lat")
+                item["lon"] = values.get("lon")
 
-        address = DictParser.get_first_key(obj, DictParser.full_address_keys)
+        address = values.get("address")
 
         if address and isinstance(address, str):
             item["addr_full"] = address
@@ -381,41 +542,45 @@ class DictParser:
         if not address or not isinstance(address, dict):
             address = obj
 
-        item["housenumber"] = DictParser.get_first_key(address, DictParser.house_number_keys)
-        item["street"] = DictParser.get_first_key(address, DictParser.street_keys)
-        item["street_address"] = DictParser.get_first_key(address, DictParser.street_address_keys)
-        item["city"] = DictParser.get_first_key(address, DictParser.city_keys)
-        item["state"] = DictParser.get_first_key(address, DictParser.region_keys)
-        item["postcode"] = DictParser.get_first_key(address, DictParser.postcode_keys)
+        address_values = resolve(address)
+        item["housenumber"] = address_values.get("housenumber")
+        item["street"] = address_values.get("street")
+        item["street_address"] = address_values.get("street_address")
+        item["city"] = address_values.get("city")
+        item["state"] = address_values.get("state")
+        item["postcode"] = address_values.get("postcode")
 
-        country = DictParser.get_first_key(address, DictParser.country_keys)
+        country = address_values.get("country")
         if country and isinstance(country, dict):
-            isocode = DictParser.get_first_key(country, DictParser.isocode_keys)
+            isocode = resolve(country).get("isocode")
             if isocode and isinstance(isocode, str):
                 item["country"] = isocode
             # TODO: Handle other potential country fields inside the dict?
         else:
             item["country"] = country
 
-        contact = DictParser.get_first_key(obj, ["contact"])
+        contact = values.get("contact")
         if not contact or not isinstance(contact, dict):
             contact = obj
 
-        item["email"] = DictParser.get_first_key(contact, DictParser.email_keys)
-        item["phone"] = DictParser.get_first_key(contact, DictParser.phone_keys)
-        item["website"] = DictParser.get_first_key(contact, DictParser.website_keys)
-        item["twitter"] = DictParser.get_first_key(contact, DictParser.twitter_keys)
-        item["facebook"] = DictParser.get_first_key(contact, DictParser.facebook_keys)
+        contact_values = resolve(contact)
+        item["email"] = contact_values.get("email")
+        item["phone"] = contact_values.get("phone")
+        item["website"] = contact_values.get("website")
+        item["twitter"] = contact_values.get("twitter")
+        item["facebook"] = contact_values.get("facebook")
 
         return item
 
     @staticmethod
     def get_first_key(obj: dict, keys: list[str]) -> Any:
-        for key in keys:
-            variations = KeyVariations.get_variations(key)
-            for variation in variations:
-                if obj.get(variation):
-                    return obj[variation]
+        plan = KeyPlan.for_keys(keys)
+        if type(obj) is dict and len(obj) < len(plan.lookup):
+            return plan.resolve(obj).get("")
+        # Probing is cheaper for dicts with more keys than there are variations.
+        for variation in plan.variations[""]:
+            if obj.get(variation):
+                return obj[variation]
 
     @staticmethod
     def get_variations(key: str) -> set[str]:
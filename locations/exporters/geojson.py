@@ -3,10 +3,14 @@ import datetime
 import hashlib
 import json
 import uuid
+from functools import cache
 from io import BytesIO, StringIO
-from typing import Any, Generator, Type
+from json import JSONEncoder
+from typing import Any, Callable, Generator, Iterable, Type
+from weakref import WeakKeyDictionary
 
-from scrapy import Item, Spider
+from scrapy import Item, Spider, signals
+from scrapy.crawler import Crawler
 from scrapy.exporters import JsonItemExporter
 from scrapy.utils.misc import walk_modules_iter
 from scrapy.utils.python import to_bytes
@@ -15,6 +19,7 @@ from scrapy.utils.spider import iter_spider_classes
 from locations.extensions.add_lineage import spider_class_to_lineage
 from locations.geo import extract_geojson_point_geometry
 from locations.settings import SPIDER_MODULES
+from locations.spider_loader import load_indexed_spider_class, load_spider_index
 
 mapping = (
     ("addr_full", "addr:full"),
@@ -48,14 +53,17 @@ mapping = (
 
 
 def item_to_properties(item: Item) -> dict[str, Any]:
+    # Looking up fields of a plain dict is much faster than of an Item, where
+    # every missing field raises a KeyError internally.
+    values = dict(item)
     props = {}
 
     # Ref is required, unless `no_refs = True` is set in spider
-    if ref := item.get("ref"):
+    if ref := values.get("ref"):
         props["ref"] = str(ref)
 
     # Add in the extra bits
-    if extras := item.get("extras"):
+    if extras := values.get("extras"):
         for key, value in extras.items():
             if value is not None and value != "":
                 # Only export populated values
@@ -63,7 +71,7 @@ def item_to_properties(item: Item) -> dict[str, Any]:
 
     # Bring in the optional stuff
     for map_from, map_to in mapping:
-        if item_value := item.get(map_from):
+        if item_value := values.get(map_from):
             if item_value is not None and item_value != "":
                 props[map_to] = item_value
 
@@ -137,13 +145,31 @@ def compute_hash(item: Item) -> str:
     return base64.urlsafe_b64encode(sha1.digest()).decode("utf8")
 
 
+@cache
+def get_spider_index() -> dict[str, dict] | None:
+    return load_spider_index(SPIDER_MODULES)
+
+
+@cache
+def get_spider_classes() -> dict[str, Type[Spider]]:
+    spider_classes = {}
+    for spider_class in iter_spider_classes_in_modules():
+        spider_classes.setdefault(spider_class.name, spider_class)
+    return spider_classes
+
+
 def find_spider_class(spider_name: str):
+    """
+    Find a spider class by name, importing only its module if the spider
+    index (see locations/spider_loader.py) is up to date. Otherwise every
+    spider module is imported, once per process.
+    """
     if not spider_name:
         return None
-    for spider_class in iter_spider_classes_in_modules():
-        if spider_name == spider_class.name:
+    if (index := get_spider_index()) and (entry := index.get(spider_name)):
+        if spider_class := load_indexed_spider_class(spider_name, entry):
             return spider_class
-    return None
+    return get_spider_classes().get(spider_name)
 
 
 def iter_spider_classes_in_modules(modules=SPIDER_MODULES) -> Generator[Type[Spider], Any, None]:
@@ -153,9 +179,10 @@ def iter_spider_classes_in_modules(modules=SPIDER_MODULES) -> Generator[Type[Spi
                 yield spider_class
 
 
-def get_dataset_attributes(spider_name: str) -> dict:
-    spider_class = find_spider_class(spider_name)
-    dataset_attributes = getattr(spider_class, "dataset_attributes", {})
+def get_dataset_attributes(spider_name: str, spider_class: Type[Spider] | None = None) -> dict:
+    if spider_class is None:
+        spider_class = find_spider_class(spider_name)
+    dataset_attributes = dict(getattr(spider_class, "dataset_attributes", {}))
     settings = getattr(spider_class, "custom_settings", {}) or {}
     if not settings.get("ROBOTSTXT_OBEY", True):
         # See https://github.com/alltheplaces/alltheplaces/issues/4537
@@ -168,7 +195,140 @@ def get_dataset_attributes(spider_name: str) -> dict:
     return dataset_attributes
 
 
-class GeoJsonExporter(JsonItemExporter):
+# Dataset attributes of each crawl, shared by all of its feed exporters.
+crawl_dataset_attributes: "WeakKeyDictionary[Crawler, dict]" = WeakKeyDictionary()
+
+
+def get_exporter_dataset_attributes(crawler: Crawler | None, spider_name: str) -> dict:
+    """
+    :param crawler: crawler of the exporter, if it was created by one
+    :param spider_name: name of the spider of the items exported
+    :return: dataset attributes of the spider, computed once per crawl from
+             the crawler's spider class
+    """
+    if crawler is None or crawler.spidercls.name != spider_name:
+        return get_dataset_attributes(spider_name)
+    if crawler not in crawl_dataset_attributes:
+        crawl_dataset_attributes[crawler] = get_dataset_attributes(spider_name, crawler.spidercls)
+    return crawl_dataset_attributes[crawler]
+
+
+class FeatureCache:
+    """
+    Parts of the GeoJSON feature of the item being exported, shared by the
+    feed exporters of a crawl. Scrapy passes each scraped item to every feed
+    exporter in turn, so each part is computed by the first exporter needing
+    it and reused by the others.
+    """
+
+    parts: dict[str, Callable[[Item], Any]] = {
+        "id": compute_hash,
+        "properties": item_to_properties,
+        "geometry": item_to_geometry,
+    }
+
+    def __init__(self):
+        self.item = None
+        self.values: dict[Any, Any] = {}
+
+    def clear(self) -> None:
+        self.item = None
+        self.values = {}
+
+    def get(self, item: Item, part: str) -> Any:
+        """
+        :param item: item being exported
+        :param part: "id", "properties" or "geometry"
+        :return: part of the GeoJSON feature of the item. Not to be modified.
+        """
+        if item is not self.item:
+            self.item = item
+            self.values = {}
+        if part not in self.values:
+            self.values[part] = self.parts[part](item)
+        return self.values[part]
+
+    def get_json(self, item: Item, part: str, encoder: JSONEncoder) -> str:
+        """
+        :param item: item being exported
+        :param part: "id", "properties" or "geometry"
+        :param encoder: JSON encoder of the exporter
+        :return: part of the GeoJSON feature of the item encoded by encoder,
+                 shared by exporters with encoders of the same options
+        """
+        value = self.get(item, part)
+        key = (
+            part,
+            type(encoder),
+            encoder.ensure_ascii,
+            encoder.sort_keys,
+            encoder.indent,
+            encoder.item_separator,
+            encoder.key_separator,
+        )
+        if key not in self.values:
+            self.values[key] = encoder.encode(value)
+        return self.values[key]
+
+
+# Feature caches of each crawl, shared by all of its feed exporters.
+crawl_feature_caches: "WeakKeyDictionary[Crawler, FeatureCache]" = WeakKeyDictionary()
+
+
+def get_feature_cache(crawler: Crawler) -> FeatureCache:
+    if crawler not in crawl_feature_caches:
+        feature_cache = crawl_feature_caches[crawler] = FeatureCache()
+        # Connected after the feed exporter extension's handler, so the cache
+        # is cleared once every feed has exported the item.
+        crawler.signals.connect(feature_cache.clear, signal=signals.item_scraped)
+    return crawl_feature_caches[crawler]
+
+
+class FeatureExporterMixin:
+    """
+    Feed exporter of GeoJSON features, sharing the parts of features common
+    to all feeds of a crawl, and their JSON encoding, through a FeatureCache.
+    """
+
+    crawler: Crawler | None
+    feature_cache: FeatureCache | None
+    encoder: JSONEncoder
+
+    def __init__(self, *args: Any, crawler: Crawler | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.crawler = crawler
+        self.feature_cache = get_feature_cache(crawler) if crawler else None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler, file: BytesIO, **kwargs):
+        return cls(file, crawler=crawler, **kwargs)
+
+    def get_feature_cache(self) -> FeatureCache:
+        # Without a crawler, items cannot be told apart from themselves after
+        # modification, so nothing is shared between items.
+        return self.feature_cache or FeatureCache()
+
+    def encode_feature(self, item: Item, fields: Iterable[tuple[str, Any]], shared_parts: Iterable[str]) -> str:
+        """
+        Encode a feature as self.encoder.encode would, taking the encoding of
+        the fields named in shared_parts (being FeatureCache parts) from the
+        FeatureCache.
+        """
+        if self.encoder.indent is not None or self.encoder.sort_keys:
+            # Encoded parts could not be nested as they are.
+            return self.encoder.encode(dict(fields))
+        feature_cache = self.get_feature_cache()
+        members = []
+        for name, value in fields:
+            if name in shared_parts:
+                encoded = feature_cache.get_json(item, name, self.encoder)
+            else:
+                encoded = self.encoder.encode(value)
+            members.append(self.encoder.encode(name) + self.encoder.key_separator + encoded)
+        return "{" + self.encoder.item_separator.join(members) + "}"
+
+
+class GeoJsonExporter(FeatureExporterMixin, JsonItemExporter):
     spider_name: str | None = None
 
     def __init__(self, file: BytesIO, **kwargs):
@@ -199,16 +359,19 @@ class GeoJsonExporter(JsonItemExporter):
                 f"Extracted data from multiple spiders ({spider_name, self.spider_name}) cannot be written to same GeoJSON file"
             )
 
-        super().export_item(item)
+        feature = self.encode_feature(item, self._get_serialized_fields(item), FeatureCache.parts)
+        self._add_comma_after_first()
+        self.file.write(to_bytes(feature, self.encoding))
 
     def _get_serialized_fields(
         self, item: Item, default_value: Any = None, include_empty: bool | None = None
     ) -> list[tuple]:
+        feature_cache = self.get_feature_cache()
         feature = [
             ("type", "Feature"),
-            ("id", compute_hash(item)),
-            ("properties", item_to_properties(item)),
-            ("geometry", item_to_geometry(item)),
+            ("id", feature_cache.get(item, "id")),
+            ("properties", feature_cache.get(item, "properties")),
+            ("geometry", feature_cache.get(item, "geometry")),
         ]
 
         return feature
@@ -219,7 +382,11 @@ class GeoJsonExporter(JsonItemExporter):
         header = StringIO()
         header.write('{"type":"FeatureCollection","dataset_attributes":')
         json.dump(
-            get_dataset_attributes(self.spider_name), header, ensure_ascii=False, separators=(",", ":"), sort_keys=True
+            get_exporter_dataset_attributes(self.crawler, self.spider_name),
+            header,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            sort_keys=True,
         )
         header.write(',"features":[\n')
         self.file.write(to_bytes(header.getvalue(), self.encoding))
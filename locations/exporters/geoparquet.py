@@ -1,52 +1,155 @@
-import geopandas
+import json
+import os
+import tempfile
+
 import pyarrow as pa
 import pyarrow.parquet
+import shapely
 from scrapy.exporters import BaseItemExporter
 
-from locations.exporters.geojson import item_to_geojson_feature
+from locations.exporters.geojson import FeatureExporterMixin
+
+# Number of features buffered in memory and written out together as one
+# Parquet row group. Peak memory use of the exporter is bounded by this.
+DEFAULT_ROW_GROUP_SIZE = 10_000
+
+GEOMETRY_FIELD = pa.field(
+    "geometry",
+    pa.binary(),
+    metadata={"ARROW:extension:name": "geoarrow.wkb", "ARROW:extension:metadata": "{}"},
+)
+
 
+def align_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """
+    Add null columns to a table for any field of schema it is missing, and
+    order its columns to match schema.
+    """
+    columns = [
+        table.column(field.name) if field.name in table.schema.names else pa.nulls(table.num_rows, field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
 
-class GeoparquetExporter(BaseItemExporter):
-    def __init__(self, file, **kwargs):
+
+class GeoparquetExporter(FeatureExporterMixin, BaseItemExporter):
+    """
+    Write features to a GeoParquet file one row group at a time, with WKB
+    geometry and all attributes as strings.
+
+    Small outputs (a single row group) are written straight to the file. As
+    Parquet requires every row group to share a schema, and new attributes may
+    appear at any point in a crawl, larger outputs are spilled to temporary
+    Parquet files and streamed, row group by row group, into the file under
+    the union of all attributes when exporting finishes.
+    """
+
+    def __init__(self, file, row_group_size: int = DEFAULT_ROW_GROUP_SIZE, **kwargs):
         super().__init__(**kwargs)
-        self.first_item = True
         self.file = file
-        self.features = []
+        self.row_group_size = int(row_group_size)
+        self.columns: dict[str, None] = {}
+        self.geometries = []
+        self.rows = []
+        self.bbox = None
+        self.geometry_types = set()
+        self.spill_dir = None
+        self.spill_files = []
+        self.spill_writer = None
+        self.spill_schema = None
 
     def export_item(self, item):
-        if self.first_item:
-            # TODO Figure out a way to attach dataset attributes to the parquet file.
-            # self.write_dataset_attributes_table(item)
-            self.first_item = False
-
-        # Convert the item to a GeoJSON feature
-        feature = item_to_geojson_feature(item)
+        # TODO Figure out a way to attach dataset attributes to the parquet file.
 
         # Convert all attributes to strings so that the Parquet output is of consistent type.
         # Without this, the "global" Parquet file would have mixed types in the same column.
-        for key, value in feature["properties"].items():
-            feature["properties"][key] = str(value)
+        feature_cache = self.get_feature_cache()
+        properties = {key: str(value) for key, value in feature_cache.get(item, "properties").items()}
+        self.columns.update(dict.fromkeys(properties))
+        self.rows.append(properties)
 
-        self.features.append(feature)
+        geometry = feature_cache.get(item, "geometry")
+        self.geometries.append(shapely.geometry.shape(geometry) if geometry else None)
+
+        if len(self.rows) >= self.row_group_size:
+            self.spill(self.to_table())
+
+    def schema(self) -> pa.Schema:
+        return pa.schema([GEOMETRY_FIELD] + [pa.field(column, pa.string()) for column in self.columns])
+
+    def to_table(self) -> pa.Table:
+        """
+        Convert the buffered features to a table, and update the bounding box
+        and geometry types of the file with them.
+        """
+        present = [geometry for geometry in self.geometries if geometry is not None]
+        if present:
+            bounds = shapely.total_bounds(present).tolist()
+            if self.bbox is None:
+                self.bbox = bounds
+            else:
+                self.bbox = [
+                    min(self.bbox[0], bounds[0]),
+                    min(self.bbox[1], bounds[1]),
+                    max(self.bbox[2], bounds[2]),
+                    max(self.bbox[3], bounds[3]),
+                ]
+            self.geometry_types.update(geometry.geom_type for geometry in present)
+
+        schema = self.schema()
+        columns = [
+            pa.array(shapely.to_wkb(self.geometries).tolist() if self.geometries else [], type=GEOMETRY_FIELD.type)
+        ]
+        for field in list(schema)[1:]:
+            columns.append(pa.array([row.get(field.name) for row in self.rows], type=field.type))
+        table = pa.Table.from_arrays(columns, schema=schema)
+
+        self.geometries = []
+        self.rows = []
+        return table
+
+    def spill(self, table: pa.Table) -> None:
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.TemporaryDirectory(prefix="geoparquet-")
+        writer = self.spill_writer
+        if writer is None or self.spill_schema is None or not table.schema.equals(self.spill_schema):
+            # New attributes have been seen, so start a new spill file with the wider schema.
+            if writer is not None:
+                writer.close()
+            path = os.path.join(self.spill_dir.name, f"{len(self.spill_files)}.parquet")
+            self.spill_files.append(path)
+            self.spill_schema = table.schema
+            writer = self.spill_writer = pyarrow.parquet.ParquetWriter(path, self.spill_schema)
+        writer.write_table(table, row_group_size=self.row_group_size)
+
+    def geo_metadata(self) -> dict:
+        column = {"encoding": "WKB", "crs": None, "geometry_types": sorted(self.geometry_types)}
+        if self.bbox is not None:
+            column["bbox"] = self.bbox
+        return {"primary_column": "geometry", "columns": {"geometry": column}, "version": "1.1.0"}
 
     def finish_exporting(self):
-        # Don't write an empty Parquet file
-        if not self.features:
+        if self.spill_writer is None:
+            # Don't write an empty Parquet file
+            if not self.rows:
+                return
+            table = self.to_table()
+            schema = table.schema.with_metadata({"geo": json.dumps(self.geo_metadata())})
+            with pyarrow.parquet.ParquetWriter(self.file, schema) as writer:
+                writer.write_table(table, row_group_size=self.row_group_size)
             return
 
-        # Create a GeoDataFrame from the features
-        gdf = geopandas.GeoDataFrame.from_features(self.features)
-
-        # Determine if we have a file path or a file-like object
-        if isinstance(self.file, str):
-            # It's a file path string, use gdf.to_parquet directly
-            gdf.to_parquet(self.file)
-        elif hasattr(self.file, "name") and isinstance(self.file.name, str):
-            # It's a real file handle with a .name attribute (opened by Scrapy)
-            # Use the file path instead of the file handle to avoid issues with geopandas.to_parquet()
-            gdf.to_parquet(self.file.name)
-        else:
-            # It's a file-like object (BytesIO), convert geometry to WKB and use pyarrow directly
-            gdf_wkb = gdf.to_wkb()
-            table = pa.Table.from_pandas(gdf_wkb, preserve_index=False)
-            pyarrow.parquet.write_table(table, self.file)
+        try:
+            if self.rows:
+                self.spill(self.to_table())
+            self.spill_writer.close()
+
+            schema = self.schema().with_metadata({"geo": json.dumps(self.geo_metadata())})
+            with pyarrow.parquet.ParquetWriter(self.file, schema) as writer:
+                for path in self.spill_files:
+                    spill_file = pyarrow.parquet.ParquetFile(path)
+                    for i in range(spill_file.num_row_groups):
+                        writer.write_table(align_table(spill_file.read_row_group(i), schema))
+        finally:
+            if self.spill_dir is not None:
+                self.spill_dir.cleanup()
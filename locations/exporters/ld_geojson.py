@@ -1,26 +1,29 @@
 import logging
 
 from scrapy.exporters import JsonLinesItemExporter
+from scrapy.utils.python import to_bytes
 
-from locations.exporters.geojson import compute_hash, get_dataset_attributes, item_to_properties
+from locations.exporters.geojson import FeatureExporterMixin, get_exporter_dataset_attributes
 
 
-class LineDelimitedGeoJsonExporter(JsonLinesItemExporter):
+class LineDelimitedGeoJsonExporter(FeatureExporterMixin, JsonLinesItemExporter):
     dataset_attributes = None
     first_item = True
 
     def export_item(self, item):
         if self.first_item:
             self.first_item = False
-            self.dataset_attributes = get_dataset_attributes(item["extras"].get("@spider"))
-        super().export_item(item)
+            self.dataset_attributes = get_exporter_dataset_attributes(self.crawler, item["extras"].get("@spider"))
+        feature = self.encode_feature(item, self._get_serialized_fields(item), ["id", "properties"])
+        self.file.write(to_bytes(feature + "\n", self.encoding))
 
     def _get_serialized_fields(self, item, default_value=None, include_empty=None):
         feature = []
         feature.append(("type", "Feature"))
-        feature.append(("id", compute_hash(item)))
+        feature_cache = self.get_feature_cache()
+        feature.append(("id", feature_cache.get(item, "id")))
         feature.append(("dataset_attributes", self.dataset_attributes))
-        feature.append(("properties", item_to_properties(item)))
+        feature.append(("properties", feature_cache.get(item, "properties")))
 
         lat = item.get("lat")
         lon = item.get("lon")
@@ -0,0 +1,68 @@
+from collections import Counter
+from weakref import WeakKeyDictionary
+
+from scrapy import signals
+from scrapy.crawler import Crawler
+from scrapy.statscollectors import StatsCollector
+
+# Number of increments counted locally before they are added to the stats
+# collector, so that stats are still reasonably current while crawling.
+STATS_BATCH_SIZE = 10000
+
+
+class StatsCounter:
+    """
+    Count increments of stats locally, adding them to a Scrapy stats
+    collector in batches rather than calling StatsCollector.inc_value for
+    each increment.
+    """
+
+    def __init__(self, stats: StatsCollector, batch_size: int = STATS_BATCH_SIZE):
+        self.stats = stats
+        self.batch_size = batch_size
+        self.counts = Counter()
+        self.pending = 0
+
+    def inc_value(self, key: str, count: int = 1) -> None:
+        self.counts[key] += count
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        counts, self.counts, self.pending = self.counts, Counter(), 0
+        for key, count in counts.items():
+            self.stats.inc_value(key, count)
+
+
+crawl_stats_counters: WeakKeyDictionary[Crawler, StatsCounter] = WeakKeyDictionary()
+
+
+def get_stats_counter(crawler: Crawler) -> StatsCounter | StatsCollector | None:
+    """
+    :return: the batched stats counter of a crawl if BatchStatsExtension is
+             enabled, otherwise the crawler's stats collector, which both
+             count with inc_value(key, count)
+    """
+    return crawl_stats_counters.get(crawler, crawler.stats)
+
+
+class BatchStatsExtension:
+    """
+    Batch the per item stats counted by pipelines and middlewares (see
+    get_stats_counter). Counts are flushed to the stats collector when the
+    spider closes, before extensions such as LogStatsExtension read the stats,
+    so must be ordered before them.
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler):
+        ext = cls()
+        if crawler.stats:
+            counter = crawl_stats_counters[crawler] = StatsCounter(
+                crawler.stats, crawler.settings.getint("STATS_BATCH_SIZE", STATS_BATCH_SIZE)
+            )
+            crawler.signals.connect(counter.flush, signal=signals.spider_idle)
+            crawler.signals.connect(counter.flush, signal=signals.spider_error)
+            crawler.signals.connect(counter.flush, signal=signals.spider_closed)
+        return ext
@@ -0,0 +1,245 @@
+import time
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Iterable
+from functools import wraps
+from typing import Any, Callable
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+
+from locations.extensions.batch_stats import get_stats_counter
+from locations.pipelines.fused import FusedItemPipeline
+
+# Upper bounds in nanoseconds of the latency histogram buckets, and the names
+# of the buckets. The last bucket is for latencies over the last bound.
+LATENCY_BOUNDS = [10_000, 100_000, 1_000_000, 10_000_000, 100_000_000, 1_000_000_000]
+LATENCY_BUCKETS = ["le_10us", "le_100us", "le_1ms", "le_10ms", "le_100ms", "le_1s", "gt_1s"]
+
+
+class ComponentTimer:
+    """
+    Count, total time and latency histogram of the sampled calls of a
+    component, recorded as "atp/perf/<kind>/<name>/..." stats.
+    """
+
+    def __init__(self, stats: Any, prefix: str, sample_every: int = 1):
+        """
+        :param stats: stats collector or counter with inc_value(key, count)
+        :param prefix: prefix of the stats of the component
+        :param sample_every: time one in every sample_every calls
+        """
+        self.stats = stats
+        self.sample_every = sample_every
+        self.calls = 0
+        self.count_key = f"{prefix}/count"
+        self.time_key = f"{prefix}/time_ns"
+        self.bucket_keys = [f"{prefix}/latency/{bucket}" for bucket in LATENCY_BUCKETS]
+
+    def sample(self) -> bool:
+        self.calls += 1
+        return self.calls % self.sample_every == 0
+
+    def record(self, elapsed: int) -> None:
+        """
+        :param elapsed: time of a call in nanoseconds
+        """
+        self.stats.inc_value(self.count_key)
+        self.stats.inc_value(self.time_key, elapsed)
+        self.stats.inc_value(self.bucket_keys[bisect_left(LATENCY_BOUNDS, elapsed)])
+
+
+class Stopwatch:
+    """
+    Total time spent getting results from iterables, used to time the
+    iterables passed to spider middlewares.
+    """
+
+    def __init__(self):
+        self.elapsed = 0
+
+    def wrap(self, iterable: Iterable | AsyncIterator) -> Iterable | AsyncIterator:
+        if isinstance(iterable, AsyncIterator):
+            return self.wrap_async(iterable)
+        return self.wrap_sync(iterable)
+
+    def wrap_sync(self, iterable: Iterable) -> Iterable:
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                result = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.elapsed += time.perf_counter_ns() - start
+            yield result
+
+    async def wrap_async(self, iterator: AsyncIterator) -> AsyncIterator:
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                result = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                self.elapsed += time.perf_counter_ns() - start
+            yield result
+
+
+def time_output(
+    output: Iterable | AsyncIterator, inner: Stopwatch, timer: ComponentTimer, callback_timer: ComponentTimer | None
+) -> Iterable | AsyncIterator:
+    """
+    Time iterating the output of a spider middleware, less the time spent
+    getting results from its input (timed by inner), which is the time of
+    the middlewares nearer the spider and of the callback.
+    """
+    outer = Stopwatch()
+
+    def record():
+        timer.record(outer.elapsed - inner.elapsed)
+        if callback_timer:
+            callback_timer.record(inner.elapsed)
+
+    if isinstance(output, AsyncIterator):
+
+        async def timed_async():
+            try:
+                async for result in outer.wrap_async(output):
+                    yield result
+            finally:
+                record()
+
+        return timed_async()
+
+    def timed_sync():
+        try:
+            yield from outer.wrap_sync(output)
+        finally:
+            record()
+
+    return timed_sync()
+
+
+def get_component_name(method: Callable) -> str:
+    if component := getattr(method, "__self__", None):
+        return type(component).__name__
+    # The class of functions defined in methods, such as the steps of a
+    # FusedItemPipeline.
+    return getattr(method, "__qualname__", repr(method)).split(".")[0]
+
+
+def get_callback_name(response: Response) -> str:
+    callback = response.request.callback if response.request else None
+    if callback is None:
+        return "parse"
+    return getattr(callback, "__name__", str(callback))
+
+
+class PerfStatsExtension:
+    """
+    Time each item pipeline, spider middleware and spider callback of a
+    crawl, and the download latency of responses. Stats are recorded per
+    component as "atp/perf/<kind>/<name>/count", ".../time_ns" and a latency
+    histogram of ".../latency/<bucket>" counts, so are written to
+    LOGSTATS_FILE with the other stats.
+
+    Enable with "-s PERF_STATS_ENABLED=True". One in every
+    PERF_STATS_SAMPLE_EVERY item or response is timed by each component, so
+    that the extension can be left enabled with little overhead.
+
+    Pipelines run by a FusedItemPipeline are timed separately, as well as in
+    total as "atp/perf/pipeline/FusedItemPipeline".
+
+    Spider middleware times exclude the time spent in middlewares nearer the
+    spider and in the callback. Callbacks are timed while their output is
+    iterated, so an asynchronous callback's time includes any time spent
+    awaiting. Pipelines returning a Deferred or coroutine are timed until it
+    is returned.
+    """
+
+    crawler: Crawler
+
+    def __init__(self, crawler: Crawler, sample_every: int = 1):
+        self.crawler = crawler
+        self.sample_every = sample_every
+        self.stats = get_stats_counter(crawler)
+        self.timers = {}
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.response_received, signal=signals.response_received)
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler):
+        if not crawler.settings.getbool("PERF_STATS_ENABLED") or not crawler.stats:
+            raise NotConfigured
+        return cls(crawler, max(crawler.settings.getint("PERF_STATS_SAMPLE_EVERY", 1), 1))
+
+    def get_timer(self, kind: str, name: str) -> ComponentTimer:
+        if (timer := self.timers.get((kind, name))) is None:
+            timer = self.timers[(kind, name)] = ComponentTimer(self.stats, f"atp/perf/{kind}/{name}", self.sample_every)
+        return timer
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.crawler.stats.set_value("atp/perf/sample_every", self.sample_every)
+        scraper = self.crawler.engine.scraper
+        for method in list(scraper.itemproc.methods["process_item"]):
+            # Time the pipelines run by a FusedItemPipeline separately.
+            if isinstance(pipeline := getattr(method, "__self__", None), FusedItemPipeline):
+                self.wrap_methods(pipeline, "process_item", self.time_call, "pipeline")
+        self.wrap_methods(scraper.itemproc, "process_item", self.time_call, "pipeline")
+        self.wrap_methods(scraper.spidermw, "process_spider_input", self.time_call, "spider_input")
+        self.wrap_methods(scraper.spidermw, "process_spider_output", self.time_spider_output, "spider_output")
+
+    def wrap_methods(self, manager: Any, method_name: str, wrap: Callable, kind: str) -> None:
+        methods = manager.methods[method_name]
+        requiring_spider = getattr(manager, "_mw_methods_requiring_spider", set())
+        for i, method in enumerate(list(methods)):
+            if method is None:
+                continue
+            # The middleware nearest the spider times the callback.
+            wrapped = wrap(method, kind, innermost=not any(methods[j] for j in range(i)))
+            if method in requiring_spider:
+                requiring_spider.add(wrapped)
+            methods[i] = wrapped
+
+    def time_call(self, method: Callable, kind: str, innermost: bool) -> Callable:
+        timer = self.get_timer(kind, get_component_name(method))
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            if not timer.sample():
+                return method(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timer.record(time.perf_counter_ns() - start)
+
+        return timed
+
+    def time_spider_output(self, method: Callable, kind: str, innermost: bool) -> Callable:
+        timer = self.get_timer(kind, get_component_name(method))
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            if not timer.sample():
+                return method(*args, **kwargs)
+            inner = Stopwatch()
+            if "result" in kwargs:
+                kwargs["result"] = inner.wrap(kwargs["result"])
+            else:
+                args = (args[0], inner.wrap(args[1]), *args[2:])
+            callback_timer = None
+            if innermost:
+                callback_timer = self.get_timer("callback", get_callback_name(kwargs.get("response") or args[0]))
+            return time_output(method(*args, **kwargs), inner, timer, callback_timer)
+
+        return timed
+
+    def response_received(self, response: Response, request: Request) -> None:
+        if (latency := request.meta.get("download_latency")) is not None:
+            timer = self.get_timer("downloader", "response")
+            if timer.sample():
+                timer.record(int(latency * 1_000_000_000))
@@ -1,20 +1,18 @@
-import csv
-import gzip
 import json
 import math
-from io import TextIOWrapper
-from itertools import groupby
 from typing import Any, Iterable
 
-import geonamescache
-from pyproj import Transformer
-
-from locations.searchable_points import get_searchable_points_path, open_searchable_points
+from locations.reprojection import reproject_point
+from locations.searchable_points import open_searchable_points
+from locations.searchable_points.store import get_searchable_points_store
+from locations.searchable_points.tables import get_city_indexes, get_postal_region_table
 
 # Radius of the Earth in kilometers
 EARTH_RADIUS = 6378.1
 # Kilometers per mile
 MILES_TO_KILOMETERS = 1.60934
+# Radiuses in kilometers of the ISEADGG centroid files
+ISEADGG_RADIUSES = [24, 48, 79, 94, 158, 315, 458]
 
 
 def vincenty_distance(lat: float, lon: float, distance_km: float, bearing_deg: float) -> tuple[float, float]:
@@ -40,6 +38,20 @@ def vincenty_distance(lat: float, lon: float, distance_km: float, bearing_deg: f
     return math.degrees(lat2), math.degrees(lon2)
 
 
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Returns the great-circle distance in kilometres between two lat, lon
+    points.
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    a = (
+        math.sin((lat2_rad - lat1_rad) / 2) ** 2
+        + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
 def country_iseadgg_centroids(country_codes: list[str] | str, radius: int) -> list[tuple[float, float]]:
     """
     Get WGS84 ISEADGG point locations for one or more countries at a specified
@@ -80,21 +92,21 @@ def country_iseadgg_centroids(country_codes: list[str] | str, radius: int) -> li
     :return: list of locations being a tuple consisting of latitude then
              longitude WGS84 coordinates.
     """
-    if radius not in [24, 48, 79, 94, 158, 315, 458]:
+    if radius not in ISEADGG_RADIUSES:
         raise ValueError("Invalid search radius specified. Value must be 24, 48, 79, 94, 158, 315 or 458 (kilometres).")
 
     if isinstance(country_codes, str):
         country_codes = [country_codes]
 
+    store = get_searchable_points_store()
     all_points = []
     for country_code in country_codes:
         try:
-            with open_searchable_points(
-                "iseadgg/{}_centroids_iseadgg_{}km_radius.csv".format(country_code.lower(), str(radius))
-            ) as file:
-                rows = csv.DictReader(file)
-                for row in rows:
-                    all_points.append((float(row["latitude"]), float(row["longitude"])))
+            all_points.extend(
+                store.get_points(
+                    "iseadgg/{}_centroids_iseadgg_{}km_radius.csv".format(country_code.lower(), str(radius))
+                )
+            )
         except FileNotFoundError:
             raise ValueError(
                 "Invalid ISO-3166 alpha-2 country code supplied. Ensure supplied code is represented in the locations/searchable_points/iseadgg/ path."
@@ -122,38 +134,13 @@ def point_locations(
 
     """
 
-    def get_key(row, keys):
-        for key in keys:
-            if row.get(key):
-                return row[key]
-        return None
-
     if isinstance(areas_csv_file, str):
         areas_csv_file = [areas_csv_file]
-    if area_field_filter and isinstance(area_field_filter, str):
-        area_field_filter = [area_field_filter]
+    if isinstance(area_field_filter, str):
+        area_field_filter = [area_field_filter] if area_field_filter else []
+    store = get_searchable_points_store()
     for csv_file in areas_csv_file:
-        with open_searchable_points("{}".format(csv_file)) as file:
-            for row in csv.DictReader(file):
-                try:
-                    lat, lon = float(row["latitude"]), float(row["longitude"])
-                except ValueError:
-                    raise Exception(
-                        "Invalid latitude/longitude in searchable points file {} where latitude = {} and longitude = {}.".format(
-                            csv_file, row["latitude"], row["longitude"]
-                        )
-                    )
-                area = get_key(row, ["country", "territory", "state"])
-                if area_field_filter:
-                    if not area:
-                        raise Exception(
-                            "Searchable points file {} does not support area field filters (columns named 'country', 'territory' and 'state').".format(
-                                csv_file
-                            )
-                        )
-                    if area not in area_field_filter:
-                        continue
-                yield lat, lon
+        yield from store.get_points(csv_file, area_field_filter)
 
 
 def city_locations(country_code: str, min_population: int = 0) -> Iterable[dict]:
@@ -164,9 +151,9 @@ def city_locations(country_code: str, min_population: int = 0) -> Iterable[dict]
     :param min_population: minimum population to be included in result list, default zero
     :return: iterator of city names with locations
     """
-    for city in geonamescache.GeonamesCache().get_cities().values():
-        if city["countrycode"].lower() == country_code.lower() and city["population"] >= min_population:
-            yield city
+    if city_index := get_city_indexes().get(country_code.lower()):
+        for city in city_index.select(min_population):
+            yield dict(city)
 
 
 def postal_regions(country_code: str, min_population: int = 0, consolidate_cities: bool = False) -> Iterable[dict]:
@@ -188,65 +175,26 @@ def postal_regions(country_code: str, min_population: int = 0, consolidate_citie
            defaults to False
     :return: post code regions with possible extras
     """
-    if country_code == "GB":
-        with gzip.open(get_searchable_points_path("postcodes/outward_gb.json.gz"), mode="rb") as points:
-            for outward_code in json.load(TextIOWrapper(points)):
-                yield {
-                    "postal_region": outward_code["postcode"],
-                    "city": outward_code["town"],
-                    "state": outward_code["country_string"],
-                    "latitude": outward_code["latitude"],
-                    "longitude": outward_code["longitude"],
-                }
-    elif country_code == "US":
-        # US zip code database from https://simplemaps.com/data/us-zips
-        # From their licence.txt:
-        #
-        # Free US Zip Code Database: The Provider offers a free version of the US Zip Code Database.
-        # This Database is offered free of charge conditional on a link back to https://simplemaps.com/data/us-zips.
-        # This backlink must come from a public webpage where the Customer is using the data. If the Customer uses
-        # the data internally, the backlink must be placed on the organization's website on a page that can be
-        # easily found though links on the root domain. The link must be clearly visible to the human eye.
-        # The backlink must be placed before the Customer uses the Database in production.
-        #
-        with gzip.open(get_searchable_points_path("postcodes/uszips.csv.gz"), mode="rb") as points:
-
-            def create_postcode_output_dict(postcode: dict) -> dict:
-                return {
-                    "postal_region": postcode["zip"],
-                    "city": postcode["city"],
-                    "state": postcode["state_id"],
-                    "latitude": postcode["lat"],
-                    "longitude": postcode["lng"],
-                }
-
-            postcode_data = filter(
-                lambda x: not (x["population"].isnumeric() and int(x["population"]) < min_population),
-                csv.DictReader(TextIOWrapper(points)),
-            )
-            if consolidate_cities:
-                postcode_data = sorted(postcode_data, key=lambda x: (x["state_name"], x["county_name"], x["city"]))
-                for city, postcodes_in_city in groupby(
-                    postcode_data, lambda x: (x["state_name"], x["county_name"], x["city"])
-                ):
-                    largest_postcode = max(list(postcodes_in_city), key=lambda x: x["population"])
-                    yield create_postcode_output_dict(largest_postcode)
-            else:
-                for postcode in postcode_data:
-                    yield create_postcode_output_dict(postcode)
-
-    elif country_code == "FR":
-        # French postal code database from https://datanova.legroupe.laposte.fr
-
-        with gzip.open(get_searchable_points_path("postcodes/frzips.csv.gz"), mode="rb") as points:
-            for row in csv.DictReader(TextIOWrapper(points)):
-                yield {
-                    "postal_region": row["Code_postal"],
-                    "latitude": row["lat"],
-                    "longitude": row["lng"],
-                }
-    else:
+    # Postal code databases are held in locations/searchable_points/postcodes
+    # and indexed by get_postal_region_table:
+    #
+    # GB outward postal codes from https://github.com/gibbs/uk-postcodes
+    #
+    # US zip code database from https://simplemaps.com/data/us-zips
+    # From their licence.txt:
+    #
+    # Free US Zip Code Database: The Provider offers a free version of the US Zip Code Database.
+    # This Database is offered free of charge conditional on a link back to https://simplemaps.com/data/us-zips.
+    # This backlink must come from a public webpage where the Customer is using the data. If the Customer uses
+    # the data internally, the backlink must be placed on the organization's website on a page that can be
+    # easily found though links on the root domain. The link must be clearly visible to the human eye.
+    # The backlink must be placed before the Customer uses the Database in production.
+    #
+    # French postal code database from https://datanova.legroupe.laposte.fr
+    table = get_postal_region_table(country_code)
+    if table is None:
         raise Exception("country code not supported: " + country_code)
+    yield from table.records(table.select(min_population, consolidate_cities))
 
 
 def make_subdivisions(
@@ -524,22 +472,15 @@ def extract_geojson_point_geometry(geometry: dict) -> dict | None:  # noqa: C901
     return None
 
 
-def convert_gj2008_to_rfc7946_point_geometry(geometry: dict) -> dict | None:  # noqa: C901
+def gj2008_point_geometry_crs(geometry: dict) -> int | None:  # noqa: C901
     """
-    Convert GJ2008 Point geometry with a projection other than EPSG:4326
-    (WGS84) to RFC7946 Point geometry which must always have a projection of
-    EPSG:4326.
-
-    If the supplied geometry is GJ2008 formatted (with a CRS nominated) and
-    the CRS is already EPSG:4326, this function will return the supplied
-    geometry without the "crs" definition, ensuring the geometry is formatted
-    according to RFC7946.
-
-    If the supplied geometry is not Point geometry or cannot be reprojected to
-    EPSG:4326, this function returns None.
+    Validate GJ2008 (or RFC7946) Point geometry and determine the EPSG code
+    of its coordinate reference system.
 
     :param geometry: dictionary containing source GJ2008 Point geometry.
-    :return: RFC7946 compliant Point geometry as a dictionary, or None.
+    :return: EPSG code of the geometry's CRS (4326 if no CRS is nominated),
+             or None if the geometry is not Point geometry or the CRS is not
+             understood.
     """
     if not isinstance(geometry, dict):
         return None
@@ -557,39 +498,34 @@ def convert_gj2008_to_rfc7946_point_geometry(geometry: dict) -> dict | None:  #
         isinstance(geometry["coordinates"][1], float) or isinstance(geometry["coordinates"][1], int)
     ):
         return None
-    if geometry.get("crs"):
-        if geometry["crs"].get("type") != "name":
-            return None
-        if not geometry["crs"].get("properties"):
-            return None
-        if not geometry["crs"]["properties"].get("name"):
-            return None
-        if geometry["crs"]["properties"]["name"].startswith("http://www.opengis.net/def/objectType/EPSG/0/"):
-            original_projection = int(
-                geometry["crs"]["properties"]["name"].removeprefix("http://www.opengis.net/def/objectType/EPSG/0/")
-            )
-        elif geometry["crs"]["properties"]["name"].startswith("urn:ogc:def:objectType:EPSG::"):
-            original_projection = int(
-                geometry["crs"]["properties"]["name"].removeprefix("urn:ogc:def:objectType:EPSG::")
-            )
-        elif geometry["crs"]["properties"]["name"].startswith("EPSG:"):
-            original_projection = int(geometry["crs"]["properties"]["name"].removeprefix("EPSG:"))
-        elif geometry["crs"]["properties"]["name"] == "http://www.opengis.net/def/crs/OGC/1.3/CRS84":
-            original_projection = 4326
-        elif geometry["crs"]["properties"]["name"] == "urn:ogc:def:crs:OGC:1.3:CRS84":
-            original_projection = 4326
-        else:
-            return None
-        if original_projection == 4326:
-            lat = geometry["coordinates"][1]
-            lon = geometry["coordinates"][0]
-        else:
-            lat, lon = Transformer.from_crs(original_projection, 4326).transform(
-                geometry["coordinates"][0], geometry["coordinates"][1]
-            )
-    else:
-        lat = geometry["coordinates"][1]
-        lon = geometry["coordinates"][0]
+    if not geometry.get("crs"):
+        return 4326
+    if geometry["crs"].get("type") != "name":
+        return None
+    if not geometry["crs"].get("properties"):
+        return None
+    if not geometry["crs"]["properties"].get("name"):
+        return None
+    if geometry["crs"]["properties"]["name"].startswith("http://www.opengis.net/def/objectType/EPSG/0/"):
+        return int(geometry["crs"]["properties"]["name"].removeprefix("http://www.opengis.net/def/objectType/EPSG/0/"))
+    elif geometry["crs"]["properties"]["name"].startswith("urn:ogc:def:objectType:EPSG::"):
+        return int(geometry["crs"]["properties"]["name"].removeprefix("urn:ogc:def:objectType:EPSG::"))
+    elif geometry["crs"]["properties"]["name"].startswith("EPSG:"):
+        return int(geometry["crs"]["properties"]["name"].removeprefix("EPSG:"))
+    elif geometry["crs"]["properties"]["name"] == "http://www.opengis.net/def/crs/OGC/1.3/CRS84":
+        return 4326
+    elif geometry["crs"]["properties"]["name"] == "urn:ogc:def:crs:OGC:1.3:CRS84":
+        return 4326
+    return None
+
+
+def lat_lon_to_rfc7946_point_geometry(lat: float, lon: float) -> dict | None:
+    """
+    :param lat: latitude in EPSG:4326
+    :param lon: longitude in EPSG:4326
+    :return: RFC7946 compliant Point geometry as a dictionary, or None if
+             lat or lon are not numbers.
+    """
     if not (isinstance(lat, float) or isinstance(lat, int)) or not (isinstance(lon, float) or isinstance(lon, int)):
         return None
     # Normalize near-integer results to ints to avoid floating point precision
@@ -608,3 +544,31 @@ def convert_gj2008_to_rfc7946_point_geometry(geometry: dict) -> dict | None:  #
         "coordinates": [lon, lat],
     }
     return new_geometry
+
+
+def convert_gj2008_to_rfc7946_point_geometry(geometry: dict) -> dict | None:
+    """
+    Convert GJ2008 Point geometry with a projection other than EPSG:4326
+    (WGS84) to RFC7946 Point geometry which must always have a projection of
+    EPSG:4326.
+
+    If the supplied geometry is GJ2008 formatted (with a CRS nominated) and
+    the CRS is already EPSG:4326, this function will return the supplied
+    geometry without the "crs" definition, ensuring the geometry is formatted
+    according to RFC7946.
+
+    If the supplied geometry is not Point geometry or cannot be reprojected to
+    EPSG:4326, this function returns None.
+
+    :param geometry: dictionary containing source GJ2008 Point geometry.
+    :return: RFC7946 compliant Point geometry as a dictionary, or None.
+    """
+    original_projection = gj2008_point_geometry_crs(geometry)
+    if original_projection is None:
+        return None
+    if original_projection == 4326:
+        lat = geometry["coordinates"][1]
+        lon = geometry["coordinates"][0]
+    else:
+        lat, lon = reproject_point(original_projection, geometry["coordinates"][0], geometry["coordinates"][1])
+    return lat_lon_to_rfc7946_point_geometry(lat, lon)
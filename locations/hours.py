@@ -2,6 +2,8 @@ import logging
 import re
 import time
 from collections import defaultdict
+from functools import lru_cache
+from typing import NamedTuple
 
 DAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
 DAYS_FROM_SUNDAY = DAYS[-1:] + DAYS[:-1]
@@ -1021,6 +1023,86 @@ CLOSED_FR = ["fermée", "fermé", "fermee", "ferme"]
 
 logger = logging.getLogger(__name__)
 
+# Number of distinct (string, locale) pairs whose extracted opening hours
+# are remembered by OpeningHours.extract_hours_from_string.
+EXTRACTED_HOURS_CACHE_SIZE = 4096
+
+
+class HoursLocale(NamedTuple):
+    """
+    Hashable snapshot of the localisation arguments of
+    OpeningHours.extract_hours_from_string, identifying cached regular
+    expressions and results by content so that equal but distinct
+    dictionaries (and dictionaries modified since) are handled correctly.
+    """
+
+    days: tuple[tuple[str, str], ...]
+    named_day_ranges: tuple[tuple[str, tuple[str, ...]], ...]
+    named_times: tuple[tuple[str, tuple[str, ...]], ...]
+    delimiters: tuple[str, ...]
+    closed: tuple[str, ...]
+
+    @classmethod
+    def freeze(
+        cls,
+        days: dict[str, str],
+        named_day_ranges: dict[str, list[str]],
+        named_times: dict[str, list[str]],
+        delimiters: list[str],
+        closed: list[str],
+    ) -> "HoursLocale":
+        return cls(
+            tuple(days.items()),
+            tuple((name, tuple(value)) for name, value in named_day_ranges.items()),
+            tuple((name, tuple(value)) for name, value in named_times.items()),
+            tuple(delimiters),
+            tuple(closed),
+        )
+
+
+# Patterns matching strings which time.strptime would accept for common time
+# formats, used to convert them to minutes without the overhead of strptime.
+# Strings these don't match are left to time.strptime.
+TIME_FORMAT_PATTERNS = {
+    "%H:%M": re.compile(r"(2[0-3]|[01]?\d):([0-5]\d)"),
+    "%H:%M:%S": re.compile(r"(2[0-3]|[01]?\d):([0-5]\d):[0-5]\d"),
+}
+
+MINUTES_PER_DAY = 24 * 60
+# Closing time used for ranges ending at midnight, rendered as "24:00".
+END_OF_DAY = MINUTES_PER_DAY - 1
+
+
+def time_to_minutes(value: str | time.struct_time, time_format: str = "%H:%M") -> int:
+    """
+    Converts a time of day to the number of minutes since midnight.
+    :param value: time of day, either a string in time_format or a struct_time.
+    :param time_format: format of value if it is a string, see time.strptime.
+    :returns: minutes since midnight.
+    """
+    if isinstance(value, time.struct_time):
+        return value.tm_hour * 60 + value.tm_min
+    if (pattern := TIME_FORMAT_PATTERNS.get(time_format)) and (match := pattern.fullmatch(value)):
+        return int(match[1]) * 60 + int(match[2])
+    parsed = time.strptime(value, time_format)
+    return parsed.tm_hour * 60 + parsed.tm_min
+
+
+def minutes_to_time(minutes: int) -> str:
+    """
+    :param minutes: minutes since midnight.
+    :returns: time of day in "HH:MM" format.
+    """
+    return "%02d:%02d" % divmod(minutes, 60)
+
+
+class HoursRegexes(NamedTuple):
+    hours_24h: re.Pattern
+    hours_12h: re.Pattern
+    closed_days: re.Pattern
+    time_range_24h: re.Pattern
+    time_range_12h: re.Pattern
+
 
 def day_range(start_day: str, end_day: str) -> list[str]:
     start = sanitise_day(start_day)
@@ -1053,7 +1135,9 @@ def sanitise_day(day: str, days: dict[str, str] = DAYS_EN) -> str | None:
 
 class OpeningHours:
     def __init__(self):
-        self.day_hours = defaultdict(set)
+        # Opening time ranges of each day, as (open, close) minutes since
+        # midnight. A close before the open is a range over midnight.
+        self.day_hours: defaultdict[str, set[tuple[int, int]]] = defaultdict(set)
         self.days_closed = set()
 
     def __bool__(self):
@@ -1138,23 +1222,21 @@ class OpeningHours:
                 close_time = "23:59"
             if close_time in ("24:00:00", "00:00:00"):
                 close_time = "23:59:00"
-        if not isinstance(open_time, time.struct_time):
-            open_time = time.strptime(open_time, time_format)
-        if not isinstance(close_time, time.struct_time):
-            close_time = time.strptime(close_time, time_format)
-            if close_time.tm_hour == 0 and close_time.tm_min == 0:
-                # weird format not caught by checks above
-                # may be 0:00 or even more divergent if time_format
-                # parameter was used with some exotic value
-                close_time = time.strptime("23:59", "%H:%M")
-        if open_time.tm_hour == close_time.tm_hour and open_time.tm_min == close_time.tm_min:
+        open_minutes = time_to_minutes(open_time, time_format)
+        close_minutes = time_to_minutes(close_time, time_format)
+        if close_minutes == 0 and not isinstance(close_time, time.struct_time):
+            # weird format not caught by checks above
+            # may be 0:00 or even more divergent if time_format
+            # parameter was used with some exotic value
+            close_minutes = END_OF_DAY
+        if open_minutes == close_minutes:
             # A single time of day was provided, not a range. Ignore request.
             # Sometimes source data uses 00:00-00:00 as a range denoting a
             # closed day.
             return
 
         self.days_closed.discard(day)
-        self.day_hours[day].add((open_time, close_time))
+        self.day_hours[day].add((open_minutes, close_minutes))
 
     def as_opening_hours(self) -> str:
         day_groups = []
@@ -1173,41 +1255,38 @@ class OpeningHours:
         # so we need only check whether time goes over midnight and split it
         # in two regular ranges
         day_hours_midnight_split = defaultdict(set)
-        time_format = "%H:%M"
-        midnight_end = time.strptime("23:59", time_format)
-        midnight_start = time.strptime("00:00", time_format)
         for index, day in enumerate(DAYS):
-            for h in self.day_hours[day]:
-                if h[0].tm_hour * 60 + h[0].tm_min > h[1].tm_hour * 60 + h[1].tm_min:
+            for open_minutes, close_minutes in self.day_hours[day]:
+                if open_minutes > close_minutes:
                     # start hour is greater than end hour, indicating that it is
                     # an over-midnight range
-                    day_hours_midnight_split[day].add((h[0], midnight_end))
+                    day_hours_midnight_split[day].add((open_minutes, END_OF_DAY))
                     next_day = DAYS[(index + 1) % len(DAYS)]
-                    day_hours_midnight_split[next_day].add((midnight_start, h[1]))
+                    day_hours_midnight_split[next_day].add((0, close_minutes))
                     if next_day in self.days_closed:
                         self.days_closed.remove(next_day)
                 else:
-                    day_hours_midnight_split[day].add(h)
+                    day_hours_midnight_split[day].add((open_minutes, close_minutes))
+
+        # Group consecutive days by their ranges (None if closed), rendering
+        # each group once.
+        this_ranges = None
         for day in DAYS:
-            if day in self.days_closed:
+            ranges = None if day in self.days_closed else tuple(sorted(day_hours_midnight_split[day]))
+            if this_day_group and this_ranges == ranges:
+                this_day_group["to_day"] = day
+                continue
+            if this_day_group:
+                day_groups.append(this_day_group)
+            if ranges is None:
                 hours = "closed"
             else:
                 hours = ",".join(
-                    "%s-%s"
-                    % (
-                        time.strftime("%H:%M", h[0]),
-                        time.strftime("%H:%M", h[1]).replace("23:59", "24:00"),
-                    )
-                    for h in sorted(day_hours_midnight_split[day])
+                    "%s-%s" % (minutes_to_time(open_minutes), minutes_to_time(close_minutes).replace("23:59", "24:00"))
+                    for open_minutes, close_minutes in ranges
                 )
-
-            if not this_day_group:
-                this_day_group = {"from_day": day, "to_day": day, "hours": hours}
-            elif this_day_group["hours"] != hours:
-                day_groups.append(this_day_group)
-                this_day_group = {"from_day": day, "to_day": day, "hours": hours}
-            elif this_day_group["hours"] == hours:
-                this_day_group["to_day"] = day
+            this_day_group = {"from_day": day, "to_day": day, "hours": hours}
+            this_ranges = ranges
 
         if this_day_group is not None:
             day_groups.append(this_day_group)
@@ -1542,17 +1621,67 @@ class OpeningHours:
         :param closed: list of strings representing
                            localised meaning of "closed"
         """
-        # Create regular expressions for extracting opening time information from a string.
-        hours_extraction_regex_24h = OpeningHours.hours_extraction_regex(
-            time_24h=True, days=days, named_day_ranges=named_day_ranges, delimiters=delimiters
-        )
-        hours_extraction_regex_12h = OpeningHours.hours_extraction_regex(
-            time_24h=False, days=days, named_day_ranges=named_day_ranges, delimiters=delimiters
-        )
-        closed_days_extraction_regex = OpeningHours.closed_days_extraction_regex(
-            days=days, named_day_ranges=named_day_ranges, delimiters=delimiters, closed=closed
+        locale = HoursLocale.freeze(days, named_day_ranges, named_times, delimiters, closed)
+        # The cached results are shared, so return copies of the day lists.
+        return [
+            (list(days_in_range), start, end)
+            for days_in_range, start, end in OpeningHours._extract_hours_from_string(ranges_string, locale)
+        ]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def compile_regexes(locale: HoursLocale) -> HoursRegexes:
+        """
+        Compiles the regular expressions used to extract opening time
+        information, once per distinct localisation.
+        :param locale: localisation to create regular expressions for.
+        :returns: compiled regular expressions.
+        """
+        days = dict(locale.days)
+        named_day_ranges = {name: list(value) for name, value in locale.named_day_ranges}
+        delimiters = list(locale.delimiters)
+        return HoursRegexes(
+            hours_24h=re.compile(
+                OpeningHours.hours_extraction_regex(
+                    time_24h=True, days=days, named_day_ranges=named_day_ranges, delimiters=delimiters
+                ),
+                re.IGNORECASE,
+            ),
+            hours_12h=re.compile(
+                OpeningHours.hours_extraction_regex(
+                    time_24h=False, days=days, named_day_ranges=named_day_ranges, delimiters=delimiters
+                ),
+                re.IGNORECASE,
+            ),
+            closed_days=re.compile(
+                OpeningHours.closed_days_extraction_regex(
+                    days=days, named_day_ranges=named_day_ranges, delimiters=delimiters, closed=list(locale.closed)
+                ),
+                re.IGNORECASE,
+            ),
+            time_range_24h=re.compile(
+                OpeningHours.time_of_day_regex(time_24h=True)
+                + OpeningHours.delimiters_regex(delimiters)
+                + OpeningHours.time_of_day_regex(time_24h=True),
+                re.IGNORECASE,
+            ),
+            time_range_12h=re.compile(
+                OpeningHours.time_of_day_regex(time_24h=False)
+                + OpeningHours.delimiters_regex(delimiters)
+                + OpeningHours.time_of_day_regex(time_24h=False),
+                re.IGNORECASE,
+            ),
         )
 
+    @staticmethod
+    @lru_cache(maxsize=EXTRACTED_HOURS_CACHE_SIZE)
+    def _extract_hours_from_string(ranges_string: str, locale: HoursLocale) -> list[tuple]:
+        regexes = OpeningHours.compile_regexes(locale)
+        days = dict(locale.days)
+        named_day_ranges = {name: list(value) for name, value in locale.named_day_ranges}
+        named_times = {name: list(value) for name, value in locale.named_times}
+        closed = list(locale.closed)
+
         # Replace named times in source ranges string (e.g. midnight -> 00:00).
         ranges_string_24h = OpeningHours.replace_named_times(ranges_string, named_times, True)
         ranges_string_12h = OpeningHours.replace_named_times(ranges_string, named_times, False)
@@ -1563,7 +1692,7 @@ class OpeningHours:
             # should be treated as having 12h time format. Execute the regular
             # expression for 12h time format only.
             results_24h = []
-            results_12h = re.findall(hours_extraction_regex_12h, ranges_string_12h, re.IGNORECASE)
+            results_12h = regexes.hours_12h.findall(ranges_string_12h)
         else:
             # Execute the regular expression for 24h time format only. There
             # is an unlikely chance that the string is actually in 12h time
@@ -1575,9 +1704,9 @@ class OpeningHours:
             # provide a hint (such as adding "AM" after instances of ":00") if
             # this assumption of 24h time format is invalid for a particular
             # spider.
-            results_24h = re.findall(hours_extraction_regex_24h, ranges_string_24h, re.IGNORECASE)
+            results_24h = regexes.hours_24h.findall(ranges_string_24h)
             results_12h = []
-        results_closed = re.findall(closed_days_extraction_regex, ranges_string_24h, re.IGNORECASE)
+        results_closed = regexes.closed_days.findall(ranges_string_24h)
 
         # Normalise results to 24h time.
         results = []
@@ -1589,13 +1718,7 @@ class OpeningHours:
                 days_in_range = OpeningHours.days_in_day_range(
                     day_range=day_range, days=days, named_day_ranges=named_day_ranges
                 )
-                time_ranges = re.findall(
-                    OpeningHours.time_of_day_regex(time_24h=True)
-                    + OpeningHours.delimiters_regex(delimiters)
-                    + OpeningHours.time_of_day_regex(time_24h=True),
-                    result[time_start_index],
-                    re.IGNORECASE,
-                )
+                time_ranges = regexes.time_range_24h.findall(result[time_start_index])
                 for time_range in time_ranges:
                     time_start_minute = time_range[1]
                     if not time_range[1]:
@@ -1614,13 +1737,7 @@ class OpeningHours:
                 days_in_range = OpeningHours.days_in_day_range(
                     day_range=day_range, days=days, named_day_ranges=named_day_ranges
                 )
-                time_ranges = re.findall(
-                    OpeningHours.time_of_day_regex(time_24h=False)
-                    + OpeningHours.delimiters_regex(delimiters)
-                    + OpeningHours.time_of_day_regex(time_24h=False),
-                    result[time_start_index],
-                    re.IGNORECASE,
-                )
+                time_ranges = regexes.time_range_12h.findall(result[time_start_index])
                 for time_range in time_ranges:
                     time_start_hour = time_range[0]
                     if time_start_hour == "00" or time_start_hour == "0":
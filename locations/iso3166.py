@@ -0,0 +1,92 @@
+import unicodedata
+from functools import cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+import pycountry
+
+
+def fold(s: str) -> str:
+    """
+    Fold a string for lenient comparison, ignoring case and accents.
+    :param s: string to fold
+    :return: folded string, e.g. "Québec" -> "quebec"
+    """
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn").casefold().strip()
+
+
+class ISO3166Index(NamedTuple):
+    # ISO 3166-1 alpha-2 codes of every country.
+    alpha_2: frozenset[str]
+    # Folded ISO 3166-1 alpha-3 codes and names of countries to alpha-2 codes.
+    countries_by_name: Mapping[str, str]
+    # Per alpha-2 country code, ISO 3166-2 subdivision codes keyed by both the
+    # second part of the code ("CA-ON" -> "ON") and the subdivision name.
+    subdivisions: Mapping[str, Mapping[str, str]]
+    # As subdivisions, with the keys folded.
+    folded_subdivisions: Mapping[str, Mapping[str, str]]
+
+
+@cache
+def get_iso3166_index() -> ISO3166Index:
+    """
+    Build lookup tables of ISO 3166-1 countries and ISO 3166-2 subdivisions
+    from pycountry, once per process. The tables are read only.
+    """
+    countries_by_name = {}
+    for country in pycountry.countries:
+        for name in [country.alpha_3, country.name] + [
+            getattr(country, attribute) for attribute in ["official_name", "common_name"] if hasattr(country, attribute)
+        ]:
+            countries_by_name.setdefault(fold(name), country.alpha_2)
+
+    # Filled in the order of pycountry.subdivisions.get(country_code=...), so
+    # that where a code or name is shared by more than one subdivision of a
+    # country, the first is found, as when scanning the subdivisions.
+    subdivisions = {}
+    folded_subdivisions = {}
+    for country_code in dict.fromkeys(subdivision.country_code for subdivision in pycountry.subdivisions):
+        by_key = subdivisions[country_code] = {}
+        folded_by_key = folded_subdivisions[country_code] = {}
+        for subdivision in pycountry.subdivisions.get(country_code=country_code):
+            for key in [subdivision.code.split("-", 1)[1], subdivision.name]:
+                by_key.setdefault(key, subdivision.code)
+                folded_by_key.setdefault(fold(key), subdivision.code)
+
+    return ISO3166Index(
+        alpha_2=frozenset(country.alpha_2 for country in pycountry.countries),
+        countries_by_name=MappingProxyType(countries_by_name),
+        subdivisions=MappingProxyType({k: MappingProxyType(v) for k, v in subdivisions.items()}),
+        folded_subdivisions=MappingProxyType({k: MappingProxyType(v) for k, v in folded_subdivisions.items()}),
+    )
+
+
+def is_iso_3166_1_alpha_2(country_code: str) -> bool:
+    """
+    :param country_code: candidate ISO 3166-1 alpha-2 code, e.g. "AU"
+    :return: True if country_code is an ISO 3166-1 alpha-2 code
+    """
+    return country_code in get_iso3166_index().alpha_2
+
+
+def get_country_code(country: str) -> str | None:
+    """
+    :param country: ISO 3166-1 alpha-3 code or name of a country, compared
+                    ignoring case and accents
+    :return: ISO 3166-1 alpha-2 code of the country, or None
+    """
+    return get_iso3166_index().countries_by_name.get(fold(country))
+
+
+def get_subdivision_code(country_code: str, subdivision: str, folded: bool = False) -> str | None:
+    """
+    :param country_code: ISO 3166-1 alpha-2 code of a country, e.g. "CA"
+    :param subdivision: second part of an ISO 3166-2 code (e.g. "ON") or
+                        name (e.g. "Ontario") of a subdivision of the country
+    :param folded: compare subdivision ignoring case and accents
+    :return: ISO 3166-2 code of the subdivision, e.g. "CA-ON", or None
+    """
+    index = get_iso3166_index()
+    if folded:
+        return index.folded_subdivisions.get(country_code, {}).get(fold(subdivision))
+    return index.subdivisions.get(country_code, {}).get(subdivision)
@@ -7,10 +7,10 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Iterable
 
-import pycountry
 import scrapy
 
 from locations.hours import OpeningHours
+from locations.iso3166 import get_subdivision_code, is_iso_3166_1_alpha_2
 
 logger = logging.getLogger(__name__)
 
@@ -75,9 +75,7 @@ class Feature(scrapy.Item):
         """
         if not self.get("country"):
             return False
-        if self["country"] not in [country.alpha_2 for country in pycountry.countries]:
-            return False
-        return True
+        return isinstance(self["country"], str) and is_iso_3166_1_alpha_2(self["country"])
 
     def get_iso_3166_2_code(self) -> str | None:
         """
@@ -94,10 +92,9 @@ class Feature(scrapy.Item):
             return None
         if not self.has_valid_country_code():
             return None
-        for subdivision in pycountry.subdivisions.get(country_code=self["country"]):
-            if self["state"] in [subdivision.code.split("-", 1)[1], subdivision.name]:
-                return subdivision.code
-        return None
+        if not isinstance(self["state"], str):
+            return None
+        return get_subdivision_code(self["country"], self["state"])
 
 
 def get_lat_lon(item: Feature) -> tuple[float, float] | None:
@@ -224,13 +221,14 @@ def merge_items(language_dict: dict, main_language: str, matching_key: str = "re
     :param matching_key: the key (defaults to "ref") that is used to match up items from different languages.
     :return: individual merged items
     """
-    all_item_refs = {language: [ref for ref in items.keys()] for language, items in language_dict.items()}
+    # Refs not yet matched, per language, in the order the items were given.
+    unmatched_refs = {language: dict.fromkeys(items.keys()) for language, items in language_dict.items()}
     for item in language_dict[main_language].values():
         matched_items = {}
         for language, items in language_dict.items():
-            if item[matching_key] in items.keys():
+            if item[matching_key] in items:
                 matched_items[language] = items[item[matching_key]]
-                all_item_refs[language].remove(item[matching_key])
+                unmatched_refs[language].pop(item[matching_key], None)
             else:
                 logger.warning(
                     f"No matches found for '{matching_key}': '{item[matching_key]}' in language '{language}'"
@@ -238,13 +236,81 @@ def merge_items(language_dict: dict, main_language: str, matching_key: str = "re
 
         item = get_merged_item(matched_items, main_language)
         yield item
-    for language, refs in all_item_refs.items():
+    for language, refs in unmatched_refs.items():
         if len(refs) > 0:
             logger.warning(f"Failed to match {len(refs)} for language: {language}")
         for ref in refs:
             yield language_dict[language][ref]
 
 
+class ItemMerger:
+    """
+    Merge items in different languages together as they are scraped, rather
+    than once every item has been scraped as merge_items does. Only items
+    still waiting for other languages are held in memory.
+
+    Usage example:
+        merger = ItemMerger(["en", "pt"], "pt")
+        # In callbacks, for each item scraped:
+        yield from merger.add(item, "en")
+        # Once every item has been scraped:
+        yield from merger.flush()
+    """
+
+    def __init__(self, languages: list[str], main_language: str, matching_key: str = "ref"):
+        """
+        :param languages: languages of the items to be merged.
+        :param main_language: the language to be used for the main keys in the item.
+        :param matching_key: the key (defaults to "ref") that is used to match up items from different languages.
+        """
+        self.languages = languages
+        self.main_language = main_language
+        self.matching_key = matching_key
+        # Items waiting for other languages, keyed by matching key then
+        # language.
+        self.pending: dict[Any, dict[str, Feature]] = {}
+
+    def add(self, item: Feature, language: str) -> Iterable[Feature]:
+        """
+        :param item: item scraped
+        :param language: language of the item
+        :return: the merged item, once items of every language have been
+                 added for its matching key
+        """
+        matched_items = self.pending.setdefault(item[self.matching_key], {})
+        matched_items[language] = item
+        if len(matched_items) == len(self.languages):
+            del self.pending[item[self.matching_key]]
+            yield get_merged_item(
+                {language: matched_items[language] for language in self.languages}, self.main_language
+            )
+
+    def flush(self) -> Iterable[Feature]:
+        """
+        :return: items still waiting for other languages, as for merge_items:
+                 merged if there is an item in the main language, otherwise
+                 unmerged
+        """
+        unmerged = {language: [] for language in self.languages}
+        for ref, matched_items in self.pending.items():
+            if self.main_language not in matched_items:
+                for language, item in matched_items.items():
+                    unmerged[language].append(item)
+                continue
+            for language in self.languages:
+                if language not in matched_items:
+                    logger.warning(f"No matches found for '{self.matching_key}': '{ref}' in language '{language}'")
+            yield get_merged_item(
+                {language: matched_items[language] for language in self.languages if language in matched_items},
+                self.main_language,
+            )
+        self.pending.clear()
+        for language, items in unmerged.items():
+            if len(items) > 0:
+                logger.warning(f"Failed to match {len(items)} for language: {language}")
+            yield from items
+
+
 KEYS_THAT_SHOULD_MATCH = [
     "lat",
     "lon",
@@ -299,16 +365,16 @@ def get_merged_item(matched_items: dict, main_language: str) -> dict:
             for language, match in matched_items.items():
                 item["extras"][f"addr:{key}:{language}"] = match.get(key)
         elif key == "opening_hours":
-            if isinstance(value, OpeningHours):
-                item_oh = value.as_opening_hours()
-            else:
-                item_oh = value
-            match_oh_list = []
-            for match in matched_items.values():
-                if isinstance(match["opening_hours"], OpeningHours):
-                    match_oh_list.append(match["opening_hours"].as_opening_hours())
-                else:
-                    match_oh_list.append(match["opening_hours"])
+            # Convert each item's hours once, including the main language's.
+            match_oh_list = [
+                (
+                    match["opening_hours"].as_opening_hours()
+                    if isinstance(match["opening_hours"], OpeningHours)
+                    else match["opening_hours"]
+                )
+                for match in matched_items.values()
+            ]
+            item_oh = match_oh_list[list(matched_items).index(main_language)]
             if not all([match_oh == item_oh for match_oh in match_oh_list]):
                 logger.warning(
                     f"Opening hours do not match in all items for ref: {item['ref']}, using hours from '{main_language}'"
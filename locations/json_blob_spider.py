@@ -1,9 +1,10 @@
+from functools import cached_property
 from typing import AsyncIterator, Iterable
 
 from scrapy import Spider
 from scrapy.http import JsonRequest, Request, TextResponse
 
-from locations.dict_parser import DictParser
+from locations.dict_parser import DictParser, KeySchemaCache
 from locations.items import Feature
 
 
@@ -60,6 +61,14 @@ class JSONBlobSpider(Spider):
     locations_key: str | list[str] | None = None
     needs_json_request = False
 
+    """
+    cache_key_schemas:
+    If set then `DictParser` resolves which keys of a feature fill which
+    fields only once for each distinct set of keys seen during the crawl.
+    Worthwhile for large sources where every feature has the same keys.
+    """
+    cache_key_schemas: bool = False
+
     async def start(self) -> AsyncIterator[JsonRequest | Request]:
         if self.needs_json_request:
             for url in self.start_urls:
@@ -95,6 +104,10 @@ class JSONBlobSpider(Spider):
                     json_data = json_data[key]
         return json_data
 
+    @cached_property
+    def key_cache(self) -> KeySchemaCache | None:
+        return KeySchemaCache() if self.cache_key_schemas else None
+
     def parse(self, response: TextResponse) -> Iterable[Feature]:
         features = self.extract_json(response)
         if isinstance(features, dict):
@@ -107,7 +120,7 @@ class JSONBlobSpider(Spider):
             if feature is None:
                 continue
             self.pre_process_data(feature)
-            item = DictParser.parse(feature)
+            item = DictParser.parse(feature, self.key_cache)
             yield from self.post_process_item(item, response, feature) or []
 
     def parse_feature_dict(self, response: TextResponse, feature_dict: dict) -> Iterable[Feature]:
@@ -119,7 +132,7 @@ class JSONBlobSpider(Spider):
             else:
                 feature["feature_id"] = feature_id
             self.pre_process_data(feature)
-            item = DictParser.parse(feature)
+            item = DictParser.parse(feature, self.key_cache)
             yield from self.post_process_item(item, response, feature) or []
 
     def pre_process_data(self, feature: dict) -> None:
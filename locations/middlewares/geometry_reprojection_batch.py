@@ -0,0 +1,36 @@
+from collections import defaultdict
+
+from scrapy.item import Item
+
+from locations.geo import gj2008_point_geometry_crs
+from locations.middlewares.item_batch import ItemBatchMiddleware
+from locations.reprojection import memoise_points
+
+
+class GeometryReprojectionBatchMiddleware(ItemBatchMiddleware):
+    """
+    Reproject GJ2008 Point geometry of items with a CRS other than EPSG:4326
+    in batches of GEOMETRY_REPROJECTION_BATCH_SIZE, with one call into PROJ
+    per CRS in a batch, so that `GeoJSONGeometryReprojectionPipeline` finds
+    the results memoised. Items are left unchanged, so the pipelines before
+    `GeoJSONGeometryReprojectionPipeline` still see the GJ2008 geometry.
+    """
+
+    batch_size_setting = "GEOMETRY_REPROJECTION_BATCH_SIZE"
+
+    @staticmethod
+    def _crs(item: Item) -> int | None:
+        if geometry := item.get("geometry"):
+            return gj2008_point_geometry_crs(geometry)
+        return None
+
+    def needs_processing(self, item: Item) -> bool:
+        return self._crs(item) not in (None, 4326)
+
+    def process_batch(self, items: list[Item]) -> None:
+        coordinates_by_crs = defaultdict(list)
+        for item in items:
+            if (crs := self._crs(item)) not in (None, 4326):
+                coordinates_by_crs[crs].append(item["geometry"]["coordinates"])
+        for crs, coordinates in coordinates_by_crs.items():
+            memoise_points(crs, [x for x, _ in coordinates], [y for _, y in coordinates])
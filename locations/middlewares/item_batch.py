@@ -0,0 +1,76 @@
+from typing import AsyncIterator, Iterable
+
+from scrapy.crawler import Crawler
+from scrapy.http import Request, Response
+from scrapy.item import Item
+
+
+class ItemBatchMiddleware:
+    """
+    Base for spider middlewares which process items yielded by a callback in
+    batches. Once a callback yields an item which `needs_processing`, it and
+    every following item are held back until `batch_size` items have been
+    collected (or the callback finishes). `process_batch` is then called with
+    them and they are released in the order they were yielded. Requests are
+    never held back.
+    """
+
+    # Setting giving the number of items in a batch, and its default value.
+    batch_size_setting: str
+    default_batch_size: int = 1000
+
+    crawler: Crawler
+
+    def __init__(self, crawler: Crawler):
+        self.crawler = crawler
+        self.batch_size = crawler.settings.getint(self.batch_size_setting, self.default_batch_size)
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler):
+        return cls(crawler)
+
+    def needs_processing(self, item: Item) -> bool:
+        raise NotImplementedError()
+
+    def process_batch(self, items: list[Item]) -> None:
+        raise NotImplementedError()
+
+    def _flush(self, items: list[Item]) -> list[Item]:
+        if items:
+            self.process_batch(items)
+        return items
+
+    def process_spider_output(self, response: Response, result: Iterable[Item | Request]) -> Iterable[Item | Request]:
+        if self.batch_size <= 1:
+            yield from result
+            return
+        items = []
+        for x in result:
+            if isinstance(x, Item) and (items or self.needs_processing(x)):
+                items.append(x)
+                if len(items) >= self.batch_size:
+                    yield from self._flush(items)
+                    items = []
+            else:
+                yield x
+        yield from self._flush(items)
+
+    async def process_spider_output_async(
+        self, response: Response, result: AsyncIterator[Item | Request]
+    ) -> AsyncIterator[Item | Request]:
+        if self.batch_size <= 1:
+            async for x in result:
+                yield x
+            return
+        items = []
+        async for x in result:
+            if isinstance(x, Item) and (items or self.needs_processing(x)):
+                items.append(x)
+                if len(items) >= self.batch_size:
+                    for item in self._flush(items):
+                        yield item
+                    items = []
+            else:
+                yield x
+        for item in self._flush(items):
+            yield item
@@ -0,0 +1,53 @@
+from scrapy.crawler import Crawler
+from scrapy.item import Item
+
+from locations.country_utils import CountryUtils
+from locations.items import Feature, get_lat_lon
+from locations.middlewares.item_batch import ItemBatchMiddleware
+from locations.pipelines.country_code_clean_up import CountryResolver
+from locations.pipelines.state_clean_up import StateCodeCleanUpPipeline
+from locations.reverse_geocoding import reverse_geocode_batch
+
+
+class ReverseGeocodingBatchMiddleware(ItemBatchMiddleware):
+    """
+    Reverse geocode items which will need it by the country and state clean
+    up pipelines in batches of REVERSE_GEOCODING_BATCH_SIZE, so that the
+    pipelines find their results memoised.
+    """
+
+    batch_size_setting = "REVERSE_GEOCODING_BATCH_SIZE"
+
+    def __init__(self, crawler: Crawler):
+        super().__init__(crawler)
+        self.country_utils = CountryUtils()
+        self.country_resolver: CountryResolver | None = None
+
+    def needs_processing(self, item: Item) -> bool:
+        """
+        :return: whether CountryCodeCleanUpPipeline or StateCodeCleanUpPipeline
+                 will reverse geocode the item
+        """
+        if not isinstance(item, Feature) or not get_lat_lon(item) or not self.crawler.spider:
+            return False
+        if self.country_resolver is None:
+            self.country_resolver = CountryResolver(self.country_utils, self.crawler.spider)
+        # Spider level attributes are applied by a pipeline, after this middleware.
+        item_attributes = getattr(self.crawler.spider, "item_attributes", {})
+        values = {
+            key: item_attributes.get(key) if item.get(key) is None else item.get(key)
+            for key in ["country", "state", "website"]
+        }
+        country, source = self.country_resolver.resolve(values)
+        if source == "reverse_geocoding":
+            return True
+        return country is not None and StateCodeCleanUpPipeline.needs_reverse_geocoding(country, values["state"])
+
+    def process_batch(self, items: list[Item]) -> None:
+        coordinates = [
+            location
+            for item in items
+            if self.needs_processing(item) and isinstance(item, Feature) and (location := get_lat_lon(item))
+        ]
+        if coordinates:
+            reverse_geocode_batch(coordinates)
@@ -5,6 +5,8 @@ from scrapy.crawler import Crawler
 from scrapy.http import Request, Response
 from scrapy.item import Item
 
+from locations.extensions.batch_stats import get_stats_counter
+
 
 class TrackSourcesMiddleware:
     """
@@ -16,6 +18,7 @@ class TrackSourcesMiddleware:
 
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
+        self.stats = get_stats_counter(crawler)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
@@ -27,18 +30,18 @@ class TrackSourcesMiddleware:
 
         if not item["extras"].get("@source_uri"):
             item["extras"]["@source_uri"] = response.url
-        if not self.crawler.stats:
+        if not self.stats:
             return
 
         try:
-            self.crawler.stats.inc_value(
+            self.stats.inc_value(
                 "atp/item_scraped_host_count/{}".format(urlparse(item["extras"]["@source_uri"]).netloc)
             )
         except ValueError:
             self.crawler.spider.logger.error(  # ty: ignore[unresolved-attribute]
                 "Failed to parse @source_uri: {}".format(item["extras"]["@source_uri"])
             )
-            self.crawler.stats.inc_value("atp/parse_error/@source_uri")
+            self.stats.inc_value("atp/parse_error/@source_uri")
 
     def process_spider_output(self, response: Response, result: Iterable[Item | Request]) -> Iterable[Item | Request]:
         for x in result:
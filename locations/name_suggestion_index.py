@@ -1,7 +1,13 @@
 import json
+import mmap
+import os
 import re
+import struct
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping, Sequence
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, Iterator, Self
 from urllib.parse import urlparse
 
 import pycountry
@@ -14,6 +20,18 @@ from locations.user_agents import BOT_USER_AGENT_REQUESTS
 _DATA_DIR = Path(__file__).resolve().parent / "data"
 NSI_FILE_PATH = _DATA_DIR / "nsi.json"
 WIKIDATA_FILE_PATH = _DATA_DIR / "nsi-wikidata.json"
+NSI_SNAPSHOT_FILE_PATH = _DATA_DIR / "nsi.snapshot"
+
+NSI_SNAPSHOT_MAGIC = b"ATPNSI"
+NSI_SNAPSHOT_VERSION = 1
+
+# Wikidata code -> NSI item positions, location code -> NSI item positions
+NSIItemIndexes = tuple[dict[str, list[int]], dict[str, list[int]]]
+# Official website netloc, www-stripped netloc and registered domain -> Wikidata code
+DomainIndexes = tuple[dict[str, str], dict[str, str], dict[str, str]]
+# Newline-joined normalised labels, offset of each label in that string, Wikidata
+# code of each label, and normalised label -> Wikidata codes
+LabelIndexes = tuple[str, list[int], list[str], dict[str, list[str]]]
 
 
 class Singleton(type):
@@ -30,12 +48,20 @@ class NSI(metaclass=Singleton):
     """
     Interact with Name Suggestion Index (NSI). The NSI people publish a JSON version of their database
     which is used by the OSM editor to do rather useful brand suggestions when editing POIs.
+
+    If a fresh snapshot built by `scrapy nsi_snapshot` exists, it is memory
+    mapped instead of loading the vendored JSON files.
     """
 
     def __init__(self):
         self.loaded: bool = False
-        self.wikidata_json: dict = {}
-        self.nsi_json: dict = {}
+        self.wikidata_json: Mapping[str, dict] = {}
+        self.nsi_json: Mapping[str, dict] = {}
+        self._snapshot: NSISnapshot | None = None
+        # Indexes over the above, each built (or read from the snapshot) on first use.
+        self._nsi_indexes: tuple[Sequence[dict], dict[str, list[int]], dict[str, list[int]]] | None = None
+        self._domain_indexes: DomainIndexes | None = None
+        self._label_indexes: LabelIndexes | None = None
 
     @staticmethod
     def _request_file(file: str) -> dict:
@@ -49,10 +75,44 @@ class NSI(metaclass=Singleton):
 
     def _ensure_loaded(self):
         if not self.loaded:
-            self.wikidata_json = json.load(open(WIKIDATA_FILE_PATH))["wikidata"]
-            self.nsi_json = json.load(open(NSI_FILE_PATH))["nsi"]
+            if snapshot := NSISnapshot.open_if_fresh(NSI_SNAPSHOT_FILE_PATH):
+                self._snapshot = snapshot
+                self.wikidata_json = snapshot.wikidata
+                self.nsi_json = snapshot.nsi
+            else:
+                self.wikidata_json = json.load(open(WIKIDATA_FILE_PATH))["wikidata"]
+                self.nsi_json = json.load(open(NSI_FILE_PATH))["nsi"]
             self.loaded = True
 
+    def _index_nsi(self) -> tuple[Sequence[dict], dict[str, list[int]], dict[str, list[int]]]:
+        """
+        :return: all nsi.json items in order, and mappings of Wikidata code
+                 and locationSet include code to positions in that sequence.
+        """
+        if self._nsi_indexes is None:
+            if self._snapshot:
+                self._nsi_indexes = (self._snapshot.nsi_items, *self._snapshot.nsi_item_indexes())
+            else:
+                items = [item for v in self.nsi_json.values() for item in v["items"]]
+                self._nsi_indexes = (items, *index_nsi_items(items))
+        return self._nsi_indexes
+
+    def _index_domains(self) -> DomainIndexes:
+        if self._domain_indexes is None:
+            if self._snapshot:
+                self._domain_indexes = self._snapshot.domain_indexes()
+            else:
+                self._domain_indexes = index_wikidata_domains(self.wikidata_json)
+        return self._domain_indexes
+
+    def _index_labels(self) -> LabelIndexes:
+        if self._label_indexes is None:
+            if self._snapshot:
+                self._label_indexes = self._snapshot.label_indexes()
+            else:
+                self._label_indexes = index_wikidata_labels(self.wikidata_json)
+        return self._label_indexes
+
     def get_wikidata_code_from_url(self, url: str) -> str | None:
         """
         Attempt to return a single Wikidata code corresponding to
@@ -61,27 +121,26 @@ class NSI(metaclass=Singleton):
         :return: Wikidata code, or None if no match found
         """
         self._ensure_loaded()
+        by_netloc, by_www_stripped, by_registered_domain = self._index_domains()
         supplied_url_domain = urlparse(url).netloc
         # First attempt to find an exact FQDN match
-        for wikidata_code, org_parameters in self.wikidata_json.items():
-            for official_website in org_parameters.get("officialWebsites", []):
-                official_website_domain = urlparse(official_website).netloc
-                if official_website_domain == supplied_url_domain:
-                    return wikidata_code
+        if wikidata_code := by_netloc.get(supplied_url_domain):
+            return wikidata_code
         # Next attempt to find an exact match excluding any "www." prefix
-        for wikidata_code, org_parameters in self.wikidata_json.items():
-            for official_website in org_parameters.get("officialWebsites", []):
-                official_website_domain = urlparse(official_website).netloc
-                if official_website_domain.removeprefix("www.") == supplied_url_domain.removeprefix("www."):
-                    return wikidata_code
+        if wikidata_code := by_www_stripped.get(supplied_url_domain.removeprefix("www.")):
+            return wikidata_code
         # Last attempt to find a fuzzy match for registered domain (excluding subdomains)
-        for wikidata_code, org_parameters in self.wikidata_json.items():
-            for official_website in org_parameters.get("officialWebsites", []):
-                official_website_reg = tldextract.extract(official_website).registered_domain
-                supplied_url_reg = tldextract.extract(supplied_url_domain).registered_domain
-                if official_website_reg == supplied_url_reg:
-                    return wikidata_code
-        return None
+        return by_registered_domain.get(tldextract.extract(supplied_url_domain).registered_domain)
+
+    def get_wikidata_codes_from_label(self, label: str) -> list[str]:
+        """
+        Lookup by exact normalised label match in the NSI.
+        :param label: brand or operator label, see `normalise_label`
+        :return: matching Wikidata codes in NSI wikidata.json order
+        """
+        self._ensure_loaded()
+        by_label = self._index_labels()[3]
+        return list(by_label.get(self.normalise_label(label), []))
 
     def lookup_wikidata(self, wikidata_code: str, include_dissolved: bool = False) -> dict | None:
         """
@@ -115,11 +174,21 @@ class NSI(metaclass=Singleton):
                 yield (k, v)
         else:
             label_to_find_fuzzy = self.normalise_label(label_to_find)
-            for k, v in self.wikidata_json.items():
-                if nsi_label := v.get("label"):
-                    nsi_label_fuzzy = self.normalise_label(nsi_label)
-                    if label_to_find_fuzzy in nsi_label_fuzzy:
-                        yield (k, v)
+            labels, offsets, codes, _ = self._index_labels()
+            if not label_to_find_fuzzy:
+                for k in codes:
+                    yield (k, self.wikidata_json[k])
+                return
+            last_match = -1
+            position = labels.find(label_to_find_fuzzy)
+            while position != -1:
+                # Labels never contain a newline, so each match lies within a
+                # single label. Report each label once, in wikidata.json order.
+                i = bisect_right(offsets, position) - 1
+                if i != last_match:
+                    last_match = i
+                    yield (codes[i], self.wikidata_json[codes[i]])
+                position = labels.find(label_to_find_fuzzy, position + 1)
 
     def iter_country(self, location_code: str | None = None) -> Iterable[dict]:
         """
@@ -128,12 +197,13 @@ class NSI(metaclass=Singleton):
         :return: iterator of matching NSI wikidata.json entries
         """
         self._ensure_loaded()
-        for v in self.nsi_json.values():
-            for item in v["items"]:
-                if not location_code:
-                    yield item
-                elif location_code.lower() in item["locationSet"].get("include"):
-                    yield item
+        if not location_code:
+            for v in self.nsi_json.values():
+                yield from v["items"]
+            return
+        items, _, by_location = self._index_nsi()
+        for i in by_location.get(location_code.lower(), []):
+            yield items[i]
 
     def iter_nsi(self, wikidata_code: str | None = None) -> Iterable[dict]:
         """
@@ -142,14 +212,13 @@ class NSI(metaclass=Singleton):
         :return: iterator of matching NSI nsi.json item entries
         """
         self._ensure_loaded()
-        for v in self.nsi_json.values():
-            for item in v["items"]:
-                if not wikidata_code:
-                    yield item
-                elif wikidata_code == item["tags"].get("brand:wikidata"):
-                    yield item
-                elif wikidata_code == item["tags"].get("operator:wikidata"):
-                    yield item
+        if not wikidata_code:
+            for v in self.nsi_json.values():
+                yield from v["items"]
+            return
+        items, by_wikidata, _ = self._index_nsi()
+        for i in by_wikidata.get(wikidata_code, []):
+            yield items[i]
 
     @staticmethod
     def normalise_label(original_label: str) -> str:
@@ -231,3 +300,264 @@ class NSI(metaclass=Singleton):
 
         class_name = f"{class_name}Spider"
         return (key, class_name)
+
+
+def index_nsi_items(items: Iterable[dict]) -> NSIItemIndexes:
+    """
+    :param items: nsi.json items, in order
+    :return: mappings of Wikidata code (brand or operator) and locationSet
+             include code to the positions of matching items
+    """
+    by_wikidata, by_location = {}, {}
+    for i, item in enumerate(items):
+        brand_wikidata = item["tags"].get("brand:wikidata")
+        operator_wikidata = item["tags"].get("operator:wikidata")
+        if brand_wikidata:
+            by_wikidata.setdefault(brand_wikidata, []).append(i)
+        if operator_wikidata and operator_wikidata != brand_wikidata:
+            by_wikidata.setdefault(operator_wikidata, []).append(i)
+        for location in item["locationSet"].get("include") or []:
+            if isinstance(location, str):
+                by_location.setdefault(location, []).append(i)
+    return by_wikidata, by_location
+
+
+def index_wikidata_domains(wikidata: Mapping[str, dict]) -> DomainIndexes:
+    """
+    :param wikidata: wikidata.json entries
+    :return: mappings of official website netloc, netloc without any "www."
+             prefix and registered domain to the first Wikidata code (in
+             wikidata.json order) with a matching website
+    """
+    by_netloc, by_www_stripped, by_registered_domain = {}, {}, {}
+    for wikidata_code, org_parameters in wikidata.items():
+        for official_website in org_parameters.get("officialWebsites", []):
+            official_website_domain = urlparse(official_website).netloc
+            by_netloc.setdefault(official_website_domain, wikidata_code)
+            by_www_stripped.setdefault(official_website_domain.removeprefix("www."), wikidata_code)
+            by_registered_domain.setdefault(tldextract.extract(official_website).registered_domain, wikidata_code)
+    return by_netloc, by_www_stripped, by_registered_domain
+
+
+def index_wikidata_labels(wikidata: Mapping[str, dict]) -> LabelIndexes:
+    """
+    :param wikidata: wikidata.json entries
+    :return: all normalised labels joined by newlines (which normalised labels
+             never contain) for substring search, the offset of each label
+             within that string, the Wikidata code of each label, and a
+             mapping of normalised label to Wikidata codes
+    """
+    offsets, codes, labels, by_label = [], [], [], {}
+    offset = 0
+    for k, v in wikidata.items():
+        if nsi_label := v.get("label"):
+            nsi_label_fuzzy = NSI.normalise_label(nsi_label)
+            by_label.setdefault(nsi_label_fuzzy, []).append(k)
+            offsets.append(offset)
+            codes.append(k)
+            labels.append(nsi_label_fuzzy)
+            offset += len(nsi_label_fuzzy) + 1
+    return "\n".join(labels), offsets, codes, by_label
+
+
+def _source_stats() -> dict[str, list[int]]:
+    stats = {}
+    for path in [NSI_FILE_PATH, WIKIDATA_FILE_PATH]:
+        stat = path.stat()
+        stats[path.name] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+class _JSONBlobs(Sequence):
+    """Lazily decoded sequence of JSON documents packed back to back in a buffer."""
+
+    def __init__(self, buffer: memoryview, offsets: memoryview):
+        self._buffer = buffer
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return json.loads(bytes(self._buffer[self._offsets[i] : self._offsets[i + 1]]))
+
+
+class _WikidataMapping(Mapping):
+    """Read only view of wikidata.json entries held in an NSI snapshot."""
+
+    def __init__(self, codes: list[str], entries: _JSONBlobs):
+        self._codes = codes
+        self._entries = entries
+        self._positions: dict[str, int] | None = None
+
+    def __getitem__(self, code: str) -> dict:
+        if self._positions is None:
+            self._positions = {c: i for i, c in enumerate(self._codes)}
+        return self._entries[self._positions[code]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._codes)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def items(self) -> Iterator[tuple[str, dict]]:
+        for i, code in enumerate(self._codes):
+            yield code, self._entries[i]
+
+
+class _NSICategoryMapping(Mapping):
+    """Read only view of nsi.json categories held in an NSI snapshot."""
+
+    def __init__(self, categories: dict[str, dict], items: _JSONBlobs):
+        self._categories = categories
+        self._items = items
+
+    def __getitem__(self, category: str) -> dict:
+        v = self._categories[category]
+        return v["meta"] | {"items": self._items[v["start"] : v["end"]]}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+
+class NSISnapshot:
+    """
+    Compact, memory mapped form of nsi.json and nsi-wikidata.json with
+    precomputed lookup indexes, so that many processes share one copy of the
+    data through the OS page cache and avoid parsing the JSON files.
+
+    Layout: magic bytes, a little endian uint32 header length and a JSON
+    header naming each section's (offset, length). Sections are 8 byte
+    aligned and are either JSON, packed JSON documents, or native uint64
+    offset arrays into packed JSON documents. Entries are only decoded when
+    accessed. Snapshots are a build artefact for the machine they were built
+    on and are ignored once the source JSON files change.
+    """
+
+    def __init__(self, path: Path = NSI_SNAPSHOT_FILE_PATH):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+        if bytes(self._buffer[: len(NSI_SNAPSHOT_MAGIC)]) != NSI_SNAPSHOT_MAGIC:
+            raise ValueError(f"Not an NSI snapshot: {path}")
+        header_start = len(NSI_SNAPSHOT_MAGIC) + 4
+        (header_length,) = struct.unpack_from("<I", self._buffer, len(NSI_SNAPSHOT_MAGIC))
+        self.header: dict = json.loads(bytes(self._buffer[header_start : header_start + header_length]))
+        self._data_start = _align(header_start + header_length)
+
+        self.nsi_items = _JSONBlobs(self._section("nsi_items"), self._section("nsi_item_offsets").cast("Q"))
+        self.wikidata = _WikidataMapping(
+            self._json_section("wikidata_codes"),
+            _JSONBlobs(self._section("wikidata"), self._section("wikidata_offsets").cast("Q")),
+        )
+        self.nsi = _NSICategoryMapping(self._json_section("nsi_categories"), self.nsi_items)
+
+    @classmethod
+    def open_if_fresh(cls, path: Path = NSI_SNAPSHOT_FILE_PATH) -> Self | None:
+        """
+        :param path: location of the snapshot
+        :return: the snapshot, or None if it is missing, unreadable, of a
+                 different version, or older than the source JSON files
+        """
+        try:
+            snapshot = cls(path)
+            if snapshot.header.get("version") != NSI_SNAPSHOT_VERSION:
+                return None
+            if snapshot.header.get("sources") != _source_stats():
+                return None
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+        return snapshot
+
+    def _section(self, name: str) -> memoryview:
+        offset, length = self.header["sections"][name]
+        return self._buffer[self._data_start + offset : self._data_start + offset + length]
+
+    def _json_section(self, name: str) -> Any:
+        return json.loads(bytes(self._section(name)))
+
+    def nsi_item_indexes(self) -> NSIItemIndexes:
+        return self._json_section("nsi_by_wikidata"), self._json_section("nsi_by_location")
+
+    def domain_indexes(self) -> DomainIndexes:
+        return tuple(self._json_section("wikidata_by_domain"))
+
+    def label_indexes(self) -> LabelIndexes:
+        return tuple(self._json_section("wikidata_by_label"))
+
+    @staticmethod
+    def write(path: Path = NSI_SNAPSHOT_FILE_PATH) -> None:
+        """
+        Build a snapshot from the vendored nsi.json and nsi-wikidata.json.
+        The snapshot is written to a temporary file and moved into place so
+        that concurrently starting processes never see a partial snapshot.
+        :param path: location of the snapshot
+        """
+        sources = _source_stats()
+        wikidata = json.load(open(WIKIDATA_FILE_PATH))["wikidata"]
+        nsi = json.load(open(NSI_FILE_PATH))["nsi"]
+
+        codes = list(wikidata.keys())
+        items = [item for v in nsi.values() for item in v["items"]]
+        categories = {}
+        start = 0
+        for category, v in nsi.items():
+            end = start + len(v["items"])
+            categories[category] = {"start": start, "end": end, "meta": {k: x for k, x in v.items() if k != "items"}}
+            start = end
+
+        sections = {}
+        sections["wikidata"], sections["wikidata_offsets"] = _pack_json_documents(wikidata[code] for code in codes)
+        sections["wikidata_codes"] = _dump_json(codes)
+        sections["nsi_items"], sections["nsi_item_offsets"] = _pack_json_documents(items)
+        sections["nsi_categories"] = _dump_json(categories)
+        by_wikidata, by_location = index_nsi_items(items)
+        sections["nsi_by_wikidata"] = _dump_json(by_wikidata)
+        sections["nsi_by_location"] = _dump_json(by_location)
+        sections["wikidata_by_domain"] = _dump_json(index_wikidata_domains(wikidata))
+        sections["wikidata_by_label"] = _dump_json(index_wikidata_labels(wikidata))
+
+        section_offsets = {}
+        data = bytearray()
+        for name, section in sections.items():
+            section_offsets[name] = [len(data), len(section)]
+            data += section
+            data += b"\0" * (_align(len(data)) - len(data))
+        header = _dump_json({"version": NSI_SNAPSHOT_VERSION, "sources": sources, "sections": section_offsets})
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(NSI_SNAPSHOT_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _dump_json(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _pack_json_documents(documents: Iterable[Any]) -> tuple[bytes, bytes]:
+    blob = bytearray()
+    offsets = array("Q", [0])
+    for document in documents:
+        blob += _dump_json(document)
+        offsets.append(len(blob))
+    return bytes(blob), offsets.tobytes()
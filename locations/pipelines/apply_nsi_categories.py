@@ -1,23 +1,53 @@
+from typing import NamedTuple
+
 from scrapy.crawler import Crawler
 
-from locations.categories import get_category_tags
+from locations.extensions.batch_stats import get_stats_counter
 from locations.items import Feature
 from locations.name_suggestion_index import NSI
+from locations.pipelines.fused import ItemContext
+
+
+class NSIMatch(NamedTuple):
+    # NSI entry to apply to the item, or None if matching failed.
+    entry: dict | None
+    # Stats to increment for the item.
+    stats: tuple[str, ...]
+
+
+class LocationSet(NamedTuple):
+    # Location codes of an NSI entry's locationSet, such as "us" and
+    # "us-tx", without any ".geojson" suffix.
+    include: frozenset[str]
+    exclude: frozenset[str]
+    # Whether "001" (the whole world) is included.
+    worldwide: bool
 
 
 class ApplyNSICategoriesPipeline:
     nsi = NSI()
     wikidata_cache = {}
+    # NSIMatch decisions keyed by the item properties matching depends on.
+    match_cache = {}
+    # Compiled LocationSet (or None if the locationSet is missing or empty)
+    # of each NSI entry, keyed by NSI entry ID.
+    location_set_cache = {}
+    # Category tags of items are updated when NSI tags are applied.
+    context_preserved = frozenset({"category_tags"})
 
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
+        self.stats = get_stats_counter(crawler)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
         return cls(crawler)
 
     def process_item(self, item: Feature):
-        if self.crawler.stats is None:
+        return self.process_item_with_context(item, ItemContext(item))
+
+    def process_item_with_context(self, item: Feature, context: ItemContext) -> Feature:
+        if self.stats is None:
             return item
         if item.get("nsi_id"):
             # Skip NSI matching and tag synchronisation upon spider request. A
@@ -32,11 +62,63 @@ class ApplyNSICategoriesPipeline:
             # Failure to match due to missing brand_wikidata or
             # operator_wikidata fields on the item. One or both of these
             # fields must be supplied.
-            self.crawler.stats.inc_value("atp/nsi/match_failed")
-            self.crawler.stats.inc_value("atp/nsi/brand_or_operator_missing")
+            self.stats.inc_value("atp/nsi/match_failed")
+            self.stats.inc_value("atp/nsi/brand_or_operator_missing")
             return item
 
-        if not get_category_tags(item) and item.get("brand_wikidata"):
+        location_code = item.get_iso_3166_2_code()
+        if not location_code:
+            location_code = item.get("country")
+        key = (
+            brand_operator_qcode,
+            "brand" if item.get("brand_wikidata") else "operator",
+            tuple(context.get_category_tags().items()),
+            location_code,
+            item.has_valid_country_code(),
+        )
+        try:
+            # Items of a spider usually share a handful of brands,
+            # categories and locations, so the decision is made once for
+            # each combination of them.
+            if (match := self.match_cache.get(key)) is None:
+                match = self.match_cache[key] = self.match_nsi(*key)
+        except TypeError:
+            # Unhashable country or category values, which never match.
+            match = self.match_nsi(*key)
+
+        for stat in match.stats:
+            self.stats.inc_value(stat)
+        if match.entry is not None:
+            self.apply_nsi_tags(match.entry, item)
+            context.forget("category_tags")
+        return item
+
+    def match_nsi(
+        self,
+        brand_operator_qcode: str,
+        namespace: str,
+        category_tags: tuple[tuple[str, str], ...],
+        location_code: str | None,
+        valid_country: bool,
+    ) -> NSIMatch:
+        """
+        Decide which NSI entry, if any, applies to ATP items with the
+        supplied properties.
+        :param brand_operator_qcode: brand_wikidata, or operator_wikidata if
+                                     brand_wikidata is not set, of the items.
+        :param namespace: "brand" if the items have brand_wikidata set, and
+                          "operator" otherwise.
+        :param category_tags: top level category tags of the items.
+        :param location_code: ISO 3166-2 code of the items, or ISO 3166-1
+                              alpha-2 code or None if they have no state.
+        :param valid_country: whether the items have a valid ISO 3166-1
+                              alpha-2 country code.
+        :return: the NSI entry to apply (or None if matching failed) and
+                 the stats to increment for each item.
+        """
+        stats = []
+
+        if not category_tags and namespace == "brand":
             # Not a fatal condition for NSI matching because many ATP spiders
             # do not specify top level category tags which could be used to
             # match with NSI. It is rare enough that an NSI entry is
@@ -56,8 +138,8 @@ class ApplyNSICategoriesPipeline:
             #   of "Costco" in the US with Wikidata item Q715583 being both
             #   shop/warehouse and amenity/car_wash. The only field different
             #   in NSI entries is the category.
-            self.crawler.stats.inc_value("atp/nsi/category_missing")
-        elif not get_category_tags(item):
+            stats.append("atp/nsi/category_missing")
+        elif not category_tags:
             # Failure to match due to missing top level category tags on the
             # ATP item, preventing matching with NSI operator entries. Most
             # ATP spiders matching against NSI operator entries already
@@ -71,15 +153,15 @@ class ApplyNSICategoriesPipeline:
             #   of knowing which of numerous NSI entries associated with the
             #   local government organisation is applicable if no category is
             #   specified.
-            self.crawler.stats.inc_value("atp/nsi/match_failed")
-            self.crawler.stats.inc_value("atp/nsi/category_missing")
-            return item
+            stats.append("atp/nsi/match_failed")
+            stats.append("atp/nsi/category_missing")
+            return NSIMatch(None, tuple(stats))
 
-        if not item.has_valid_country_code():
+        if not valid_country:
             # Not a fatal condition for NSI matching because both the ATP and
             # NSI items may have global applicability (e.g. "001" for NSI).
             # However, it's still worth collecting statistics.
-            self.crawler.stats.inc_value("atp/nsi/country_missing")
+            stats.append("atp/nsi/country_missing")
 
         if brand_operator_qcode not in self.wikidata_cache:
             # wikidata_cache will usually only hold one thing, but can contain
@@ -89,22 +171,22 @@ class ApplyNSICategoriesPipeline:
 
         nsi_matches = self.wikidata_cache[brand_operator_qcode]
 
-        if len(nsi_matches) == 0 and item.get("brand_wikidata"):
+        if len(nsi_matches) == 0 and namespace == "brand":
             # Failure to match due to the ATP item specifying a Wikidata item
             # for a brand, but NSI does not know of this Wikidata item.
             # It is suggested that a change be submitted to:
             # https://github.com/osmlab/name-suggestion-index
-            self.crawler.stats.inc_value("atp/nsi/match_failed")
-            self.crawler.stats.inc_value("atp/nsi/brand_unknown")
-            return item
-        elif len(nsi_matches) == 0 and item.get("operator_wikidata"):
+            stats.append("atp/nsi/match_failed")
+            stats.append("atp/nsi/brand_unknown")
+            return NSIMatch(None, tuple(stats))
+        elif len(nsi_matches) == 0 and namespace == "operator":
             # Failure to match due to the ATP item specifying a Wikidata item
             # for an operator, but NSI does not know of this Wikidata item.
             # It is suggested that a change be submitted to:
             # https://github.com/osmlab/name-suggestion-index
-            self.crawler.stats.inc_value("atp/nsi/match_failed")
-            self.crawler.stats.inc_value("atp/nsi/operator_unknown")
-            return item
+            stats.append("atp/nsi/match_failed")
+            stats.append("atp/nsi/operator_unknown")
+            return NSIMatch(None, tuple(stats))
 
         # Sometimes a brand and operator are the same across both NSI's
         # "brand" and "operator" namespaces. For example, "KFC" is listed in
@@ -113,13 +195,14 @@ class ApplyNSICategoriesPipeline:
         # Possible matches should be narrowed down to one of the NSI's
         # namespaces only, depending on whether the ATP item specifies a
         # "brand_operator" and/or "operator_wikidata" value.
-        if item.get("brand_wikidata"):
-            nsi_matches = list(filter(lambda x: self.nsi_entry_is_brand(x), nsi_matches))
-        elif item.get("operator_wikidata"):
-            nsi_matches = list(filter(lambda x: self.nsi_entry_is_operator(x), nsi_matches))
+        if namespace == "brand":
+            nsi_matches = [x for x in nsi_matches if self.nsi_entry_is_brand(x)]
+        else:
+            nsi_matches = [x for x in nsi_matches if self.nsi_entry_is_operator(x)]
 
-        if get_category_tags(item):
-            nsi_matches = list(filter(lambda x: self.nsi_entry_has_all_tags(x, get_category_tags(item)), nsi_matches))
+        if category_tags:
+            tags = dict(category_tags)
+            nsi_matches = [x for x in nsi_matches if self.nsi_entry_has_all_tags(x, tags)]
 
             if len(nsi_matches) == 0:
                 # Failure to match due to NSI not knowing of the brand/operator
@@ -129,38 +212,33 @@ class ApplyNSICategoriesPipeline:
                 # match to NSI is not possible as NSI first needs updating to
                 # reflect the brand "Costco" opening pubs adjoining their
                 # warehouses.
-                self.crawler.stats.inc_value("atp/nsi/match_failed")
-                self.crawler.stats.inc_value("atp/nsi/category_unknown")
-                return item
+                stats.append("atp/nsi/match_failed")
+                stats.append("atp/nsi/category_unknown")
+                return NSIMatch(None, tuple(stats))
 
-        location_code = item.get_iso_3166_2_code()
-        if not location_code:
-            location_code = item.get("country")
-        nsi_matches = list(filter(lambda x: self.nsi_entry_includes_location(x, location_code), nsi_matches))
+        nsi_matches = [x for x in nsi_matches if self.location_set_includes(self.get_location_set(x), location_code)]
 
         if len(nsi_matches) == 0:
             # Failure to match due to NSI not knowing of the brand/operator
             # operating within the ATP items designated country and first
             # level subdivision. For example, "Chick-fil-A" is known in NSI
             # to operate in 3 countries, but Andorra ("AD") is not one them.
-            self.crawler.stats.inc_value("atp/nsi/match_failed")
-            self.crawler.stats.inc_value("atp/nsi/location_unknown")
-            return item
+            stats.append("atp/nsi/match_failed")
+            stats.append("atp/nsi/location_unknown")
+            return NSIMatch(None, tuple(stats))
 
-        if len(nsi_matches) == 1 and (not get_category_tags(item) or not location_code):
+        if len(nsi_matches) == 1 and (not category_tags or not location_code):
             # Imperfect match where one NSI entry is returned, but a category
             # match wasn't possible so there is a remaining risk that a
             # mismatch has occurred. Alternatively or additionally, a location
             # match wasn't possible.
-            self.crawler.stats.inc_value("atp/nsi/match_imperfect")
-            self.apply_nsi_tags(nsi_matches[0], item)
-            return item
+            stats.append("atp/nsi/match_imperfect")
+            return NSIMatch(nsi_matches[0], tuple(stats))
         elif len(nsi_matches) == 1:
             # Perfect match where only one NSI entry is returned matching the
             # ATP item.
-            self.crawler.stats.inc_value("atp/nsi/match_perfect")
-            self.apply_nsi_tags(nsi_matches[0], item)
-            return item
+            stats.append("atp/nsi/match_perfect")
+            return NSIMatch(nsi_matches[0], tuple(stats))
 
         # Reaching this point means that more than one NSI entry is matching
         # the ATP item. This may occur if NSI knows of "KFC" (of the same
@@ -170,9 +248,9 @@ class ApplyNSICategoriesPipeline:
         # country and first level subvision, both of the two KFC NSI entries
         # could be returned at this point. Matching fails here because it's
         # unknown which of the multiple NSI matches to apply.
-        self.crawler.stats.inc_value("atp/nsi/match_failed")
-        self.crawler.stats.inc_value("atp/nsi/multiple_matches")
-        return item
+        stats.append("atp/nsi/match_failed")
+        stats.append("atp/nsi/multiple_matches")
+        return NSIMatch(None, tuple(stats))
 
     @staticmethod
     def nsi_entry_is_brand(nsi_entry: dict) -> bool:
@@ -235,34 +313,63 @@ class ApplyNSICategoriesPipeline:
         :return: True if the supplied NSI entry applies to the supplied
                  location code, and False otherwise.
         """
-        if not nsi_entry.get("locationSet") or not (isinstance(location_code, str) or location_code is None):
-            return False
-        if not nsi_entry["locationSet"].get("include"):
+        return ApplyNSICategoriesPipeline.location_set_includes(
+            ApplyNSICategoriesPipeline.compile_location_set(nsi_entry), location_code
+        )
+
+    @staticmethod
+    def compile_location_set(nsi_entry: dict) -> LocationSet | None:
+        """
+        Compile the locationSet of an NSI entry for repeated lookups.
+        :param nsi_entry: NSI entry as a dictionary.
+        :return: LocationSet of the NSI entry, or None if the NSI entry has
+                 no locationSet or included locations.
+        """
+        if not nsi_entry.get("locationSet") or not nsi_entry["locationSet"].get("include"):
+            return None
+        include = [x for x in nsi_entry["locationSet"]["include"] if isinstance(x, str)]
+        exclude = [x for x in nsi_entry["locationSet"].get("exclude") or [] if isinstance(x, str)]
+        return LocationSet(
+            include=frozenset(x.replace(".geojson", "") for x in include),
+            exclude=frozenset(x.replace(".geojson", "") for x in exclude),
+            worldwide="001" in include,
+        )
+
+    def get_location_set(self, nsi_entry: dict) -> LocationSet | None:
+        """
+        Return the compiled locationSet of an NSI entry, compiling it on
+        first use.
+        :param nsi_entry: NSI entry as a dictionary.
+        :return: LocationSet of the NSI entry, or None if the NSI entry has
+                 no locationSet or included locations.
+        """
+        if (nsi_id := nsi_entry.get("id")) is None:
+            return self.compile_location_set(nsi_entry)
+        if nsi_id not in self.location_set_cache:
+            self.location_set_cache[nsi_id] = self.compile_location_set(nsi_entry)
+        return self.location_set_cache[nsi_id]
+
+    @staticmethod
+    def location_set_includes(location_set: LocationSet | None, location_code: str | None) -> bool:
+        """
+        Check that a compiled NSI locationSet applies to the supplied ISO
+        3166-1 alpha-2 or ISO 3166-2 location code.
+        :param location_set: LocationSet of an NSI entry.
+        :param location_code: as for nsi_entry_includes_location.
+        :return: True if the locationSet applies to the supplied location
+                 code, and False otherwise.
+        """
+        if location_set is None:
             return False
-        if len(nsi_entry["locationSet"]["include"]) == 0 and location_code is None:
-            return True
-        if "001" in nsi_entry["locationSet"]["include"] and location_code is None:
-            return True
         if location_code is None:
+            return location_set.worldwide
+        if not isinstance(location_code, str):
             return False
-        if nsi_entry["locationSet"].get("exclude"):
-            excluded_location_codes = [
-                x.replace(".geojson", "") for x in nsi_entry["locationSet"]["exclude"] if isinstance(x, str)
-            ]
-            if location_code.lower().split("-")[0] in excluded_location_codes:
-                return False
-            if location_code.lower() in excluded_location_codes:
-                return False
-        if "001" in nsi_entry["locationSet"]["include"]:
-            return True
-        included_location_codes = [
-            x.replace(".geojson", "") for x in nsi_entry["locationSet"]["include"] if isinstance(x, str)
-        ]
-        if location_code.lower().split("-")[0] in included_location_codes:
-            return True
-        if location_code.lower() in included_location_codes:
-            return True
-        return False
+        location_code = location_code.lower()
+        country_code = location_code.split("-")[0]
+        if country_code in location_set.exclude or location_code in location_set.exclude:
+            return False
+        return location_set.worldwide or country_code in location_set.include or location_code in location_set.include
 
     @staticmethod
     def apply_nsi_tags(nsi_entry: dict, item: Feature) -> None:
@@ -1,5 +1,11 @@
+from typing import Callable
+
+from scrapy import Spider
 from scrapy.crawler import Crawler
 
+from locations.items import Feature
+from locations.pipelines.fused import ItemContext
+
 
 class ApplySpiderLevelAttributesPipeline:
     crawler: Crawler
@@ -12,12 +18,19 @@ class ApplySpiderLevelAttributesPipeline:
         return cls(crawler)
 
     def process_item(self, item):
-        if not hasattr(self.crawler.spider, "item_attributes"):
+        if not (item_attributes := getattr(self.crawler.spider, "item_attributes", None)):
             return item
 
-        item_attributes = self.crawler.spider.item_attributes
+        return self.apply_item_attributes(item, item_attributes)
+
+    def get_fused_step(self, spider: Spider) -> Callable[[Feature, ItemContext], Feature] | None:
+        if not (item_attributes := getattr(spider, "item_attributes", None)):
+            return None
+        return lambda item, context: self.apply_item_attributes(item, item_attributes)
 
-        for key, value in item_attributes.items():  # ty: ignore [unresolved-attribute]
+    @staticmethod
+    def apply_item_attributes(item, item_attributes: dict):
+        for key, value in item_attributes.items():
             if key == "extras":
                 extras = item.get("extras", {})
                 for k, v in value.items():
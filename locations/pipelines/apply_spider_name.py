@@ -1,6 +1,10 @@
+from typing import Callable
+
+from scrapy import Spider
 from scrapy.crawler import Crawler
 
 from locations.items import Feature
+from locations.pipelines.fused import ItemContext
 
 
 class ApplySpiderNamePipeline:
@@ -14,8 +18,16 @@ class ApplySpiderNamePipeline:
         return cls(crawler)
 
     def process_item(self, item: Feature):
+        return self.apply_spider_name(item, self.crawler.spider.name)  # ty: ignore[unresolved-attribute]
+
+    def get_fused_step(self, spider: Spider) -> Callable[[Feature, ItemContext], Feature] | None:
+        spider_name = spider.name
+        return lambda item, context: self.apply_spider_name(item, spider_name)
+
+    @staticmethod
+    def apply_spider_name(item: Feature, spider_name: str) -> Feature:
         existing_extras = item.get("extras", {})
-        existing_extras["@spider"] = self.crawler.spider.name  # ty: ignore[unresolved-attribute]
+        existing_extras["@spider"] = spider_name
         item["extras"] = existing_extras
 
         return item
@@ -7,7 +7,9 @@ from urllib.parse import urlparse
 from geonamescache import GeonamesCache
 from scrapy import Spider
 from scrapy.crawler import Crawler
+from scrapy.statscollectors import StatsCollector
 
+from locations.extensions.batch_stats import StatsCounter, get_stats_counter
 from locations.hours import OpeningHours
 from locations.items import Feature, set_lat_lon
 
@@ -18,27 +20,33 @@ def check_field(
     param: str,
     allowed_types: type | tuple[type],
     match_regex: Pattern | None = None,
+    stats: StatsCounter | StatsCollector | None = None,
 ) -> None:
+    if stats is None and spider.crawler:
+        stats = spider.crawler.stats
     if val := item.get(param):
         if not isinstance(val, allowed_types):
             spider.logger.error(
                 f'Invalid type "{type(val).__name__}" for attribute "{param}". Expected type(s) are "{allowed_types}".'
             )
-            if spider.crawler and spider.crawler.stats:
-                spider.crawler.stats.inc_value(f"atp/field/{param}/wrong_type")
+            if stats:
+                stats.inc_value(f"atp/field/{param}/wrong_type")
         elif match_regex and not match_regex.match(val):
             spider.logger.warning(
                 f'Invalid value "{val}" for attribute "{param}". Value did not match expected regular expression of r"{match_regex.pattern}".'
             )
-            if spider.crawler and spider.crawler.stats:
-                spider.crawler.stats.inc_value(f"atp/field/{param}/invalid")
-    elif spider.crawler and spider.crawler.stats:
-        spider.crawler.stats.inc_value(f"atp/field/{param}/missing")
+            if stats:
+                stats.inc_value(f"atp/field/{param}/invalid")
+    elif stats:
+        stats.inc_value(f"atp/field/{param}/missing")
 
 
 class CheckItemPropertiesPipeline:
     crawler: Crawler
 
+    # Only the coordinates and opening hours of items are changed.
+    context_preserved = frozenset({"category_tags"})
+
     countries = GeonamesCache().get_countries().keys()
     email_regex = re.compile(r"(^[-\w_.+]+@[-\w]+\.[-\w.]+$)")
     twitter_regex = re.compile(r"^@?([-\w_]+)$")
@@ -55,6 +63,7 @@ class CheckItemPropertiesPipeline:
 
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
+        self.stats = get_stats_counter(crawler)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
@@ -63,24 +72,36 @@ class CheckItemPropertiesPipeline:
     def process_item(self, item: Feature) -> Feature:  # noqa: C901
         if not self.crawler.spider:
             return item
-        check_field(item, self.crawler.spider, "brand_wikidata", allowed_types=(str,), match_regex=self.wikidata_regex)
         check_field(
-            item, self.crawler.spider, "operator_wikidata", allowed_types=(str,), match_regex=self.wikidata_regex
+            item,
+            self.crawler.spider,
+            "brand_wikidata",
+            allowed_types=(str,),
+            match_regex=self.wikidata_regex,
+            stats=self.stats,
+        )
+        check_field(
+            item,
+            self.crawler.spider,
+            "operator_wikidata",
+            allowed_types=(str,),
+            match_regex=self.wikidata_regex,
+            stats=self.stats,
         )
-        check_field(item, self.crawler.spider, "email", (str,), self.email_regex)
-        check_field(item, self.crawler.spider, "phone", (str,))
-        check_field(item, self.crawler.spider, "unit", (str,))
-        check_field(item, self.crawler.spider, "housenumber", (str,))
-        check_field(item, self.crawler.spider, "street", (str,))
-        check_field(item, self.crawler.spider, "street_address", (str,))
-        check_field(item, self.crawler.spider, "city", (str,))
-        check_field(item, self.crawler.spider, "state", (str,))
-        check_field(item, self.crawler.spider, "postcode", (str,))
-        check_field(item, self.crawler.spider, "country", (str,))
-        check_field(item, self.crawler.spider, "name", (str,))
-        check_field(item, self.crawler.spider, "brand", (str,))
-        check_field(item, self.crawler.spider, "operator", (str,))
-        check_field(item, self.crawler.spider, "branch", (str,))
+        check_field(item, self.crawler.spider, "email", (str,), self.email_regex, stats=self.stats)
+        check_field(item, self.crawler.spider, "phone", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "unit", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "housenumber", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "street", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "street_address", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "city", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "state", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "postcode", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "country", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "name", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "brand", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "operator", (str,), stats=self.stats)
+        check_field(item, self.crawler.spider, "branch", (str,), stats=self.stats)
 
         self.check_geom(item, self.crawler.spider)
         self.check_twitter(item, self.crawler.spider)
@@ -90,13 +111,8 @@ class CheckItemPropertiesPipeline:
         self.check_url(item, self.crawler.spider, "website")
 
         if country_code := item.get("country"):
-            if (
-                self.crawler
-                and self.crawler.spider
-                and self.crawler.spider.crawler
-                and self.crawler.spider.crawler.stats
-            ):
-                self.crawler.spider.crawler.stats.inc_value(f"atp/country/{country_code}")
+            if self.stats:
+                self.stats.inc_value(f"atp/country/{country_code}")
 
         return item
 
@@ -126,16 +142,16 @@ class CheckItemPropertiesPipeline:
                 else:
                     # Invalid geometry type. Refer to RFC 7946 for valid
                     # types.
-                    if spider.crawler.stats:
-                        spider.crawler.stats.inc_value("atp/field/geometry/invalid")
+                    if self.stats:
+                        self.stats.inc_value("atp/field/geometry/invalid")
                     item.pop("lat", None)
                     item.pop("lon", None)
                     item.pop("geometry", None)
                     return
             else:
                 # Invalid geometry type.
-                if spider.crawler.stats:
-                    spider.crawler.stats.inc_value("atp/field/geometry/invalid")
+                if self.stats:
+                    self.stats.inc_value("atp/field/geometry/invalid")
                 item.pop("lat", None)
                 item.pop("lon", None)
                 item.pop("geometry", None)
@@ -145,8 +161,8 @@ class CheckItemPropertiesPipeline:
             lon_untyped = item.get("lon")
 
         if lat_untyped is None or lon_untyped is None:
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/field/geometry/missing")
+            if self.stats:
+                self.stats.inc_value("atp/field/geometry/missing")
             item.pop("lat", None)
             item.pop("lon", None)
             item.pop("geometry", None)
@@ -162,24 +178,24 @@ class CheckItemPropertiesPipeline:
             if math.isnan(lat_typed) or math.isnan(lon_typed):
                 raise ValueError("Latitude or longitude is NaN")
         except (TypeError, ValueError):
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/field/geometry/invalid")
+            if self.stats:
+                self.stats.inc_value("atp/field/geometry/invalid")
             item.pop("lat", None)
             item.pop("lon", None)
             item.pop("geometry", None)
             return
 
         if lat_typed < -90.0 or lat_typed > 90.0 or lon_typed < -180.0 or lon_typed > 180.0:
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/field/geometry/invalid")
+            if self.stats:
+                self.stats.inc_value("atp/field/geometry/invalid")
             item.pop("lat", None)
             item.pop("lon", None)
             item.pop("geometry", None)
             return None
 
         if math.fabs(lat_typed) < 3 and math.fabs(lon_typed) < 3:
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/geometry/null_island")
+            if self.stats:
+                self.stats.inc_value("atp/geometry/null_island")
             item.pop("lat", None)
             item.pop("lon", None)
             item.pop("geometry", None)
@@ -190,16 +206,16 @@ class CheckItemPropertiesPipeline:
     def check_twitter(self, item: Feature, spider: Spider) -> None:
         if twitter := item.get("twitter"):
             if not isinstance(twitter, str):
-                if spider.crawler.stats:
-                    spider.crawler.stats.inc_value("atp/field/twitter/wrong_type")
+                if self.stats:
+                    self.stats.inc_value("atp/field/twitter/wrong_type")
                 return
             if not self._is_valid_twitter(twitter):
-                if spider.crawler.stats:
-                    spider.crawler.stats.inc_value("atp/field/twitter/invalid")
+                if self.stats:
+                    self.stats.inc_value("atp/field/twitter/invalid")
                 return
         else:
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/field/twitter/missing")
+            if self.stats:
+                self.stats.inc_value("atp/field/twitter/missing")
 
     def _is_valid_twitter(self, twitter: str) -> bool:
         if self.twitter_regex.match(twitter):
@@ -218,25 +234,25 @@ class CheckItemPropertiesPipeline:
                     item["opening_hours"] = opening_hours.as_opening_hours()
                 else:
                     del item["opening_hours"]
-                    if spider.crawler.stats:
-                        spider.crawler.stats.inc_value("atp/field/opening_hours/missing")
+                    if self.stats:
+                        self.stats.inc_value("atp/field/opening_hours/missing")
             elif not isinstance(opening_hours, str):
-                if spider.crawler.stats:
-                    spider.crawler.stats.inc_value("atp/field/opening_hours/wrong_type")
+                if self.stats:
+                    self.stats.inc_value("atp/field/opening_hours/wrong_type")
             elif not self.opening_hours_regex.match(opening_hours) and opening_hours != "24/7":
-                if spider.crawler.stats:
-                    spider.crawler.stats.inc_value("atp/field/opening_hours/invalid")
+                if self.stats:
+                    self.stats.inc_value("atp/field/opening_hours/invalid")
         else:
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/field/opening_hours/missing")
+            if self.stats:
+                self.stats.inc_value("atp/field/opening_hours/missing")
 
     def check_country(self, item: Feature, spider: Spider) -> None:
         if not isinstance(item.get("country"), str):
             return
         if item.get("country") not in self.countries:
             spider.logger.error('Invalid value "{}" for attribute "{}".'.format(item.get("country"), "country"))
-            if spider.crawler.stats:
-                spider.crawler.stats.inc_value("atp/field/{}/invalid".format("country"))
+            if self.stats:
+                self.stats.inc_value("atp/field/{}/invalid".format("country"))
 
     def check_url(self, item: Feature, spider: Spider, param: str) -> None:
         val = item.get(param)
@@ -246,8 +262,8 @@ class CheckItemPropertiesPipeline:
         # Check that param is a string.
         if not isinstance(val, str):
             spider.logger.error(f'Invalid type "{type(val).__name__}" for attribute "{param}". Expected type is "str".')
-            if spider.crawler and spider.crawler.stats:
-                spider.crawler.stats.inc_value(f"atp/field/{param}/wrong_type")
+            if self.stats:
+                self.stats.inc_value(f"atp/field/{param}/wrong_type")
             return
 
         # Check that param is a valid URL.
@@ -255,22 +271,22 @@ class CheckItemPropertiesPipeline:
             url = urlparse(val)
         except ValueError:
             spider.logger.error(f'Invalid value "{val}" for attribute "{param}". Value is not a valid url.')
-            if spider.crawler and spider.crawler.stats:
-                spider.crawler.stats.inc_value(f"atp/field/{param}/invalid")
+            if self.stats:
+                self.stats.inc_value(f"atp/field/{param}/invalid")
             return
 
         # Restrict URLs to http or https.
         if url.scheme not in ("http", "https"):
             spider.logger.error(f'Invalid value "{val}" for attribute "{param}". URL scheme is not http or https.')
-            if spider.crawler and spider.crawler.stats:
-                spider.crawler.stats.inc_value(f"atp/field/{param}/invalid")
+            if self.stats:
+                self.stats.inc_value(f"atp/field/{param}/invalid")
             return
 
         # Enforce that hostname is valid.
         if not self._is_valid_hostname(url.hostname):
             spider.logger.error(f'Invalid value "{val}" for attribute "{param}". Hostname is not valid.')
-            if spider.crawler and spider.crawler.stats:
-                spider.crawler.stats.inc_value(f"atp/field/{param}/invalid")
+            if self.stats:
+                self.stats.inc_value(f"atp/field/{param}/invalid")
             return
 
     @staticmethod
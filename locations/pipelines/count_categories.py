@@ -1,26 +1,33 @@
 from scrapy.crawler import Crawler
 
-from locations.categories import get_category_tags
+from locations.extensions.batch_stats import get_stats_counter
 from locations.items import Feature
+from locations.pipelines.fused import ItemContext
 
 
 class CountCategoriesPipeline:
     crawler: Crawler
 
+    context_preserved = frozenset({"category_tags", "lat_lon"})
+
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
+        self.stats = get_stats_counter(crawler)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
         return cls(crawler)
 
     def process_item(self, item: Feature):
-        if categories := get_category_tags(item):
+        return self.process_item_with_context(item, ItemContext(item))
+
+    def process_item_with_context(self, item: Feature, context: ItemContext) -> Feature:
+        if categories := context.get_category_tags():
             for k, v in sorted(categories.items()):
-                self.crawler.stats.inc_value("atp/category/%s/%s" % (k, v))  # ty: ignore[unresolved-attribute]
+                self.stats.inc_value("atp/category/%s/%s" % (k, v))  # ty: ignore[unresolved-attribute]
                 break
             if len(categories) > 1:
-                self.crawler.stats.inc_value("atp/category/multiple")  # ty: ignore[unresolved-attribute]
+                self.stats.inc_value("atp/category/multiple")  # ty: ignore[unresolved-attribute]
         else:
-            self.crawler.stats.inc_value("atp/category/missing")  # ty: ignore[unresolved-attribute]
+            self.stats.inc_value("atp/category/missing")  # ty: ignore[unresolved-attribute]
         return item
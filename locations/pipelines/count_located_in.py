@@ -1,5 +1,6 @@
 from scrapy.crawler import Crawler
 
+from locations.extensions.batch_stats import get_stats_counter
 from locations.items import Feature
 
 
@@ -8,15 +9,16 @@ class CountLocatedInPipeline:
 
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
+        self.stats = get_stats_counter(crawler)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
         return cls(crawler)
 
     def process_item(self, item: Feature):
-        if self.crawler.stats:
+        if self.stats:
             if located_in := item.get("located_in"):
-                self.crawler.stats.inc_value(f"atp/located_in/{located_in}")
+                self.stats.inc_value(f"atp/located_in/{located_in}")
             if wikidata := item.get("located_in_wikidata"):
-                self.crawler.stats.inc_value(f"atp/located_in_wikidata/{wikidata}")
+                self.stats.inc_value(f"atp/located_in_wikidata/{wikidata}")
         return item
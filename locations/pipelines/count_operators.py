@@ -1,5 +1,6 @@
 from scrapy.crawler import Crawler
 
+from locations.extensions.batch_stats import get_stats_counter
 from locations.items import Feature
 
 
@@ -8,6 +9,7 @@ class CountOperatorsPipeline:
 
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
+        self.stats = get_stats_counter(crawler)
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
@@ -15,7 +17,7 @@ class CountOperatorsPipeline:
 
     def process_item(self, item: Feature):
         if operator := item.get("operator"):
-            self.crawler.stats.inc_value(f"atp/operator/{operator}")  # ty: ignore[unresolved-attribute]
+            self.stats.inc_value(f"atp/operator/{operator}")  # ty: ignore[unresolved-attribute]
         if wikidata := item.get("operator_wikidata"):
-            self.crawler.stats.inc_value(f"atp/operator_wikidata/{wikidata}")  # ty: ignore[unresolved-attribute]
+            self.stats.inc_value(f"atp/operator_wikidata/{wikidata}")  # ty: ignore[unresolved-attribute]
         return item
@@ -1,50 +1,91 @@
-import reverse_geocoder
+from typing import Any, Callable, Mapping
+
+from scrapy import Spider
 from scrapy.crawler import Crawler
 
 from locations.country_utils import CountryUtils
-from locations.items import Feature, get_lat_lon
+from locations.items import Feature
+from locations.pipelines.fused import ItemContext
+from locations.reverse_geocoding import reverse_geocode
+
+
+class CountryResolver:
+    """
+    How CountryCodeCleanUpPipeline finds the country of the items of a
+    spider, following the skip_auto_cc* attributes of the spider, which are
+    looked up once.
+    """
+
+    def __init__(self, country_utils: CountryUtils, spider: Spider):
+        self.country_utils = country_utils
+        self.skip_auto_cc = getattr(spider, "skip_auto_cc", False)
+        self.spider_name_country = None
+        if not getattr(spider, "skip_auto_cc_spider_name", False):
+            self.spider_name_country = country_utils.country_code_from_spider_name(spider.name)
+        self.skip_auto_cc_domain = getattr(spider, "skip_auto_cc_domain", False)
+        self.skip_auto_cc_geocoder = getattr(spider, "skip_auto_cc_geocoder", False)
+
+    def resolve(self, item: Mapping[str, Any]) -> tuple[str | None, str | None]:
+        """
+        :return: the clean country of the item and where it was found
+                 ("item", "spider_name" or "website_url"), or None and
+                 "reverse_geocoding" if the country is to be reverse geocoded
+                 from the coordinates of the item, or None and None
+        """
+        if country := item.get("country"):
+            if clean_country := self.country_utils.to_iso_alpha2_country_code(country):
+                return clean_country, "item"
+
+        if self.skip_auto_cc:
+            return None, None
+
+        # No country set, see if it can be cleanly deduced from the spider name
+        if self.spider_name_country:
+            return self.spider_name_country, "spider_name"
+
+        if not self.skip_auto_cc_domain:
+            # Still no country set, see if it can be cleanly deduced from a website URL if present
+            if country := self.country_utils.country_code_from_url(item.get("website")):
+                return country, "website_url"
+
+        if not self.skip_auto_cc_geocoder:
+            # Still no country set, try an offline reverse geocoder.
+            return None, "reverse_geocoding"
+
+        return None, None
 
 
 class CountryCodeCleanUpPipeline:
     crawler: Crawler
 
+    context_preserved = frozenset({"lat_lon"})
+
     def __init__(self, crawler: Crawler):
         self.crawler = crawler
         self.country_utils = CountryUtils()
+        self.country_resolver: CountryResolver | None = None
 
     @classmethod
     def from_crawler(cls, crawler: Crawler):
         return cls(crawler)
 
     def process_item(self, item: Feature):
-        if country := item.get("country"):
-            if clean_country := self.country_utils.to_iso_alpha2_country_code(country):
-                item["country"] = clean_country
-                return item
-
-        if getattr(self.crawler.spider, "skip_auto_cc", False):
-            return item
-
-        if not getattr(self.crawler.spider, "skip_auto_cc_spider_name", False):
-            # No country set, see if it can be cleanly deduced from the spider name
-            if country := self.country_utils.country_code_from_spider_name(
-                self.crawler.spider.name  # ty: ignore[unresolved-attribute]
-            ):
-                self.crawler.stats.inc_value("atp/field/country/from_spider_name")  # ty: ignore[unresolved-attribute]
-                item["country"] = country
-                return item
-
-        if not getattr(self.crawler.spider, "skip_auto_cc_domain", False):
-            # Still no country set, see if it can be cleanly deduced from a website URL if present
-            if country := self.country_utils.country_code_from_url(item.get("website")):
-                self.crawler.stats.inc_value("atp/field/country/from_website_url")  # ty: ignore[unresolved-attribute]
-                item["country"] = country
-                return item
+        return self.process_item_with_context(item, ItemContext(item))
 
-        if not getattr(self.crawler.spider, "skip_auto_cc_geocoder", False):
-            # Still no country set, try an offline reverse geocoder.
-            if location := get_lat_lon(item):
-                if result := reverse_geocoder.get((location[0], location[1]), mode=1, verbose=False):
+    def get_fused_step(self, spider: Spider) -> Callable[[Feature, ItemContext], Feature]:
+        self.country_resolver = CountryResolver(self.country_utils, spider)
+        return self.process_item_with_context
+
+    def process_item_with_context(self, item: Feature, context: ItemContext) -> Feature:
+        if self.country_resolver is None:
+            assert self.crawler.spider is not None
+            self.country_resolver = CountryResolver(self.country_utils, self.crawler.spider)
+        country, source = self.country_resolver.resolve(item)
+        if source == "item":
+            item["country"] = country
+        elif source == "reverse_geocoding":
+            if location := context.get_lat_lon():
+                if result := reverse_geocode(location[0], location[1]):
                     self.crawler.stats.inc_value(  # ty: ignore[unresolved-attribute]
                         "atp/field/country/from_reverse_geocoding"
                     )
@@ -52,7 +93,8 @@ class CountryCodeCleanUpPipeline:
 
                     if not item.get("state"):
                         item["state"] = result.get("admin1")
-
-                    return item
+        elif source:
+            self.crawler.stats.inc_value(f"atp/field/country/from_{source}")  # ty: ignore[unresolved-attribute]
+            item["country"] = country
 
         return item
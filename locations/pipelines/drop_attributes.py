@@ -1,6 +1,10 @@
+from typing import Callable
+
+from scrapy import Spider
 from scrapy.crawler import Crawler
 
 from locations.items import Feature
+from locations.pipelines.fused import ItemContext
 
 
 class DropAttributesPipeline:
@@ -16,8 +20,17 @@ class DropAttributesPipeline:
     def process_item(self, item: Feature):
         if not hasattr(self.crawler.spider, "drop_attributes"):
             return item
+        return self.drop_attributes(item, getattr(self.crawler.spider, "drop_attributes"))
+
+    def get_fused_step(self, spider: Spider) -> Callable[[Feature, ItemContext], Feature] | None:
+        if not hasattr(spider, "drop_attributes"):
+            return None
+        attributes = getattr(spider, "drop_attributes")
+        return lambda item, context: self.drop_attributes(item, attributes)
 
-        for attribute in getattr(self.crawler.spider, "drop_attributes"):
+    @staticmethod
+    def drop_attributes(item: Feature, attributes) -> Feature:
+        for attribute in attributes:
             if attribute in item.fields:
                 item.pop(attribute, None)
             else:
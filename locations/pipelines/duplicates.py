@@ -1,9 +1,12 @@
 import logging
+from typing import Callable
 
+from scrapy import Spider
 from scrapy.crawler import Crawler
 from scrapy.exceptions import DropItem
 
 from locations.items import Feature
+from locations.pipelines.fused import ItemContext
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +25,14 @@ class DuplicatesPipeline:
     def process_item(self, item: Feature) -> Feature:
         if getattr(self.crawler.spider, "no_refs", False):
             return item
+        return self.check_duplicate(item)
 
+    def get_fused_step(self, spider: Spider) -> Callable[[Feature, ItemContext], Feature] | None:
+        if getattr(spider, "no_refs", False):
+            return None
+        return lambda item, context: self.check_duplicate(item)
+
+    def check_duplicate(self, item: Feature) -> Feature:
         ref = (self.crawler.spider.name, item["ref"])  # ty: ignore[unresolved-attribute]
         if ref in self.ids_seen:
             if self.crawler.stats:
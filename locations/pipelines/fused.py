@@ -0,0 +1,142 @@
+from functools import wraps
+from typing import Any, Callable
+
+from scrapy import Spider
+from scrapy.crawler import Crawler
+from scrapy.utils.conf import build_component_list
+from scrapy.utils.misc import build_from_crawler, load_object
+
+from locations.categories import get_category_tags
+from locations.items import Feature, get_lat_lon
+
+
+class ItemContext:
+    """
+    Values derived from an item, computed when first needed so that they are
+    shared by the pipelines processing the item rather than each pipeline
+    deriving them again.
+
+    A FusedItemPipeline forgets derived values after each pipeline, except
+    the values listed in the context_preserved attribute of the pipeline,
+    being values the pipeline does not change the item data of (or updates
+    itself).
+    """
+
+    __slots__ = ("item", "values")
+
+    def __init__(self, item: Feature):
+        self.item = item
+        self.values = {}
+
+    def get_category_tags(self) -> dict:
+        """
+        :return: get_category_tags() of the item
+        """
+        if (tags := self.values.get("category_tags")) is None:
+            tags = self.values["category_tags"] = get_category_tags(self.item)
+        return tags
+
+    def get_lat_lon(self) -> tuple[float, float] | None:
+        """
+        :return: get_lat_lon() of the item
+        """
+        if "lat_lon" not in self.values:
+            self.values["lat_lon"] = get_lat_lon(self.item)
+        return self.values["lat_lon"]
+
+    def forget(self, name: str) -> None:
+        self.values.pop(name, None)
+
+    def retain(self, names: frozenset[str]) -> None:
+        for name in [name for name in self.values if name not in names]:
+            del self.values[name]
+
+
+def get_fused_step(pipeline: Any, spider: Spider) -> Callable[[Feature, ItemContext], Feature] | None:
+    """
+    :return: the step of a FusedItemPipeline running pipeline, or None if the
+             pipeline does nothing for the spider
+    """
+    if hasattr(pipeline, "get_fused_step"):
+        return pipeline.get_fused_step(spider)
+    if hasattr(pipeline, "process_item_with_context"):
+        return pipeline.process_item_with_context
+    process_item = pipeline.process_item
+
+    @wraps(process_item)
+    def step(item: Feature, context: ItemContext) -> Feature:
+        return process_item(item)
+
+    return step
+
+
+class FusedItemPipeline:
+    """
+    Run the item pipelines of the FUSED_ITEM_PIPELINES setting (in the same
+    form as ITEM_PIPELINES) as a single item pipeline, rather than Scrapy
+    calling each pipeline in turn for each item.
+
+    When the spider opens, pipelines which do nothing for the spider are left
+    out, and pipelines look up spider attributes once rather than for each
+    item. A pipeline can:
+      - define get_fused_step(spider), returning the function to call with
+        (item, context) for each item, or None to be left out,
+      - define process_item_with_context(item, context), called instead of
+        process_item(item) to share derived values in an ItemContext,
+      - list the ItemContext values it keeps valid in context_preserved.
+
+    Pipelines disabled in ITEM_PIPELINES (set to None, as spiders do with
+    "ITEM_PIPELINES | {...: None}") are left out, as are pipelines enabled
+    separately in ITEM_PIPELINES. Fused pipelines must process items
+    synchronously.
+    """
+
+    crawler: Crawler
+
+    def __init__(self, crawler: Crawler, pipelines: list):
+        self.crawler = crawler
+        self.pipelines = pipelines
+        # Step of each applicable pipeline, in the form of Scrapy's
+        # MiddlewareManager.methods so that steps can be instrumented in the
+        # same way as pipelines (see PerfStatsExtension).
+        self.methods = {"process_item": []}
+        self.preserved = []
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler):
+        item_pipelines = {
+            load_object(path): order for path, order in crawler.settings.getdict("ITEM_PIPELINES").items()
+        }
+        pipelines = []
+        for path in build_component_list(crawler.settings.getdict("FUSED_ITEM_PIPELINES")):
+            pipeline_class = load_object(path)
+            if pipeline_class not in item_pipelines:
+                pipelines.append(build_from_crawler(pipeline_class, crawler))
+        return cls(crawler, pipelines)
+
+    def open_spider(self) -> None:
+        spider = self.crawler.spider
+        assert spider is not None
+        self.methods["process_item"] = []
+        self.preserved = []
+        for pipeline in self.pipelines:
+            if hasattr(pipeline, "open_spider"):
+                pipeline.open_spider()
+            if step := get_fused_step(pipeline, spider):
+                self.methods["process_item"].append(step)
+                self.preserved.append(getattr(pipeline, "context_preserved", frozenset()))
+
+    def close_spider(self) -> None:
+        for pipeline in reversed(self.pipelines):
+            if hasattr(pipeline, "close_spider"):
+                pipeline.close_spider()
+
+    def process_item(self, item: Feature) -> Feature:
+        context = ItemContext(item)
+        for step, preserved in zip(self.methods["process_item"], self.preserved):
+            item = step(item, context)
+            if item is not context.item:
+                context = ItemContext(item)
+            elif context.values:
+                context.retain(preserved)
+        return item
@@ -3,6 +3,7 @@ from locations.items import Feature
 
 
 class GeoJSONMultiPointSimplificationPipeline:
+    context_preserved = frozenset({"category_tags"})
 
     def process_item(self, item: Feature):
         """
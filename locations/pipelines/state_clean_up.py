@@ -1,8 +1,12 @@
-import reverse_geocoder
+from typing import Any
+
 from geonamescache import GeonamesCache
 from scrapy.crawler import Crawler
 
-from locations.items import Feature, get_lat_lon
+from locations.iso3166 import get_subdivision_code
+from locations.items import Feature
+from locations.pipelines.fused import ItemContext
+from locations.reverse_geocoding import reverse_geocode
 
 US_TERRITORIES = {
     "AS": {"code": "AS", "name": "American Samoa"},
@@ -36,6 +40,10 @@ STATES = {
 
 STATE_OVERRIDES = {"Washington, D.C.": "DC"}
 
+STATE_CODES_BY_NAME = {
+    country: {state["name"]: state["code"] for state in reversed(states.values())} for country, states in STATES.items()
+}
+
 
 class StateCodeCleanUpPipeline:
     crawler: Crawler
@@ -57,12 +65,28 @@ class StateCodeCleanUpPipeline:
 
         if s := STATES[country].get(state):
             return str(s["code"])
-        else:
-            for possible_state in STATES[country].values():
-                if possible_state["name"] == state:
-                    return str(possible_state["code"])
+        if code := STATE_CODES_BY_NAME[country].get(state):
+            return str(code)
+        # Finally compare with ISO 3166-2 codes and names ignoring case and accents.
+        if iso_code := get_subdivision_code(country, state, folded=True):
+            if s := STATES[country].get(iso_code.split("-", 1)[1]):
+                return str(s["code"])
+        return None
+
+    @staticmethod
+    def needs_reverse_geocoding(country: str, state: Any) -> bool:
+        """
+        :param country: clean ISO 3166-1 alpha-2 country code of an item
+        :param state: state of the item
+        :return: whether the state of the item is to be reverse geocoded,
+                 being a US or CA item whose state can't be cleaned
+        """
+        return country in STATES and StateCodeCleanUpPipeline.clean_state(str(state), country) is None
 
     def process_item(self, item: Feature) -> Feature:
+        return self.process_item_with_context(item, ItemContext(item))
+
+    def process_item_with_context(self, item: Feature, context: ItemContext) -> Feature:
         country = item.get("country")
         if not country:
             return item
@@ -70,11 +94,11 @@ class StateCodeCleanUpPipeline:
         if country not in STATES.keys():
             return item
 
-        state = StateCodeCleanUpPipeline.clean_state(str(item.get("state")), str(country))
+        state = item.get("state")
 
-        if not state:  # geocode state
-            if location := get_lat_lon(item):
-                if result := reverse_geocoder.get((location[0], location[1]), mode=1, verbose=False):
+        if StateCodeCleanUpPipeline.needs_reverse_geocoding(str(country), state):  # geocode state
+            if location := context.get_lat_lon():
+                if result := reverse_geocode(location[0], location[1]):
                     if self.crawler.stats:
                         self.crawler.stats.inc_value("atp/field/state/from_reverse_geocoding")
                     state = result["admin1"]
@@ -0,0 +1,82 @@
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+from pyproj import Transformer
+
+# Number of distinct (source, target) CRS pairs to keep a Transformer for.
+TRANSFORMER_CACHE_SIZE = 32
+# Number of points reprojected by memoise_points to keep.
+MAX_CACHE_SIZE = 100_000
+
+_cache: dict[tuple[int | str, float, float, int | str], tuple[float, float]] = {}
+
+
+@lru_cache(maxsize=TRANSFORMER_CACHE_SIZE)
+def get_transformer(source_crs: int | str, target_crs: int | str = 4326) -> Transformer:
+    """
+    Shared Transformer between two coordinate reference systems. Creating a
+    Transformer builds a PROJ pipeline which takes milliseconds, so they are
+    created once per CRS pair and reused.
+
+    As with `Transformer.from_crs`, coordinates are in the axis order of each
+    CRS's authority, so results for EPSG:4326 are (latitude, longitude).
+    :param source_crs: EPSG code or other CRS definition accepted by pyproj
+    :param target_crs: EPSG code or other CRS definition accepted by pyproj
+    :return: Transformer from source_crs to target_crs
+    """
+    return Transformer.from_crs(source_crs, target_crs)
+
+
+def reproject_point(source_crs: int | str, x: float, y: float, target_crs: int | str = 4326) -> tuple[float, float]:
+    """
+    :param source_crs: CRS of the point
+    :param x: first coordinate of the point in source_crs
+    :param y: second coordinate of the point in source_crs
+    :param target_crs: CRS to reproject to, EPSG:4326 by default
+    :return: the point in target_crs, (latitude, longitude) for EPSG:4326
+    """
+    if point := _cache.get((source_crs, x, y, target_crs)):
+        return point
+    return get_transformer(source_crs, target_crs).transform(x, y)
+
+
+def reproject_points(
+    source_crs: int | str,
+    xx: Sequence[float] | np.ndarray,
+    yy: Sequence[float] | np.ndarray,
+    target_crs: int | str = 4326,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reproject many points with a single call into PROJ.
+    :param source_crs: CRS of the points
+    :param xx: first coordinates of the points in source_crs
+    :param yy: second coordinates of the points in source_crs
+    :param target_crs: CRS to reproject to, EPSG:4326 by default
+    :return: arrays of the points' coordinates in target_crs, (latitudes,
+             longitudes) for EPSG:4326
+    """
+    return get_transformer(source_crs, target_crs).transform(
+        np.asarray(xx, dtype=np.float64), np.asarray(yy, dtype=np.float64)
+    )
+
+
+def memoise_points(
+    source_crs: int | str,
+    xx: Sequence[float],
+    yy: Sequence[float],
+    target_crs: int | str = 4326,
+) -> None:
+    """
+    Reproject many points with a single call into PROJ, and memoise them for
+    `reproject_point` to return when later asked for the same points.
+    :param source_crs: CRS of the points
+    :param xx: first coordinates of the points in source_crs
+    :param yy: second coordinates of the points in source_crs
+    :param target_crs: CRS to reproject to, EPSG:4326 by default
+    """
+    if len(_cache) + len(xx) > MAX_CACHE_SIZE:
+        _cache.clear()
+    lats, lons = reproject_points(source_crs, xx, yy, target_crs)
+    for x, y, lat, lon in zip(xx, yy, lats.tolist(), lons.tolist()):
+        _cache[(source_crs, x, y, target_crs)] = (lat, lon)
@@ -0,0 +1,56 @@
+from typing import Iterable
+
+import numpy as np
+import reverse_geocoder
+
+# Coordinates are rounded to this many decimal places (about 0.1m) before
+# lookup, so that repeated lookups of the same location share one result.
+COORDINATE_PRECISION = 6
+# The cache is emptied once it grows past this many coordinates.
+MAX_CACHE_SIZE = 500_000
+
+_cache: dict[tuple[float, float], dict] = {}
+
+
+def _key(lat: float, lon: float) -> tuple[float, float]:
+    return round(lat, COORDINATE_PRECISION), round(lon, COORDINATE_PRECISION)
+
+
+def _query(keys: list[tuple[float, float]]) -> None:
+    if len(_cache) + len(keys) > MAX_CACHE_SIZE:
+        _cache.clear()
+    geocoder = reverse_geocoder.RGeocoder(mode=1, verbose=False)
+    _, indices = geocoder.tree.query(np.array(keys, dtype=np.float64), k=1)
+    for key, index in zip(keys, np.atleast_1d(indices)):
+        _cache[key] = geocoder.locations[index]
+
+
+def reverse_geocode(lat: float, lon: float) -> dict:
+    """
+    Find the nearest populated place to a coordinate with the offline
+    reverse_geocoder dataset. Results are memoised, and are shared by every
+    caller in this process, see `reverse_geocode_batch` to resolve many
+    coordinates at once.
+    :param lat: latitude
+    :param lon: longitude
+    :return: reverse_geocoder location with "cc", "admin1", "admin2" and
+             "name" keys
+    """
+    key = _key(lat, lon)
+    if key not in _cache:
+        _query([key])
+    return _cache[key]
+
+
+def reverse_geocode_batch(coordinates: Iterable[tuple[float, float]]) -> list[dict]:
+    """
+    Reverse geocode many coordinates with a single vectorised KD-tree query
+    for all coordinates not already memoised.
+    :param coordinates: (latitude, longitude) tuples
+    :return: reverse_geocoder locations in the same order as coordinates
+    """
+    keys = [_key(lat, lon) for lat, lon in coordinates]
+    if missing := list(dict.fromkeys(key for key in keys if key not in _cache)):
+        _query(missing)
+    # The cache may have been emptied part way through a large batch.
+    return [_cache[key] if key in _cache else reverse_geocode(*key) for key in keys]
@@ -0,0 +1,209 @@
+import math
+from typing import Any, Iterable, NamedTuple
+
+from locations.geo import bbox_split, haversine_distance, vincenty_distance
+
+# Circles are subdivided into circles slightly larger than strictly needed to
+# cover them, to allow for APIs rounding coordinates and distances.
+CIRCLE_OVERLAP = 1.05
+# Size in degrees of the grid cells that covered circles are indexed by.
+COVERAGE_GRID_SIZE = 1.0
+# Approximate length of a degree of latitude in kilometres.
+KILOMETRES_PER_DEGREE = 111.2
+
+
+class SearchCircle(NamedTuple):
+    lat: float
+    lon: float
+    # Radius in kilometres.
+    radius: float
+    # Number of subdivisions made from the initial search grid.
+    depth: int = 0
+
+
+class SearchBox(NamedTuple):
+    # Northwest and Southeast (lat, lon) coordinates, as for bbox_split.
+    bbox: tuple[tuple[float, float], tuple[float, float]]
+    # Number of subdivisions made from the initial search grid.
+    depth: int = 0
+
+
+def subdivide_circle(circle: SearchCircle) -> list[SearchCircle]:
+    """
+    Cover a circle with seven circles of half its radius, one at its centre
+    and six evenly spaced around it.
+    :param circle: circle to subdivide
+    :return: list of seven smaller circles covering circle
+    """
+    radius = circle.radius / 2 * CIRCLE_OVERLAP
+    children = [SearchCircle(circle.lat, circle.lon, radius, circle.depth + 1)]
+    for bearing in range(0, 360, 60):
+        lat, lon = vincenty_distance(circle.lat, circle.lon, circle.radius * math.sqrt(3) / 2, bearing)
+        children.append(SearchCircle(lat, (lon + 180.0) % 360.0 - 180.0, radius, circle.depth + 1))
+    return children
+
+
+def subdivide_box(box: SearchBox) -> list[SearchBox]:
+    """
+    Split a bounding box into four slightly overlapping quarters.
+    :param box: bounding box to subdivide
+    :return: list of four smaller bounding boxes covering box
+    """
+    return [SearchBox(bbox, box.depth + 1) for bbox in bbox_split(box.bbox, precision=6)]
+
+
+class SearchPlanner:
+    """
+    Plan the geographic searches of an API which returns at most max_results
+    features for a search of a circle (radius search) or bounding box.
+
+    Start with a coarse grid of searches, and pass the number of features
+    each search returned to refine(). A search which returned max_results
+    features was probably truncated, so refine() returns smaller searches
+    covering the same area which still need to be made. Searches are only
+    refined in dense areas, rather than every area being searched with a
+    grid fine enough for the densest.
+
+    Circles which lie within circles already completely searched are not
+    searched again. If the API returns features nearest first, a truncated
+    search also completely covers the circle out to its furthest feature.
+
+    Features found by overlapping searches can be deduplicated by ref with
+    is_new().
+    """
+
+    def __init__(self, max_results: int, min_radius: float = 1.0, max_depth: int = 8, nearest_first: bool = False):
+        """
+        :param max_results: number of features at which the API truncates
+                            responses
+        :param min_radius: smallest radius in kilometres to search with
+        :param max_depth: maximum number of times to subdivide a search of
+                          the initial grid
+        :param nearest_first: whether the API returns features ordered by
+                              distance from the centre of a radius search
+        """
+        self.max_results = max_results
+        self.min_radius = min_radius
+        self.max_depth = max_depth
+        self.nearest_first = nearest_first
+        # Circles known to be completely searched, as (lat, lon, radius),
+        # keyed by each grid cell they overlap.
+        self.coverage: dict[tuple[int, int], list[tuple[float, float, float]]] = {}
+        self.seen_refs: set = set()
+
+    def is_saturated(self, result_count: int) -> bool:
+        """
+        :param result_count: number of features returned by a search
+        :return: True if the search was probably truncated
+        """
+        return result_count >= self.max_results
+
+    def can_subdivide(self, area: SearchCircle | SearchBox) -> bool:
+        """
+        :param area: circle or bounding box searched
+        :return: True if area is not too small to be subdivided
+        """
+        if area.depth >= self.max_depth:
+            return False
+        if isinstance(area, SearchCircle):
+            return area.radius / 2 >= self.min_radius
+        return True
+
+    def refine(
+        self, area: SearchCircle | SearchBox, result_count: int, locations: Iterable[tuple[float, float]] = ()
+    ) -> list[SearchCircle] | list[SearchBox]:
+        """
+        Record the result of a search, and plan any further searches needed
+        to completely search its area. See refine_circle() and refine_box().
+        :param area: circle or bounding box searched
+        :param result_count: number of features returned
+        :param locations: (lat, lon) of the features returned, used to find
+                          the area covered by truncated nearest first
+                          searches
+        :return: circles or bounding boxes to search, empty if area has been
+                 completely searched or cannot be subdivided further
+        """
+        if isinstance(area, SearchBox):
+            return self.refine_box(area, result_count)
+        return self.refine_circle(area, result_count, locations)
+
+    def refine_circle(
+        self, circle: SearchCircle, result_count: int, locations: Iterable[tuple[float, float]] = ()
+    ) -> list[SearchCircle]:
+        """
+        Record the result of a radius search, and plan any further radius
+        searches needed to completely search its circle.
+        :param circle: circle searched
+        :param result_count: number of features returned
+        :param locations: (lat, lon) of the features returned, used to find
+                          the area covered by truncated nearest first
+                          searches
+        :return: circles to search, empty if circle has been completely
+                 searched or cannot be subdivided further
+        """
+        if not self.is_saturated(result_count):
+            self.add_coverage(circle.lat, circle.lon, circle.radius)
+            return []
+        if self.nearest_first:
+            distances = [haversine_distance(circle.lat, circle.lon, lat, lon) for lat, lon in locations]
+            if distances:
+                self.add_coverage(circle.lat, circle.lon, min(max(distances), circle.radius))
+        if not self.can_subdivide(circle):
+            return []
+        return [child for child in subdivide_circle(circle) if not self.is_covered(child)]
+
+    def refine_box(self, box: SearchBox, result_count: int) -> list[SearchBox]:
+        """
+        Record the result of a bounding box search, and plan any further
+        bounding box searches needed to completely search it.
+        :param box: bounding box searched
+        :param result_count: number of features returned
+        :return: bounding boxes to search, empty if box has been completely
+                 searched or cannot be subdivided further
+        """
+        if not self.is_saturated(result_count) or not self.can_subdivide(box):
+            return []
+        return subdivide_box(box)
+
+    def is_new(self, ref: Any) -> bool:
+        """
+        :param ref: ref of a feature returned by a search
+        :return: False if a feature with the same ref has already been seen
+        """
+        if ref is None:
+            return True
+        if ref in self.seen_refs:
+            return False
+        self.seen_refs.add(ref)
+        return True
+
+    def grid_cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / COVERAGE_GRID_SIZE), math.floor(((lon + 180.0) % 360.0) / COVERAGE_GRID_SIZE)
+
+    def add_coverage(self, lat: float, lon: float, radius: float) -> None:
+        """
+        Record that a circle has been completely searched.
+        """
+        lat_span = radius / KILOMETRES_PER_DEGREE
+        cos_lat = min(math.cos(math.radians(min(abs(lat) + lat_span, 90.0))), 1.0)
+        lon_span = lat_span / cos_lat if cos_lat > 0 else 180.0
+        lat_min, lon_min = self.grid_cell(lat - lat_span, lon - min(lon_span, 180.0))
+        lat_max, lon_max = self.grid_cell(lat + lat_span, lon + min(lon_span, 180.0))
+        lon_cells = round(360.0 / COVERAGE_GRID_SIZE)
+        if lon_span >= 180.0:
+            lon_range = range(lon_cells)
+        else:
+            lon_range = [i % lon_cells for i in range(lon_min, lon_max + (lon_cells if lon_max < lon_min else 0) + 1)]
+        for i in range(lat_min, lat_max + 1):
+            for j in lon_range:
+                self.coverage.setdefault((i, j), []).append((lat, lon, radius))
+
+    def is_covered(self, circle: SearchCircle) -> bool:
+        """
+        :return: True if circle lies within a circle which has been
+                 completely searched
+        """
+        for lat, lon, radius in self.coverage.get(self.grid_cell(circle.lat, circle.lon), []):
+            if haversine_distance(lat, lon, circle.lat, circle.lon) + circle.radius < radius:
+                return True
+        return False
@@ -7,3 +7,12 @@ def open_searchable_points(filename):
 
 def get_searchable_points_path(filename):
     return f"{os.path.dirname(os.path.realpath(__file__))}/{filename}"
+
+
+def get_cache_dir(name: str) -> str:
+    """
+    Directory in which data derived from searchable points files is cached,
+    under $XDG_CACHE_HOME (or ~/.cache) /alltheplaces.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "alltheplaces", name)
@@ -0,0 +1,299 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import cache
+from typing import Iterable, Iterator
+
+import numpy as np
+import shapely
+
+from locations.searchable_points import get_cache_dir, get_searchable_points_path, open_searchable_points
+
+# Environment variable to override the directory the packed store is cached in.
+STORE_DIR_ENV = "SEARCHABLE_POINTS_STORE_DIR"
+# Version of the packed store format, part of the fingerprint of a store.
+STORE_VERSION = 2
+# Columns of a searchable points file naming the area a point is in, in
+# order of preference.
+AREA_FIELDS = ["country", "territory", "state"]
+
+
+class SearchablePoints:
+    """
+    WGS84 points of a searchable points file, held as read-only NumPy arrays
+    which are views of the packed store where possible.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def __iter__(self) -> Iterator[tuple[float, float]]:
+        return zip(self.latitudes.tolist(), self.longitudes.tolist())
+
+    def __getitem__(self, key) -> "SearchablePoints":
+        return SearchablePoints(self.latitudes[key], self.longitudes[key])
+
+    def within_bbox(self, bounds: tuple[float, float, float, float]) -> "SearchablePoints":
+        """
+        :param bounds: (xmin, ymin, xmax, ymax) lon/lat bounding box, as for
+                       bbox_contains
+        :return: points within the bounding box, including its edges
+        """
+        xmin, ymin, xmax, ymax = bounds
+        return self[
+            (self.longitudes >= xmin) & (self.longitudes <= xmax) & (self.latitudes >= ymin) & (self.latitudes <= ymax)
+        ]
+
+    def within_polygon(self, polygon: shapely.Geometry | dict) -> "SearchablePoints":
+        """
+        :param polygon: shapely geometry or GeoJSON geometry dictionary, in
+                        lon/lat coordinates
+        :return: points within or on the boundary of the polygon
+        """
+        if isinstance(polygon, dict):
+            polygon = shapely.geometry.shape(polygon)
+        return self[shapely.intersects_xy(polygon, self.longitudes, self.latitudes)]
+
+    def within_country(self, country_code: str) -> "SearchablePoints":
+        """
+        :param country_code: ISO 3166-1 alpha-2 country code
+        :return: points whose nearest populated place, per the offline
+                 reverse geocoder, is in the country
+        """
+        from locations.reverse_geocoding import reverse_geocode_batch
+
+        results = reverse_geocode_batch(list(self))
+        return self[np.array([result["cc"] == country_code.upper() for result in results], dtype=bool)]
+
+
+def read_points_csv(csv_file: str) -> tuple[list[float], list[float], list[str | None]]:
+    """
+    Parse a searchable points CSV file.
+    :param csv_file: path of the file relative to locations/searchable_points
+    :return: latitudes, longitudes and areas (or None) of the points in the
+             file, in file order
+    """
+    latitudes, longitudes, areas = [], [], []
+    with open_searchable_points(csv_file) as file:
+        for row in csv.DictReader(file):
+            try:
+                lat, lon = float(row["latitude"]), float(row["longitude"])
+            except ValueError:
+                raise Exception(
+                    "Invalid latitude/longitude in searchable points file {} where latitude = {} and longitude = {}.".format(
+                        csv_file, row["latitude"], row["longitude"]
+                    )
+                )
+            latitudes.append(lat)
+            longitudes.append(lon)
+            areas.append(next((row[key] for key in AREA_FIELDS if row.get(key)), None))
+    return latitudes, longitudes, areas
+
+
+def fingerprint(files: list[str]) -> str:
+    digest = hashlib.sha1(str(STORE_VERSION).encode())
+    for file in files:
+        stat = os.stat(get_searchable_points_path(file))
+        digest.update(f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return digest.hexdigest()
+
+
+def get_store_dir() -> str:
+    return os.environ.get(STORE_DIR_ENV) or get_cache_dir("searchable_points")
+
+
+class SearchablePointsStore:
+    """
+    Searchable points files packed into NumPy arrays of latitudes and
+    longitudes, ordered by file then by area within each file. Each file, and
+    each area within a file, is a contiguous range of the arrays, so points
+    of a file or area are views of the arrays rather than copies.
+
+    The original order of points within a file is kept in the row array.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, rows: np.ndarray, index: dict):
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.rows = rows
+        # Per file, the [start, end) range of its points, and the ranges of
+        # each area within it, or None if the file has no area column.
+        self.index = index
+
+    @classmethod
+    def build(cls, files: Iterable[str]) -> "SearchablePointsStore":
+        """
+        Pack searchable points files into a store.
+        :param files: paths relative to locations/searchable_points
+        """
+        latitudes, longitudes, rows = [], [], []
+        index = {}
+        offset = 0
+        for file in files:
+            file_latitudes, file_longitudes, file_areas = read_points_csv(file)
+            # Stable sort by area, keeping file order within each area.
+            order = sorted(range(len(file_areas)), key=lambda i: file_areas[i] or "")
+            latitudes.extend(file_latitudes[i] for i in order)
+            longitudes.extend(file_longitudes[i] for i in order)
+            rows.extend(order)
+            areas = None
+            if any(file_areas):
+                areas = {}
+                for position, i in enumerate(order, offset):
+                    area = file_areas[i] or ""
+                    areas.setdefault(area, [position, position])[1] = position + 1
+            index[file] = {"start": offset, "end": offset + len(order), "areas": areas}
+            offset += len(order)
+        return cls(
+            np.array(latitudes, dtype=np.float64),
+            np.array(longitudes, dtype=np.float64),
+            np.array(rows, dtype=np.int32),
+            index,
+        )
+
+    def save(self, path: str, store_fingerprint: str) -> None:
+        """
+        Save the store as a directory of NumPy arrays and a JSON index. The
+        directory is replaced atomically.
+        """
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=parent)
+        try:
+            np.save(os.path.join(temporary, "latitudes.npy"), self.latitudes)
+            np.save(os.path.join(temporary, "longitudes.npy"), self.longitudes)
+            np.save(os.path.join(temporary, "rows.npy"), self.rows)
+            with open(os.path.join(temporary, "index.json"), "w") as file:
+                json.dump({"fingerprint": store_fingerprint, "files": self.index}, file)
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(temporary, path)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, path: str, store_fingerprint: str) -> "SearchablePointsStore | None":
+        """
+        Load a saved store, with its arrays memory mapped.
+        :return: the store, or None if it is missing or out of date
+        """
+        try:
+            with open(os.path.join(path, "index.json")) as file:
+                index = json.load(file)
+            if index.get("fingerprint") != store_fingerprint:
+                return None
+            return cls(
+                np.load(os.path.join(path, "latitudes.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, "longitudes.npy"), mmap_mode="r"),
+                np.load(os.path.join(path, "rows.npy"), mmap_mode="r"),
+                index["files"],
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get_file_index(self, csv_file: str) -> dict:
+        file_index = self.index.get(os.path.normpath(csv_file).replace(os.sep, "/"))
+        if file_index is None:
+            raise FileNotFoundError(get_searchable_points_path(csv_file))
+        return file_index
+
+    def get_areas(self, csv_file: str) -> list[str] | None:
+        """
+        :return: area codes of the points of a file, or None if the file has
+                 no area column
+        """
+        areas = self.get_file_index(csv_file)["areas"]
+        return None if areas is None else [area for area in areas if area]
+
+    def get_points(self, csv_file: str, areas: list[str] | None = None) -> SearchablePoints:
+        """
+        :param csv_file: path relative to locations/searchable_points
+        :param areas: optional area codes to filter points on
+        :return: points of the file (in file order), or of the listed areas
+                 of the file. Points of a single area or of a file with no
+                 area column are views of the store, not copies.
+        """
+        file_index = self.get_file_index(csv_file)
+        if not areas:
+            ranges = [(file_index["start"], file_index["end"])]
+        elif file_index["areas"] is None or "" in file_index["areas"]:
+            raise Exception(
+                "Searchable points file {} does not support area field filters (columns named 'country', 'territory' and 'state').".format(
+                    csv_file
+                )
+            )
+        else:
+            ranges = sorted(tuple(file_index["areas"][area]) for area in set(areas) if area in file_index["areas"])
+
+        if len(ranges) == 1 and (areas or file_index["areas"] is None or len(file_index["areas"]) == 1):
+            # Already in file order.
+            start, end = ranges[0]
+            return SearchablePoints(self.latitudes[start:end], self.longitudes[start:end])
+
+        positions = np.concatenate([np.arange(start, end) for start, end in ranges] or [np.arange(0)])
+        positions = positions[np.argsort(self.rows[positions], kind="stable")]
+        return SearchablePoints(self.latitudes[positions], self.longitudes[positions])
+
+
+class SearchablePointsFiles:
+    """
+    Searchable points files, each packed into its own SearchablePointsStore
+    the first time it is used and cached on disk (see get_store_dir), so that
+    only the files a spider uses are ever parsed, once per environment. A
+    file's store is rebuilt if the file has changed since it was packed.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: directory the stores of files are cached in
+        """
+        self.path = path
+        self.stores = {}
+
+    def get_store(self, csv_file: str) -> SearchablePointsStore:
+        """
+        :param csv_file: path relative to locations/searchable_points
+        :return: the store of the file, loaded once per process
+        """
+        csv_file = os.path.normpath(csv_file).replace(os.sep, "/")
+        if (store := self.stores.get(csv_file)) is None:
+            store_fingerprint = fingerprint([csv_file])
+            path = os.path.join(self.path, csv_file)
+            if (store := SearchablePointsStore.load(path, store_fingerprint)) is None:
+                store = SearchablePointsStore.build([csv_file])
+                try:
+                    store.save(path, store_fingerprint)
+                except OSError:
+                    # Not cached on disk (or cached by another process at
+                    # the same time), but still usable by this process.
+                    pass
+            self.stores[csv_file] = store
+        return store
+
+    def get_areas(self, csv_file: str) -> list[str] | None:
+        """
+        See SearchablePointsStore.get_areas.
+        """
+        return self.get_store(csv_file).get_areas(csv_file)
+
+    def get_points(self, csv_file: str, areas: list[str] | None = None) -> SearchablePoints:
+        """
+        See SearchablePointsStore.get_points.
+        """
+        return self.get_store(csv_file).get_points(csv_file, areas)
+
+
+@cache
+def get_searchable_points_store() -> SearchablePointsFiles:
+    """
+    :return: the searchable points files, packed into stores as they are
+             used, shared by every caller in this process
+    """
+    return SearchablePointsFiles(get_store_dir())
@@ -0,0 +1,225 @@
+import csv
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from bisect import bisect_right
+from functools import cache
+from io import TextIOWrapper
+from typing import Any, Callable, Iterator
+
+import geonamescache
+import numpy as np
+
+from locations.searchable_points import get_cache_dir, get_searchable_points_path
+
+# Version of the cached table format, part of the fingerprint of a table.
+TABLES_VERSION = 1
+# Population of postal regions whose population is unknown, which are never
+# filtered out by a minimum population.
+UNKNOWN_POPULATION = np.iinfo(np.int64).max
+
+
+def load_columns(name: str, source_file: str, build: Callable[[], dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    """
+    Load a table of NumPy columns derived from a searchable points file,
+    building it (and caching it on disk, see get_cache_dir) if the file has
+    changed since the table was last built.
+    :param name: name of the table
+    :param source_file: path relative to locations/searchable_points of the
+                        file the table is built from
+    :param build: function building the columns of the table
+    """
+    stat = os.stat(get_searchable_points_path(source_file))
+    fingerprint = hashlib.sha1(
+        f"{TABLES_VERSION}\0{source_file}\0{stat.st_size}\0{stat.st_mtime_ns}".encode()
+    ).hexdigest()
+    path = os.path.join(get_cache_dir("tables"), f"{name}.npz")
+    try:
+        with np.load(path, allow_pickle=False) as table:
+            if str(table["fingerprint"]) == fingerprint:
+                return {column: table[column] for column in table.files if column != "fingerprint"}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    columns = build()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Values typed as Any, as unpacked arrays could otherwise be savez's allow_pickle.
+        arrays: dict[str, Any] = {"fingerprint": np.array(fingerprint), **columns}
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".npz", delete=False) as file:
+            np.savez(file, **arrays)
+        os.replace(file.name, path)
+    except OSError:
+        # Not cached on disk, but still usable by this process.
+        pass
+    return columns
+
+
+class PostalRegionTable:
+    """
+    Postal regions of a country held as NumPy columns in file order.
+
+    Rows are also indexed in order of population, so that rows with at least
+    a minimum population are a slice of the index. Rows consolidated by city
+    are precomputed as the rows of each city, in city order, ordered by
+    preference so that the consolidated row of a city is the first row of
+    the city with at least the minimum population.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], fields: dict[str, str]):
+        """
+        :param columns: columns of the table
+        :param fields: postal region fields to the columns they are read from
+        """
+        self.columns = columns
+        self.fields = fields
+
+    def select(self, min_population: int = 0, consolidate_cities: bool = False) -> np.ndarray:
+        """
+        :return: rows of postal regions above a minimum population, or the
+                 consolidated row of each city, if the table supports it
+        """
+        if consolidate_cities and "city_rows" in self.columns:
+            rows = self.columns["city_rows"]
+            groups = self.columns["city_groups"]
+            if min_population:
+                selected = self.columns["population"][rows] >= min_population
+                rows, groups = rows[selected], groups[selected]
+            return rows[np.concatenate(([True], groups[1:] != groups[:-1]))] if len(rows) else rows
+        if min_population and "population_rows" in self.columns:
+            count = np.searchsorted(-self.columns["population_sorted"], -min_population, side="right")
+            return np.sort(self.columns["population_rows"][:count])
+        return np.arange(len(next(iter(self.columns.values()))))
+
+    def column_values(self, column: str, rows: np.ndarray) -> list:
+        values = self.columns[column][rows].tolist()
+        if (missing := self.columns.get(f"{column}_missing")) is not None:
+            values = [None if is_missing else value for value, is_missing in zip(values, missing[rows].tolist())]
+        return values
+
+    def records(self, rows: np.ndarray) -> Iterator[dict]:
+        values = [self.column_values(column, rows) for column in self.fields.values()]
+        for record in zip(*values):
+            yield dict(zip(self.fields.keys(), record))
+
+
+def read_postcodes_csv(csv_file: str) -> list[dict]:
+    with gzip.open(get_searchable_points_path(csv_file), mode="rb") as points:
+        return list(csv.DictReader(TextIOWrapper(points)))
+
+
+def string_columns(rows: list[dict], keys: list[str]) -> dict[str, np.ndarray]:
+    """
+    :return: columns of text values of rows, with a "{key}_missing" column
+             for columns which have values missing (None), such as from
+             short CSV rows
+    """
+    columns = {}
+    for key in keys:
+        values = [row[key] for row in rows]
+        columns[key] = np.array(["" if value is None else value for value in values], dtype=str)
+        if None in values:
+            columns[f"{key}_missing"] = np.array([value is None for value in values], dtype=bool)
+    return columns
+
+
+def build_gb_columns() -> dict[str, np.ndarray]:
+    with gzip.open(get_searchable_points_path("postcodes/outward_gb.json.gz"), mode="rb") as points:
+        rows = json.load(TextIOWrapper(points))
+    return string_columns(rows, ["postcode", "town", "country_string", "latitude", "longitude"])
+
+
+def build_us_columns() -> dict[str, np.ndarray]:
+    rows = read_postcodes_csv("postcodes/uszips.csv.gz")
+    columns = string_columns(rows, ["zip", "city", "state_id", "lat", "lng"])
+    population = np.array(
+        [int(row["population"]) if row["population"].isnumeric() else UNKNOWN_POPULATION for row in rows],
+        dtype=np.int64,
+    )
+    population_rows = np.argsort(-population, kind="stable")
+
+    # Cities in order of (state, county, city), and the rows of each city
+    # ordered by population (compared as text) then file order.
+    cities = np.array([f"{row['state_name']}\0{row['county_name']}\0{row['city']}" for row in rows], dtype=str)
+    _, city_ids = np.unique(cities, return_inverse=True)
+    _, population_ranks = np.unique(np.array([row["population"] for row in rows], dtype=str), return_inverse=True)
+    city_rows = np.lexsort((np.arange(len(rows)), -population_ranks, city_ids))
+
+    return columns | {
+        "population": population,
+        "population_rows": population_rows,
+        "population_sorted": population[population_rows],
+        "city_rows": city_rows,
+        "city_groups": city_ids[city_rows],
+    }
+
+
+def build_fr_columns() -> dict[str, np.ndarray]:
+    return string_columns(read_postcodes_csv("postcodes/frzips.csv.gz"), ["Code_postal", "lat", "lng"])
+
+
+@cache
+def get_postal_region_table(country_code: str) -> PostalRegionTable | None:
+    """
+    :param country_code: ISO 3166-1 alpha-2 country code
+    :return: postal regions of the country, loaded once per process, or None
+             if the country is not supported
+    """
+    if country_code == "GB":
+        return PostalRegionTable(
+            load_columns("outward_gb", "postcodes/outward_gb.json.gz", build_gb_columns),
+            {
+                "postal_region": "postcode",
+                "city": "town",
+                "state": "country_string",
+                "latitude": "latitude",
+                "longitude": "longitude",
+            },
+        )
+    elif country_code == "US":
+        return PostalRegionTable(
+            load_columns("uszips", "postcodes/uszips.csv.gz", build_us_columns),
+            {"postal_region": "zip", "city": "city", "state": "state_id", "latitude": "lat", "longitude": "lng"},
+        )
+    elif country_code == "FR":
+        return PostalRegionTable(
+            load_columns("frzips", "postcodes/frzips.csv.gz", build_fr_columns),
+            {"postal_region": "Code_postal", "latitude": "lat", "longitude": "lng"},
+        )
+    return None
+
+
+class CityIndex:
+    """
+    GeoNames cities of a country ordered by population, largest first, so
+    that cities with at least a minimum population are a slice of the index.
+    """
+
+    def __init__(self, cities: list[dict], positions: list[int]):
+        self.cities = cities
+        # Position of each city in the GeoNames database, to return cities in
+        # database order.
+        self.positions = positions
+        self.negated_populations = [-city["population"] for city in cities]
+
+    def select(self, min_population: int = 0) -> list[dict]:
+        count = bisect_right(self.negated_populations, -min_population)
+        selected = sorted(range(count), key=self.positions.__getitem__)
+        return [self.cities[i] for i in selected]
+
+
+@cache
+def get_city_indexes() -> dict[str, CityIndex]:
+    """
+    Index GeoNames cities by lower case country code, once per process.
+    """
+    by_country = {}
+    for position, city in enumerate(geonamescache.GeonamesCache().get_cities().values()):
+        by_country.setdefault(city["countrycode"].lower(), []).append((position, city))
+    indexes = {}
+    for country_code, cities in by_country.items():
+        cities.sort(key=lambda item: (-item[1]["population"], item[0]))
+        indexes[country_code] = CityIndex([city for _, city in cities], [position for position, _ in cities])
+    return indexes
@@ -19,6 +19,11 @@ SPIDER_MODULES = ["locations.spiders"]
 NEWSPIDER_MODULE = "locations.spiders"
 COMMANDS_MODULE = "locations.commands"
 
+# Import only the requested spider module when a spider index is available,
+# see `scrapy spider_index`.
+SPIDER_LOADER_CLASS = "locations.spider_loader.IndexedSpiderLoader"
+SPIDER_INDEX_FILE = os.environ.get("SPIDER_INDEX_FILE")
+
 
 # Crawl responsibly by identifying yourself (and your website) on the user-agent
 USER_AGENT = f"Mozilla/5.0 (X11; Linux x86_64) {BOT_NAME}/{locations.__version__} (+https://github.com/alltheplaces/alltheplaces; +https://alltheplaces.xyz/) framework/{scrapy.__version__}"
@@ -67,7 +72,13 @@ TELNETCONSOLE_ENABLED = False
 # See http://scrapy.readthedocs.org/en/latest/topics/spider-middleware.html
 SPIDER_MIDDLEWARES = {
     "locations.middlewares.track_sources.TrackSourcesMiddleware": 500,
+    "locations.middlewares.reverse_geocoding_batch.ReverseGeocodingBatchMiddleware": 550,
+    "locations.middlewares.geometry_reprojection_batch.GeometryReprojectionBatchMiddleware": 560,
 }
+# Number of items reverse geocoded together, see ReverseGeocodingBatchMiddleware
+REVERSE_GEOCODING_BATCH_SIZE = 1000
+# Number of items reprojected together, see GeometryReprojectionBatchMiddleware
+GEOMETRY_REPROJECTION_BATCH_SIZE = 1000
 
 # Enable or disable downloader middlewares
 # See http://scrapy.readthedocs.org/en/latest/topics/downloader-middleware.html
@@ -93,6 +104,9 @@ DOWNLOADER_MIDDLEWARES["locations.middlewares.cdnstats.CDNStatsMiddleware"] = 50
 # }
 
 EXTENSIONS = {
+    "locations.extensions.batch_stats.BatchStatsExtension": 50,
+    # Disabled unless PERF_STATS_ENABLED is set.
+    "locations.extensions.perf_stats.PerfStatsExtension": 60,
     "locations.extensions.add_lineage.AddLineageExtension": 100,
     "locations.extensions.filter_stats.FilterStatsExtension": 150,
     "locations.extensions.log_stats.LogStatsExtension": 1000,
@@ -100,7 +114,13 @@ EXTENSIONS = {
 
 # Configure item pipelines
 # See http://scrapy.readthedocs.org/en/latest/topics/item-pipeline.html
+# The pipelines of FUSED_ITEM_PIPELINES are run as one pipeline. Spiders can
+# still disable them with "ITEM_PIPELINES | {...: None}".
 ITEM_PIPELINES = {
+    "locations.pipelines.fused.FusedItemPipeline": 200,
+}
+
+FUSED_ITEM_PIPELINES = {
     "locations.pipelines.duplicates.DuplicatesPipeline": 200,
     "locations.pipelines.drop_attributes.DropAttributesPipeline": 250,
     "locations.pipelines.apply_spider_level_attributes.ApplySpiderLevelAttributesPipeline": 300,
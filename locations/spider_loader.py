@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Iterable, Type
+
+from scrapy import Request, Spider
+from scrapy.settings import BaseSettings
+from scrapy.spiderloader import SpiderLoader
+
+from locations.extensions.add_lineage import spider_class_to_lineage
+
+logger = logging.getLogger(__name__)
+
+SPIDER_INDEX_VERSION = 1
+SPIDER_INDEX_FILE_PATH = Path(__file__).resolve().parent / "data" / "spider_index.json"
+
+# custom_settings keys whose (scalar) values are copied into the index so that
+# callers can inspect them without importing the spider module.
+INDEXED_SETTINGS = ["ROBOTSTXT_OBEY", "DOWNLOAD_DELAY", "DOWNLOAD_TIMEOUT", "CONCURRENT_REQUESTS"]
+
+
+def spider_modules_fingerprint(modules: Iterable[str]) -> str:
+    """
+    Compute a fingerprint of the source code of the given spider packages
+    without importing any spider module. Any added, removed, renamed or edited
+    spider source file changes the fingerprint.
+    :param modules: dotted names of spider packages (e.g. SPIDER_MODULES)
+    :return: hex digest of the spider package sources
+    """
+    sha1 = hashlib.sha1()
+    for module in modules:
+        spec = find_spec(module)
+        if spec is None:
+            continue
+        for location in spec.submodule_search_locations or [os.path.dirname(spec.origin or "")]:
+            for root, dirs, files in os.walk(location):
+                dirs.sort()
+                for file in sorted(files):
+                    if not file.endswith(".py"):
+                        continue
+                    path = os.path.join(root, file)
+                    sha1.update(os.path.relpath(path, location).encode("utf8"))
+                    with open(path, "rb") as f:
+                        sha1.update(f.read())
+    return sha1.hexdigest()
+
+
+def spider_class_to_index_entry(spider_class: Type[Spider]) -> dict[str, Any]:
+    custom_settings = getattr(spider_class, "custom_settings", None) or {}
+    return {
+        "module": spider_class.__module__,
+        "class": spider_class.__name__,
+        "group": spider_class_to_lineage(spider_class).group,
+        "requires_proxy": getattr(spider_class, "requires_proxy", False),
+        "settings": {key: custom_settings[key] for key in INDEXED_SETTINGS if key in custom_settings},
+    }
+
+
+def build_spider_index(spider_classes: Iterable[Type[Spider]], modules: Iterable[str]) -> dict:
+    spiders = {}
+    for spider_class in spider_classes:
+        spiders[spider_class.name] = spider_class_to_index_entry(spider_class)
+    return {
+        "_meta": {
+            "version": SPIDER_INDEX_VERSION,
+            "fingerprint": spider_modules_fingerprint(modules),
+        },
+        "spiders": dict(sorted(spiders.items())),
+    }
+
+
+def write_spider_index(index: dict, path: Path = SPIDER_INDEX_FILE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+
+def load_spider_index(modules: Iterable[str], path: Path = SPIDER_INDEX_FILE_PATH) -> dict[str, dict] | None:
+    """
+    Load the spider index, returning None if it is missing, was written by a
+    different version of this module or no longer matches the spider sources.
+    :param modules: dotted names of spider packages (e.g. SPIDER_MODULES)
+    :param path: location of the spider index file
+    :return: mapping of spider name to index entry, or None if unusable
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    meta = index.get("_meta", {})
+    if meta.get("version") != SPIDER_INDEX_VERSION:
+        return None
+    if meta.get("fingerprint") != spider_modules_fingerprint(modules):
+        logger.debug("Spider index at %s is stale, ignoring it", path)
+        return None
+    return index.get("spiders")
+
+
+def load_indexed_spider_class(spider_name: str, entry: dict[str, Any]) -> Type[Spider] | None:
+    """
+    Import the spider class described by a spider index entry.
+    :param spider_name: name of the spider
+    :param entry: index entry of the spider
+    :return: the spider class, or None if the index entry disagrees with it
+    """
+    spider_class = getattr(import_module(entry["module"]), entry["class"], None)
+    if isinstance(spider_class, type) and getattr(spider_class, "name", None) == spider_name:
+        return spider_class
+    return None
+
+
+class IndexedSpiderLoader(SpiderLoader):
+    """
+    Spider loader which consults a precomputed spider index (written by
+    `scrapy spider_index`) so that loading a single spider only imports the
+    module defining it. When the index is missing or stale, or a lookup
+    disagrees with the index, this falls back to Scrapy's default behaviour
+    of importing every module of SPIDER_MODULES.
+    """
+
+    def __init__(self, settings: BaseSettings):
+        self.spider_modules = settings.getlist("SPIDER_MODULES")
+        self.warn_only = settings.getbool("SPIDER_LOADER_WARN_ONLY")
+        self._spiders = {}
+        self._found = defaultdict(list)
+        self.index = load_spider_index(
+            self.spider_modules, Path(settings.get("SPIDER_INDEX_FILE") or SPIDER_INDEX_FILE_PATH)
+        )
+        if self.index is None:
+            self._load_all_spiders()
+
+    def _fall_back_to_walk(self) -> None:
+        if self.index is not None:
+            self.index = None
+            self._load_all_spiders()
+
+    def load(self, spider_name: str) -> Type[Spider]:
+        if spider_name in self._spiders or self.index is None:
+            return super().load(spider_name)
+
+        if (entry := self.index.get(spider_name)) and (spider_class := load_indexed_spider_class(spider_name, entry)):
+            self._spiders[spider_name] = spider_class
+            return spider_class
+
+        self._fall_back_to_walk()
+        return super().load(spider_name)
+
+    def find_by_request(self, request: Request) -> list[str]:
+        self._fall_back_to_walk()
+        return super().find_by_request(request)
+
+    def list(self) -> list[str]:
+        if self.index is not None:
+            return list(self.index.keys())
+        return super().list()
+
+    def group(self, spider_name: str) -> str:
+        """
+        :param spider_name: name of the spider
+        :return: the run group of the spider, see `Lineage.group`
+        """
+        if self.index is not None and spider_name in self.index:
+            return self.index[spider_name]["group"]
+        return spider_class_to_lineage(self.load(spider_name)).group
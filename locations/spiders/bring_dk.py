@@ -1,12 +1,12 @@
 from typing import Any
 
-from pyproj import Transformer
 from scrapy import Spider
 from scrapy.http import Response
 
 from locations.categories import Categories, apply_category
 from locations.hours import OpeningHours
 from locations.items import Feature
+from locations.reprojection import get_transformer
 
 PAKKEBOKSEN = {"brand": "Pakkeboksen", "brand_wikidata": "Q12309164"}
 
@@ -16,7 +16,7 @@ class BringDKSpider(Spider):
     start_urls = ["https://www.bring.dk/en/map/_/service/no.posten.map/enonicUnits?country=DK&englishData=true"]
 
     def parse(self, response: Response, **kwargs: Any) -> Any:
-        transformer = Transformer.from_crs(25832, 4326)
+        transformer = get_transformer(25832)
         for location in response.json()["units"]:
             attributes = location["attributes"]
             item = Feature()
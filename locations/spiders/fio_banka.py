@@ -1,12 +1,11 @@
 import re
-import time
 
 from scrapy.linkextractors import LinkExtractor
 from scrapy.spiders import CrawlSpider, Rule
 
 from locations.categories import Categories, apply_category
 from locations.google_url import extract_google_position
-from locations.hours import DAYS_CZ, DAYS_SK, OpeningHours
+from locations.hours import DAYS_CZ, DAYS_SK, OpeningHours, minutes_to_time
 from locations.items import Feature
 from locations.structured_data_spider import extract_email
 
@@ -77,7 +76,7 @@ class FioBankaSpider(CrawlSpider):
                 last_day = list(oh.day_hours.values())[-1]
                 first_entry = list(last_day)[0]
                 open_time, _ = first_entry
-                new_open_time = time.strftime("%H:%M", open_time)
+                new_open_time = minutes_to_time(open_time)
                 row = row.replace("do", new_open_time + " -")
             oh.add_ranges_from_string(row, days)
         return oh
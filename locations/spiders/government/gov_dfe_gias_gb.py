@@ -1,12 +1,12 @@
 from datetime import datetime, timedelta
 
-import pyproj
 from scrapy.spiders import CSVFeedSpider
 
 from locations.categories import Categories, apply_category, get_category_tags
 from locations.items import Feature, set_closed
 from locations.licenses import Licenses
 from locations.pipelines.address_clean_up import clean_address
+from locations.reprojection import get_transformer
 from locations.settings import ITEM_PIPELINES
 
 
@@ -23,8 +23,6 @@ class GovDfeGiasGBSpider(CSVFeedSpider):
         "ITEM_PIPELINES": ITEM_PIPELINES | {"locations.pipelines.count_operators.CountOperatorsPipeline": None},
         "DOWNLOAD_TIMEOUT": 400,
     }
-    # British OSGB36 -> lat/lon (https://epsg.io/4326)
-    coord_transformer = pyproj.Transformer.from_crs(27700, 4326)
 
     def adapt_response(self, response):
         fixed_response = response.replace(body=response.text.encode("ISO8859-1", "ignore").decode("utf-8", "ignore"))
@@ -54,7 +52,8 @@ class GovDfeGiasGBSpider(CSVFeedSpider):
             return
 
         if row.get("Easting") not in ["0", ""] and row.get("Northing") not in ["0", ""]:
-            item["lat"], item["lon"] = self.coord_transformer.transform(row.get("Easting"), row.get("Northing"))
+            # British OSGB36 (https://epsg.io/27700) -> lat/lon (https://epsg.io/4326)
+            item["lat"], item["lon"] = get_transformer(27700).transform(row.get("Easting"), row.get("Northing"))
 
         item["ref"] = row["URN"]
         item["extras"]["ref:edubase"] = row["URN"]
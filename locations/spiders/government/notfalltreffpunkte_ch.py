@@ -1,11 +1,11 @@
 from typing import Any
 
-import pyproj
 import scrapy
 from scrapy.http import Response
 
 from locations.categories import Categories, apply_category
 from locations.items import Feature
+from locations.reprojection import get_transformer
 
 
 class NotfalltreffpunkteCHSpider(scrapy.Spider):
@@ -24,7 +24,7 @@ class NotfalltreffpunkteCHSpider(scrapy.Spider):
 
     def parse(self, response: Response, **kwargs: Any) -> Any:
         # Swiss LV95 (https://epsg.io/2056) -> lat/lon (https://epsg.io/4326)
-        coord_transformer = pyproj.Transformer.from_crs(2056, 4326)
+        coord_transformer = get_transformer(2056)
 
         for f in response.json()["features"]:
             props = f["properties"]
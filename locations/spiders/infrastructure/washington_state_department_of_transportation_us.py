@@ -1,12 +1,12 @@
 from typing import Iterable
 
 from chompjs import parse_js_object
-from pyproj import Transformer
 from scrapy.http import Response
 
 from locations.categories import Categories
 from locations.items import Feature
 from locations.json_blob_spider import JSONBlobSpider
+from locations.reprojection import reproject_point
 
 
 class WashingtonStateDepartmentOfTransportationUSSpider(JSONBlobSpider):
@@ -33,9 +33,7 @@ class WashingtonStateDepartmentOfTransportationUSSpider(JSONBlobSpider):
             return
         item["ref"] = str(feature["attributes"]["CameraID"])
         item["name"] = feature["attributes"]["CameraTitle"]
-        item["lat"], item["lon"] = Transformer.from_crs("epsg:3857", "epsg:4326").transform(
-            feature["geometry"]["x"], feature["geometry"]["y"]
-        )
+        item["lat"], item["lon"] = reproject_point(3857, feature["geometry"]["x"], feature["geometry"]["y"])
         item["extras"]["contact:webcam"] = feature["attributes"]["ImageURL"]
         item["extras"]["camera:type"] = "fixed"
         yield item
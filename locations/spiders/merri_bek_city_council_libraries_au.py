@@ -1,12 +1,12 @@
 from typing import AsyncIterator, Iterable
 
-from pyproj import Transformer
 from scrapy.http import Request, Response
 from scrapy.selector import Selector
 from scrapy.spiders import XMLFeedSpider
 
 from locations.categories import Categories, apply_category
 from locations.items import Feature
+from locations.reprojection import reproject_point
 
 
 class MerriBekCityCouncilLibrariesAUSpider(XMLFeedSpider):
@@ -57,9 +57,7 @@ class MerriBekCityCouncilLibrariesAUSpider(XMLFeedSpider):
             .get()
             .split(",", 1)
         )
-        properties["lat"], properties["lon"] = Transformer.from_crs(source_projection, 4326).transform(
-            lon_source, lat_source
-        )
+        properties["lat"], properties["lon"] = reproject_point(source_projection, lon_source, lat_source)
         apply_category(Categories.LIBRARY, properties)
         properties["extras"]["access"] = "yes"
         yield Feature(**properties)
@@ -5,7 +5,7 @@ from scrapy.http import Request
 
 from locations.categories import Categories, apply_category
 from locations.hours import DAYS_EN, DAYS_PT, DELIMITERS_EN, DELIMITERS_PT, OpeningHours
-from locations.items import Feature, merge_items
+from locations.items import Feature, ItemMerger
 from locations.spiders.nedbank_za import NEDBANK_SHARED_ATTRIBUTES
 
 
@@ -16,9 +16,12 @@ class NedbankMZSpider(Spider):
         "https://www.nedbank.co.mz/en/customer-support/branches.aspx",
         "https://www.nedbank.co.mz/apoio-ao-cliente/rede-de-balc%C3%B5es.aspx",
     ]
-    saved_items = {"en": {}, "pt": {}}
     languages_finished = 0
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.merger = ItemMerger(["en", "pt"], "pt")
+
     def parse(self, response):
         for location in response.xpath('.//div[@class="balcao_morada"]'):
             item = Feature()
@@ -78,10 +81,7 @@ class NedbankMZSpider(Spider):
 
             item["ref"] = f"{item['lat']},{item['lon']}"
 
-            if "/en/" in response.url:
-                self.saved_items["en"][item["ref"]] = item
-            else:
-                self.saved_items["pt"][item["ref"]] = item
+            yield from self.merger.add(item, "en" if "/en/" in response.url else "pt")
 
         if event_target := response.xpath('.//a[contains(@id, "ctl05_contact_12_ltnnext")]/@href').get():
             view_state = response.xpath('.//input[@id="__VIEWSTATE"]/@value').get()
@@ -105,4 +105,4 @@ class NedbankMZSpider(Spider):
         else:
             self.languages_finished += 1
             if self.languages_finished == 2:
-                yield from merge_items(self.saved_items, "pt")
+                yield from self.merger.flush()
@@ -1,12 +1,12 @@
 from typing import Any
 
-import pyproj
 from scrapy import Spider
 from scrapy.http import Response
 
 from locations.categories import Categories, apply_category, apply_yes_no
 from locations.hours import OpeningHours
 from locations.items import Feature
+from locations.reprojection import get_transformer
 
 
 class PostenNOSpider(Spider):
@@ -15,7 +15,7 @@ class PostenNOSpider(Spider):
     start_urls = ["https://www.posten.no/en/map/_/service/no.posten.map/enonicUnits?country=NO"]
 
     def parse(self, response: Response, **kwargs: Any) -> Any:
-        transformer = pyproj.Transformer.from_crs(25833, 4326)
+        transformer = get_transformer(25833)
         for location in response.json()["units"]:
             attributes = location["attributes"]
 
@@ -1,11 +1,12 @@
 from datetime import UTC, datetime, timedelta
+from functools import cached_property
 from typing import AsyncIterator, Iterable
 from urllib.parse import quote_plus
 
 from scrapy import Spider
 from scrapy.http import JsonRequest, TextResponse
 
-from locations.dict_parser import DictParser
+from locations.dict_parser import DictParser, KeySchemaCache
 from locations.items import Feature
 
 
@@ -49,7 +50,10 @@ class ArcGISFeatureServerSpider(Spider):
     the `pre_process_data` function to modify field values before
     `DictParser.parse` is called. Override the `post_process_item` function to
     extract additional information from the source feature or to clean data
-    after automatic extraction has been attempted.
+    after automatic extraction has been attempted. Set `cache_key_schemas` to
+    have `DictParser.parse` resolve which fields to extract from which keys
+    only once per distinct set of fields, which is worthwhile for layers with
+    many features.
 
     Different ArcGIS Feature Servers will have varied maximum record counts
     configured to be returned per query. This class will automatically detect
@@ -75,6 +79,7 @@ class ArcGISFeatureServerSpider(Spider):
     field_names: list[str] = []
     where_query: str = "1=1"
     additional_parameters: dict = {}
+    cache_key_schemas: bool = False
 
     # robots.txt does not exist and instead returns a HTTP 404 page which
     # triggers a number of Scrapy warning messages.
@@ -161,6 +166,10 @@ class ArcGISFeatureServerSpider(Spider):
             query_url = query_url + additional_parameters_str
         yield JsonRequest(url=query_url, callback=self.parse_features)
 
+    @cached_property
+    def key_cache(self) -> KeySchemaCache | None:
+        return KeySchemaCache() if self.cache_key_schemas else None
+
     def parse_features(self, response: TextResponse) -> Iterable[Feature]:
         features = response.json()["features"]
 
@@ -172,7 +181,7 @@ class ArcGISFeatureServerSpider(Spider):
                 properties["__geometry"] = properties.pop("geometry")
             feature.update(properties)
             self.pre_process_data(feature)
-            item = DictParser.parse(feature)
+            item = DictParser.parse(feature, self.key_cache)
 
             # Esri's GeoJSON output is not always valid, so check for known problems
             geom = item.get("geometry")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import math
+from functools import cached_property
 from typing import AsyncIterator, Iterable
 
 from scrapy import Spider
@@ -9,6 +11,7 @@ from scrapy.http.request.form import FormRequest
 from locations.dict_parser import DictParser
 from locations.geo import country_iseadgg_centroids, point_locations
 from locations.items import Feature
+from locations.search_planner import SearchCircle, SearchPlanner
 
 
 class StoreLocatorPlusSelfSpider(Spider):
@@ -55,6 +58,11 @@ class StoreLocatorPlusSelfSpider(Spider):
     ensure that max_results (or more) locations are never returned for any
     radius search.
 
+    Alternatively, set adaptive_search = True. Radius searches which return
+    max_results locations are then repeated with smaller radiuses (see
+    locations.search_planner) until no locations are truncated, so a coarse
+    grid (large search_radius) can be used for the whole area searched.
+
     If clean ups or additional field extraction is required from the source
     data, override the parse_item function. Two parameters are passed:
       item: an ATP "Feature" class
@@ -68,6 +76,7 @@ class StoreLocatorPlusSelfSpider(Spider):
     searchable_points_files: list[str] = []
     search_radius: int = 0
     max_results: int = 0
+    adaptive_search: bool = False
 
     async def start(self) -> AsyncIterator[FormRequest]:
         if len(self.start_urls) == 0 and len(self.allowed_domains) == 1:
@@ -102,36 +111,50 @@ class StoreLocatorPlusSelfSpider(Spider):
                 )
                 return
             for lat, lon in country_iseadgg_centroids(self.iseadgg_countries_list, iseadgg_radius):
-                formdata = {
-                    "action": "csl_ajax_onload",
-                    "lat": str(lat),
-                    "lng": str(lon),
-                    "radius": str(self.search_radius),
-                }
-                yield FormRequest(url=url, formdata=formdata, method="POST")  # ty: ignore[invalid-argument-type]
+                yield self.make_geo_search_request(url, SearchCircle(lat, lon, self.search_radius))
         elif url and len(self.searchable_points_files) > 0 and self.search_radius != 0 and self.max_results != 0:
             # NONPREFERRED geographic radius search method using a manually
             # specified list of searchable_points_file containing centroids.
             for searchable_points_file in self.searchable_points_files:
                 for lat, lon in point_locations(searchable_points_file):
-                    formdata = {
-                        "action": "csl_ajax_onload",
-                        "lat": str(lat),
-                        "lng": str(lon),
-                        "radius": str(self.search_radius),
-                    }
-                    yield FormRequest(url=url, formdata=formdata, method="POST")  # ty: ignore[invalid-argument-type]
+                    yield self.make_geo_search_request(url, SearchCircle(lat, lon, self.search_radius))
         else:
             raise ValueError(
                 "Either iseadgg_countries_list or searchable_points_files must be specified with one or more values. The search_radius attribute must also be specified."
             )
             return
 
-    def parse(self, response: TextResponse, **kwargs) -> Iterable[Feature]:
+    def make_geo_search_request(self, url: str, circle: SearchCircle) -> FormRequest:
+        """
+        Make a geographic radius search request for the supplied circle. The
+        radius is rounded up to whole kilometres.
+        """
+        formdata = {
+            "action": "csl_ajax_onload",
+            "lat": str(circle.lat),
+            "lng": str(circle.lon),
+            "radius": str(math.ceil(circle.radius)),
+        }
+        return FormRequest(
+            url=url,
+            formdata=formdata,  # ty: ignore[invalid-argument-type]
+            method="POST",
+            meta={"search_circle": circle},
+        )
+
+    @cached_property
+    def search_planner(self) -> SearchPlanner:
+        # Store Locator Plus returns the nearest max_results locations.
+        return SearchPlanner(self.max_results, nearest_first=True)
+
+    def parse(self, response: TextResponse, **kwargs) -> Iterable[Feature | FormRequest]:
         locations = response.json()["response"]
 
         if self.max_results > 0:
-            if len(locations) >= self.max_results:
+            circle = response.meta.get("search_circle")
+            if self.adaptive_search and circle is not None:
+                yield from self.refine_geo_search(response.url, circle, locations)
+            elif len(locations) >= self.max_results:
                 raise RuntimeError(
                     "Locations have probably been truncated due to max_results (or more) locations being returned by a single geographic radius search. Use a smaller search_radius."
                 )
@@ -144,6 +167,9 @@ class StoreLocatorPlusSelfSpider(Spider):
                 self.crawler.stats.max_value("atp/geo_search/max_features_returned", len(locations))
 
         for location in locations:
+            if self.adaptive_search and not self.search_planner.is_new(location.get("id")):
+                # Already returned by an overlapping radius search.
+                continue
             item = DictParser.parse(location)
             item.pop("addr_full", None)
             item["street_address"] = ", ".join(filter(None, [location.get("address"), location.get("address2")]))
@@ -151,5 +177,21 @@ class StoreLocatorPlusSelfSpider(Spider):
                 item["website"] = f"https://{self.allowed_domains[0]}{item['website']}"
             yield from self.parse_item(item, location) or []
 
+    def refine_geo_search(self, url: str, circle: SearchCircle, locations: list[dict]) -> Iterable[FormRequest]:
+        coordinates = []
+        for location in locations:
+            try:
+                coordinates.append((float(location["lat"]), float(location["lng"])))
+            except (KeyError, TypeError, ValueError):
+                pass
+        if self.search_planner.is_saturated(len(locations)) and not self.search_planner.can_subdivide(circle):
+            raise RuntimeError(
+                "Locations have probably been truncated due to max_results (or more) locations being returned by a single geographic radius search of the smallest radius searched adaptively."
+            )
+        for sub_circle in self.search_planner.refine_circle(circle, len(locations), coordinates):
+            if self.crawler.stats:
+                self.crawler.stats.inc_value("atp/geo_search/refined")
+            yield self.make_geo_search_request(url, sub_circle)
+
     def parse_item(self, item: Feature, location: dict) -> Iterable[Feature]:
         yield item
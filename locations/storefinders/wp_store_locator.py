@@ -1,4 +1,6 @@
 import html
+import math
+from functools import cached_property
 from typing import AsyncIterator, Iterable
 
 from scrapy import Selector, Spider
@@ -9,6 +11,7 @@ from locations.geo import country_iseadgg_centroids, point_locations
 from locations.hours import DAYS_BY_FREQUENCY, OpeningHours
 from locations.items import Feature
 from locations.pipelines.address_clean_up import merge_address_lines
+from locations.search_planner import SearchCircle, SearchPlanner
 
 
 class WPStoreLocatorSpider(Spider):
@@ -65,6 +68,12 @@ class WPStoreLocatorSpider(Spider):
     that max_results (or more) locations are never returned for any radius
     search.
 
+    Alternatively, if the API endpoint accepts any search_radius value, set
+    adaptive_search = True. Radius searches which return max_results
+    locations are then repeated with smaller radiuses (see
+    locations.search_planner) until no locations are truncated, so a coarse
+    grid (large search_radius) can be used for the whole area searched.
+
     If clean ups or additional field extraction is required from the source
     data, override the parse_item function. Two parameters are passed:
       item: an ATP "Feature" class
@@ -80,6 +89,7 @@ class WPStoreLocatorSpider(Spider):
     area_field_filter: list[str] = []
     search_radius: int = 0
     max_results: int = 0
+    adaptive_search: bool = False
     possible_days: list[dict] = DAYS_BY_FREQUENCY
 
     async def start(self) -> AsyncIterator[JsonRequest]:
@@ -140,18 +150,7 @@ class WPStoreLocatorSpider(Spider):
                 "A minimum search_radius of 24 (kilometres) is required to be used for the ISEADGG geographic radius search method."
             )
         for lat, lon in country_iseadgg_centroids(self.iseadgg_countries_list, iseadgg_radius):
-            if len(self.start_urls) == 0 and len(self.allowed_domains) == 1:
-                yield JsonRequest(
-                    url=f"https://{self.allowed_domains[0]}/wp-admin/admin-ajax.php?action=store_search&lat={lat}&lng={lon}&max_results={self.max_results}&search_radius={self.search_radius}"
-                )
-            elif len(self.start_urls) == 1:
-                yield JsonRequest(
-                    url=f"{self.start_urls[0]}&lat={lat}&lng={lon}&max_results={self.max_results}&search_radius={self.search_radius}"
-                )
-            else:
-                raise ValueError(
-                    "Specify one domain name in the allowed_domains list attribute or one URL in the start_urls list attribute."
-                )
+            yield self.make_geo_search_request(SearchCircle(lat, lon, self.search_radius))
 
     def start_requests_geo_search_manual_method(self) -> Iterable[JsonRequest]:
         """
@@ -166,20 +165,30 @@ class WPStoreLocatorSpider(Spider):
             return
         for searchable_points_file in self.searchable_points_files:
             for lat, lon in point_locations(searchable_points_file, self.area_field_filter):
-                if len(self.start_urls) == 0 and len(self.allowed_domains) == 1:
-                    yield JsonRequest(
-                        url=f"https://{self.allowed_domains[0]}/wp-admin/admin-ajax.php?action=store_search&lat={lat}&lng={lon}&max_results={self.max_results}&search_radius={self.search_radius}"
-                    )
-                elif len(self.start_urls) == 1:
-                    yield JsonRequest(
-                        url=f"{self.start_urls[0]}&lat={lat}&lng={lon}&max_results={self.max_results}&search_radius={self.search_radius}"
-                    )
-                else:
-                    raise ValueError(
-                        "Specify one domain name in the allowed_domains list attribute or one URL in the start_urls list attribute."
-                    )
+                yield self.make_geo_search_request(SearchCircle(lat, lon, self.search_radius))
 
-    def parse(self, response: TextResponse) -> Iterable[Feature]:
+    def make_geo_search_request(self, circle: SearchCircle) -> JsonRequest:
+        """
+        Make a geographic radius search request for the supplied circle. The
+        radius is rounded up to whole kilometres.
+        """
+        search_radius = math.ceil(circle.radius)
+        if len(self.start_urls) == 0 and len(self.allowed_domains) == 1:
+            url = f"https://{self.allowed_domains[0]}/wp-admin/admin-ajax.php?action=store_search&lat={circle.lat}&lng={circle.lon}&max_results={self.max_results}&search_radius={search_radius}"
+        elif len(self.start_urls) == 1:
+            url = f"{self.start_urls[0]}&lat={circle.lat}&lng={circle.lon}&max_results={self.max_results}&search_radius={search_radius}"
+        else:
+            raise ValueError(
+                "Specify one domain name in the allowed_domains list attribute or one URL in the start_urls list attribute."
+            )
+        return JsonRequest(url=url, meta={"search_circle": circle})
+
+    @cached_property
+    def search_planner(self) -> SearchPlanner:
+        # WP Store Locator returns the nearest max_results locations.
+        return SearchPlanner(self.max_results, nearest_first=True)
+
+    def parse(self, response: TextResponse) -> Iterable[Feature | JsonRequest]:
         if response.text.strip():
             features = response.json()
         else:
@@ -195,12 +204,18 @@ class WPStoreLocatorSpider(Spider):
                     self.crawler.stats.inc_value("atp/geo_search/misses")
                 self.crawler.stats.max_value("atp/geo_search/max_features_returned", len(features))
 
-            if len(features) >= self.max_results:
+            circle = response.meta.get("search_circle")
+            if self.adaptive_search and circle is not None:
+                yield from self.refine_geo_search(circle, features)
+            elif len(features) >= self.max_results:
                 self.logger.error(
                     "Locations have probably been truncated due to max_results (or more) features being returned by a single geographic radius search. Use a smaller search_radius."
                 )
 
         for feature in features:
+            if self.adaptive_search and not self.search_planner.is_new(feature.get("id")):
+                # Already returned by an overlapping radius search.
+                continue
             self.pre_process_data(feature)
             item = DictParser.parse(feature)
             item.pop("addr_full", None)
@@ -223,6 +238,22 @@ class WPStoreLocatorSpider(Spider):
 
             yield from self.post_process_item(item, response, feature) or []
 
+    def refine_geo_search(self, circle: SearchCircle, features: list[dict]) -> Iterable[JsonRequest]:
+        locations = []
+        for feature in features:
+            try:
+                locations.append((float(feature["lat"]), float(feature["lng"])))
+            except (KeyError, TypeError, ValueError):
+                pass
+        if self.search_planner.is_saturated(len(features)) and not self.search_planner.can_subdivide(circle):
+            self.logger.error(
+                "Locations have probably been truncated due to max_results (or more) features being returned by a single geographic radius search of the smallest radius searched adaptively."
+            )
+        for sub_circle in self.search_planner.refine_circle(circle, len(features), locations):
+            if self.crawler.stats:
+                self.crawler.stats.inc_value("atp/geo_search/refined")
+            yield self.make_geo_search_request(sub_circle)
+
     def parse_opening_hours(self, feature: dict, days: dict) -> OpeningHours:
         oh = OpeningHours()
         hours_raw = DictParser.get_first_key(feature, DictParser.hours_keys)
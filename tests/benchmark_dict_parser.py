@@ -0,0 +1,91 @@
+"""
+Micro-benchmark of DictParser.parse against probing every variation of every
+candidate key, as DictParser did before key lookups were precompiled.
+
+    python -m tests.benchmark_dict_parser
+"""
+
+import logging
+import timeit
+
+from locations.dict_parser import DictParser, KeySchemaCache, KeyVariations
+from tests.test_dict_parser import probe_first_key
+
+logger = logging.getLogger(__name__)
+
+RECORD = {
+    "id": "2107",
+    "name": "Kidderminster, Swan Centre",
+    "type": "store",
+    "distance": 71.53,
+    "address": {
+        "company": "Poundland",
+        "line": ["3-6 Coventry Street", "Swan Centre"],
+        "city": "Kidderminster",
+        "country": "UK",
+        "postcode": "DY10 2DG",
+    },
+    "geolocation": {"latitude": "52.38839100", "longitude": "-2.24784700"},
+    "store_id": "304",
+    "url_key": "2107",
+    "description": None,
+    "store_manager": "Steven Creighton",
+    "fax": "",
+    "tel": "01562 746695",
+    "email": "example@example.org",
+    "close_date": None,
+    "route": "store-finder/2107",
+}
+
+
+def probe_parse(obj: dict) -> None:
+    # The key lookups of DictParser.parse, probing each variation in turn.
+    for keys in [DictParser.ref_keys, DictParser.name_keys, DictParser.location_keys]:
+        probe_first_key(obj, keys)
+    for keys in [DictParser.lat_keys, DictParser.lon_keys, DictParser.full_address_keys]:
+        probe_first_key(obj, keys)
+    address = probe_first_key(obj, DictParser.full_address_keys)
+    for keys in [
+        DictParser.house_number_keys,
+        DictParser.street_keys,
+        DictParser.street_address_keys,
+        DictParser.city_keys,
+        DictParser.region_keys,
+        DictParser.postcode_keys,
+        DictParser.country_keys,
+    ]:
+        probe_first_key(address, keys)
+    probe_first_key(obj, DictParser.contact_keys)
+    for keys in [
+        DictParser.email_keys,
+        DictParser.phone_keys,
+        DictParser.website_keys,
+        DictParser.twitter_keys,
+        DictParser.facebook_keys,
+    ]:
+        probe_first_key(obj, keys)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Warm the caches of both approaches.
+    DictParser.parse(RECORD)
+    KeyVariations.get_variations("id")
+
+    number = 20_000
+    probe = min(timeit.repeat(lambda: probe_parse(RECORD), number=number, repeat=3))
+    lookups = min(timeit.repeat(lambda: DictParser.get_parse_plan().resolve(RECORD), number=number, repeat=3))
+    parse = min(timeit.repeat(lambda: DictParser.parse(RECORD), number=number, repeat=3))
+    key_cache = KeySchemaCache()
+    cached_lookups = min(timeit.repeat(lambda: key_cache.resolve(RECORD), number=number, repeat=3))
+    cached_parse = min(timeit.repeat(lambda: DictParser.parse(RECORD, key_cache), number=number, repeat=3))
+
+    logger.info(f"probing key variations:  {probe / number * 1e6:8.1f}us per record")
+    logger.info(f"precompiled key lookups: {lookups / number * 1e6:8.1f}us per record")
+    logger.info(f"cached key schema:       {cached_lookups / number * 1e6:8.1f}us per record")
+    logger.info(f"DictParser.parse:        {parse / number * 1e6:8.1f}us per record")
+    logger.info(f"... with cached schema:  {cached_parse / number * 1e6:8.1f}us per record")
+
+
+if __name__ == "__main__":
+    main()
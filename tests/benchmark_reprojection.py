@@ -0,0 +1,52 @@
+"""
+Micro-benchmark of reprojecting GJ2008 Point geometry to EPSG:4326 with a new
+Transformer per point (as convert_gj2008_to_rfc7946_point_geometry did before
+Transformers were shared), with a shared Transformer per point, and with one
+call for a batch of points.
+
+    python -m tests.benchmark_reprojection
+"""
+
+import logging
+import random
+import timeit
+
+from pyproj import Transformer
+
+from locations.geo import convert_gj2008_to_rfc7946_point_geometry
+from locations.reprojection import reproject_points
+from tests.test_reprojection import gj2008_geometry
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    rng = random.Random(0)
+    points = [(rng.uniform(2500000, 2800000), rng.uniform(1100000, 1300000)) for _ in range(1000)]
+    geometries = [gj2008_geometry(x, y, 2056) for x, y in points]
+    xx = [x for x, _ in points]
+    yy = [y for _, y in points]
+
+    def per_point_transformer():
+        for x, y in points[:20]:
+            Transformer.from_crs(2056, 4326).transform(x, y)
+
+    def per_point_shared():
+        for geometry in geometries:
+            convert_gj2008_to_rfc7946_point_geometry(geometry)
+
+    def batch():
+        reproject_points(2056, xx, yy)
+
+    new_transformer = min(timeit.repeat(per_point_transformer, number=1, repeat=3)) / 20
+    shared = min(timeit.repeat(per_point_shared, number=5, repeat=3)) / 5 / len(points)
+    batched = min(timeit.repeat(batch, number=20, repeat=3)) / 20 / len(points)
+
+    logger.info(f"new Transformer per point:    {new_transformer * 1e6:10.1f}us per point")
+    logger.info(f"shared Transformer per point: {shared * 1e6:10.1f}us per point")
+    logger.info(f"batch of {len(points)} points:         {batched * 1e6:10.1f}us per point")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import json
+
+from scrapy import signals
+from scrapy.utils.spider import DefaultSpider
+from scrapy.utils.test import get_crawler
+
+from locations.extensions.batch_stats import StatsCounter, get_stats_counter
+from locations.items import Feature
+from locations.pipelines.count_brands import CountBrandsPipeline
+
+
+def get_objects(settings: dict | None = None):
+    crawler = get_crawler(DefaultSpider, settings)
+    crawler.spider = crawler._create_spider()
+    return crawler, CountBrandsPipeline(crawler)
+
+
+def test_stats_counter_batches():
+    crawler, _ = get_objects()
+    counter = StatsCounter(crawler.stats, batch_size=3)
+    counter.inc_value("atp/a")
+    counter.inc_value("atp/b", 2)
+    assert crawler.stats.get_value("atp/a") is None
+    counter.inc_value("atp/a")
+    assert crawler.stats.get_value("atp/a") == 2
+    assert crawler.stats.get_value("atp/b") == 2
+    counter.inc_value("atp/b")
+    counter.flush()
+    assert crawler.stats.get_value("atp/b") == 3
+
+
+def test_without_extension():
+    crawler, pipeline = get_objects()
+    assert get_stats_counter(crawler) is crawler.stats
+    pipeline.process_item(Feature(brand="Example"))
+    assert crawler.stats.get_value("atp/brand/Example") == 1
+
+
+def test_flushed_before_log_stats(tmp_path):
+    logstats_file = tmp_path / "stats.json"
+    crawler, _ = get_objects(
+        {
+            "EXTENSIONS": {
+                "locations.extensions.batch_stats.BatchStatsExtension": 50,
+                "locations.extensions.log_stats.LogStatsExtension": 1000,
+            },
+            "LOGSTATS_FILE": str(logstats_file),
+        }
+    )
+    crawler._apply_settings()
+    assert isinstance(get_stats_counter(crawler), StatsCounter)
+
+    pipeline = CountBrandsPipeline(crawler)
+    for _ in range(3):
+        pipeline.process_item(Feature(brand="Example", brand_wikidata="Q0"))
+    assert crawler.stats.get_value("atp/brand/Example") is None
+
+    crawler.signals.send_catch_log(signals.spider_closed, spider=crawler.spider, reason="finished")
+    stats = json.loads(logstats_file.read_text())
+    assert stats["atp/brand/Example"] == 3
+    assert stats["atp/brand_wikidata/Q0"] == 3
@@ -0,0 +1,57 @@
+import pytest
+import shapely
+
+from locations.centroids import generate_region_centroids, region_centroids
+from locations.geo import country_iseadgg_centroids, haversine_distance
+from locations.searchable_points.store import get_searchable_points_store
+
+
+def max_distance_to_nearest(points, centroids) -> float:
+    return max(min(haversine_distance(lat, lon, c_lat, c_lon) for c_lat, c_lon in centroids) for lat, lon in points)
+
+
+def test_region_centroids_cover_country():
+    centroids = generate_region_centroids("NZ", 60)
+    points = get_searchable_points_store().get_points("iseadgg/nz_centroids_iseadgg_24km_radius.csv")
+    assert max_distance_to_nearest(points, centroids) < 60
+    # Fewer searches than the nearest finer ISEADGG grid.
+    assert len(centroids) < len(country_iseadgg_centroids("NZ", 48))
+
+
+def test_region_centroids_cover_subdivision():
+    centroids = generate_region_centroids("US-NY", 40)
+    points = get_searchable_points_store().get_points("us_centroids_10mile_radius_state.csv", ["NY"])
+    assert max_distance_to_nearest(points, centroids) < 40
+    assert all(39.5 < lat < 46 and -81 < lon < -71 for lat, lon in centroids)
+
+
+def test_region_centroids_iseadgg_radius():
+    assert region_centroids("NZ", 94) == country_iseadgg_centroids("NZ", 94)
+
+
+def test_region_centroids_polygon():
+    polygon = shapely.box(2.0, 48.0, 3.0, 49.0)
+    centroids = generate_region_centroids(shapely.geometry.mapping(polygon), 20)
+    corners = [(48.0, 2.0), (48.0, 3.0), (49.0, 2.0), (49.0, 3.0), (48.5, 2.5)]
+    assert max_distance_to_nearest(corners, centroids) < 20
+
+
+def test_region_centroids_invalid():
+    with pytest.raises(ValueError):
+        region_centroids("XX", 50)
+    with pytest.raises(ValueError):
+        region_centroids("FR-75", 50)
+    with pytest.raises(ValueError):
+        region_centroids("NZ", 0)
+
+
+def test_region_centroids_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    centroids = region_centroids("US-RI", 30)
+    assert list((tmp_path / "alltheplaces" / "centroids").glob("us-ri_30km_radius_v*.json"))
+
+    def fail(*args):
+        raise AssertionError("not cached")
+
+    monkeypatch.setattr("locations.centroids.generate_region_centroids", fail)
+    assert region_centroids("US-RI", 30) == centroids
@@ -1,6 +1,6 @@
 import pytest
 
-from locations.country_utils import CountryUtils, get_locale
+from locations.country_utils import CountryUtils, get_country_index, get_locale, resolve_country_code
 
 
 def test_country_fix():
@@ -16,6 +16,24 @@ def test_country_fix():
     assert "GB" == country_utils.to_iso_alpha2_country_code("GBR")
     assert "GB" == country_utils.to_iso_alpha2_country_code(" UK ")
     assert "MX" == country_utils.to_iso_alpha2_country_code("México")
+    assert "VN" == country_utils.to_iso_alpha2_country_code("Socialist Republic of Viet Nam")
+    assert "DE" == country_utils.to_iso_alpha2_country_code("Allemagne")
+    assert "EG" == country_utils.to_iso_alpha2_country_code("Égypte")
+    assert "NZ" == country_utils.to_iso_alpha2_country_code("Nueva Zelanda")
+
+
+def test_country_fix_ambiguous_localised_name():
+    # "Kongo" is CD in some languages and CG in others.
+    assert "kongo" not in get_country_index().localised_names
+    assert not CountryUtils().to_iso_alpha2_country_code("Kongo")
+
+
+def test_country_fix_memoised():
+    resolve_country_code.cache_clear()
+    country_utils = CountryUtils()
+    for _ in range(3):
+        assert "FR" == country_utils.to_iso_alpha2_country_code("France")
+    assert resolve_country_code.cache_info().hits == 2
 
 
 def test_country_code_from_url():
@@ -0,0 +1,73 @@
+import json
+
+from scrapy.settings import Settings
+
+from locations.commands.crawl_many import (
+    load_timings,
+    longest_first,
+    predict_durations,
+    predict_makespan,
+    spider_settings,
+)
+
+
+def test_spider_settings():
+    settings = Settings({"CLOSESPIDER_TIMEOUT": 60})
+    crawl_settings = spider_settings(settings, "greggs_gb", "/tmp/run", ["geojson", "ndgeojson"])
+
+    assert crawl_settings.getdict("FEEDS") == {
+        "/tmp/run/output/greggs_gb.geojson": {"format": "geojson"},
+        "/tmp/run/output/greggs_gb.ndgeojson": {"format": "ndgeojson"},
+    }
+    assert crawl_settings.get("LOG_FILE") == "/tmp/run/logs/greggs_gb.txt"
+    assert crawl_settings.get("LOGSTATS_FILE") == "/tmp/run/stats/greggs_gb.json"
+    assert crawl_settings.getint("CLOSESPIDER_TIMEOUT") == 60
+    assert settings.get("LOG_FILE") is None
+
+
+def test_load_timings(tmp_path):
+    stats_dir = tmp_path / "stats"
+    stats_dir.mkdir()
+    (stats_dir / "greggs_gb.json").write_text(json.dumps({"elapsed_time_seconds": 120.5}))
+    (stats_dir / "costa_gb.json").write_text(json.dumps({"item_scraped_count": 0}))
+    (stats_dir / "_results.json").write_text(json.dumps({"results": [{"spider": "other", "elapsed_time": 1}]}))
+    assert load_timings(str(stats_dir)) == {"greggs_gb": 120.5, "costa_gb": 0.0}
+
+    results = tmp_path / "results.json"
+    results.write_text(
+        json.dumps(
+            {
+                "count": 2,
+                "results": [
+                    {"spider": "greggs_gb", "elapsed_time": 120.5},
+                    {"spider": "costa_gb", "elapsed_time": 0},
+                ],
+            }
+        )
+    )
+    assert load_timings(str(results)) == {"greggs_gb": 120.5, "costa_gb": 0.0}
+
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"group": "gb", "spiders": {"greggs_gb": {"elapsed_time": 120.5}}}))
+    assert load_timings(str(manifest)) == {"greggs_gb": 120.5}
+
+
+def test_longest_first():
+    spider_names = ["a", "b", "c", "d", "e", "f"]
+    durations = predict_durations(spider_names, {"a": 1, "b": 1, "c": 1, "d": 1, "e": 10, "f": 5, "old": 100})
+    assert durations == {"a": 1, "b": 1, "c": 1, "d": 1, "e": 10, "f": 5}
+    assert predict_durations(["x", "a"], {"a": 4, "b": 2, "c": 6})["x"] == 4
+    # Spiders killed or timed out in the previous run are predicted to run until the timeout.
+    assert predict_durations(["a", "b", "killed"], {"a": 4, "b": 2, "killed": 0}, 900) == {
+        "a": 4,
+        "b": 2,
+        "killed": 900,
+    }
+    assert predict_durations(["a", "b", "killed"], {"a": 4, "b": 2, "killed": 0})["killed"] == 4
+
+    ordered = longest_first(spider_names, durations)
+    assert ordered == ["e", "f", "a", "b", "c", "d"]
+    # In the given order "e" starts last, after the quick spiders.
+    assert predict_makespan(spider_names, durations, 2) == 12
+    assert predict_makespan(ordered, durations, 2) == 10
+    assert predict_makespan([], durations, 2) == 0
@@ -1,4 +1,7 @@
-from locations.dict_parser import DictParser
+from collections import OrderedDict
+from random import Random
+
+from locations.dict_parser import DictParser, KeyPlan, KeySchemaCache, KeyVariations
 
 
 def test_dict_parse():
@@ -255,3 +258,57 @@ def test_geometry_parse():
     src = {"geometry": {"coordinates": [-77.0633046, 38.9069966], "type": "Point"}}
     item = DictParser.parse(src)
     assert item["geometry"]["coordinates"] == [-77.0633046, 38.9069966]
+
+
+def probe_first_key(obj: dict, keys: list[str]):
+    for key in keys:
+        for variation in KeyVariations.get_variations(key):
+            if obj.get(variation):
+                return obj[variation]
+
+
+def test_key_plan_matches_probing():
+    random = Random(0)
+    fields = {
+        "ref": DictParser.ref_keys,
+        "lat": DictParser.lat_keys,
+        "city": DictParser.city_keys,
+    }
+    plan = KeyPlan(fields)
+    variations = sorted({v for keys in fields.values() for key in keys for v in KeyVariations.get_variations(key)})
+    for _ in range(500):
+        obj = {variation: random.choice([variation, "", None]) for variation in random.sample(variations, 6)}
+        obj["unrelated"] = "x"
+        resolved = plan.resolve(obj)
+        for field, keys in fields.items():
+            assert resolved.get(field) == probe_first_key(obj, keys)
+            assert DictParser.get_first_key(obj, keys) == probe_first_key(obj, keys)
+
+
+def test_key_plan_priority():
+    obj = {"storeId": "store", "ID": "id", "ref": "", "latitude": 0, "lat": "1.5"}
+    assert DictParser.get_first_key(obj, DictParser.ref_keys) == "id"
+    assert DictParser.get_first_key(obj, DictParser.lat_keys) == "1.5"
+    assert DictParser.get_first_key(OrderedDict(obj), DictParser.ref_keys) == "id"
+
+    item = DictParser.parse(obj)
+    assert item["ref"] == "id"
+    assert item["lat"] == "1.5"
+
+
+def test_key_schema_cache():
+    random = Random(0)
+    key_cache = KeySchemaCache()
+    signatures = [
+        ["id", "storeId", "name", "lat", "lng", "address", "contact", "unrelated"],
+        ["ID", "ref", "title", "latitude", "longitude", "city", "phone", "email"],
+    ]
+    for _ in range(200):
+        obj = {key: random.choice(["a", "b", "", None]) for key in random.choice(signatures)}
+        if "address" in obj and random.random() < 0.5:
+            obj["address"] = {"city": random.choice(["c", ""]), "zip": random.choice(["d", None])}
+        if "contact" in obj and random.random() < 0.5:
+            obj["contact"] = {"tel": random.choice(["e", ""])}
+        assert key_cache.resolve(obj) == DictParser.get_parse_plan().resolve(obj)
+        assert DictParser.parse(obj, key_cache) == DictParser.parse(obj)
+    assert len(key_cache.schemas) == 4
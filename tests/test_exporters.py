@@ -1,8 +1,13 @@
 import io
+import json
 import os
 import tempfile
 
-from locations.exporters.geojson import GeoJsonExporter, item_to_properties
+from scrapy import Spider, signals
+from scrapy.utils.misc import build_from_crawler
+from scrapy.utils.test import get_crawler
+
+from locations.exporters.geojson import FeatureCache, GeoJsonExporter, item_to_properties
 from locations.exporters.geoparquet import GeoparquetExporter
 from locations.exporters.ld_geojson import LineDelimitedGeoJsonExporter
 from locations.items import Feature, SocialMedia, set_lat_lon, set_social_media
@@ -63,6 +68,91 @@ def test_has_geom():
     assert has_geom(ld_geojson_exporter._get_serialized_fields(item))
 
 
+def test_dataset_attributes_from_crawler(monkeypatch):
+    class ExampleSpider(Spider):
+        name = "example"
+        dataset_attributes = {"source": "api"}
+        custom_settings = {"ROBOTSTXT_OBEY": False}
+
+    def find_spider_class(spider_name):
+        raise AssertionError("spider modules walked")
+
+    monkeypatch.setattr("locations.exporters.geojson.find_spider_class", find_spider_class)
+    crawler = get_crawler(ExampleSpider)
+    item = Feature(ref="1", extras={"@spider": "example"})
+
+    geojson_output = io.BytesIO()
+    geojson_exporter = build_from_crawler(GeoJsonExporter, crawler, geojson_output)
+    geojson_exporter.export_item(item)
+    geojson_exporter.finish_exporting()
+    ld_geojson_exporter = build_from_crawler(LineDelimitedGeoJsonExporter, crawler, io.BytesIO())
+    ld_geojson_exporter.export_item(item)
+
+    dataset_attributes = json.loads(geojson_output.getvalue())["dataset_attributes"]
+    assert dataset_attributes["source"] == "api"
+    assert dataset_attributes["spider:robots_txt"] == "ignored"
+    assert dataset_attributes["@spider"] == "example"
+    # Computed once per crawl, without changing the spider class.
+    assert ld_geojson_exporter.dataset_attributes == dataset_attributes
+    assert ExampleSpider.dataset_attributes == {"source": "api"}
+
+
+def test_feature_parts_shared_between_exporters(monkeypatch):
+    class ExampleSpider(Spider):
+        name = "example"
+
+    calls = []
+
+    def item_to_properties_counted(item):
+        calls.append(item["ref"])
+        return item_to_properties(item)
+
+    monkeypatch.setitem(FeatureCache.parts, "properties", item_to_properties_counted)
+    crawler = get_crawler(ExampleSpider)
+    geojson_exporter = build_from_crawler(GeoJsonExporter, crawler, io.BytesIO())
+    ld_geojson_exporter = build_from_crawler(LineDelimitedGeoJsonExporter, crawler, io.BytesIO())
+    geoparquet_exporter = build_from_crawler(GeoparquetExporter, crawler, io.BytesIO())
+
+    item = Feature(ref="1", name="Shop", lat=1.0, lon=2.0, extras={"@spider": "example"})
+    for ref in ["1", "2"]:
+        item["ref"] = ref
+        geojson_fields = dict(geojson_exporter._get_serialized_fields(item))
+        ld_geojson_fields = dict(ld_geojson_exporter._get_serialized_fields(item))
+        geoparquet_exporter.export_item(item)
+        crawler.signals.send_catch_log(signals.item_scraped, item=item, spider=None)
+        assert (
+            geojson_fields["properties"]
+            == ld_geojson_fields["properties"]
+            == {"ref": ref, "name": "Shop", "@spider": "example"}
+        )
+        assert geojson_fields["id"] == ld_geojson_fields["id"]
+
+    # Computed once per item, even though the same item object was modified.
+    assert calls == ["1", "2"]
+    assert [row["ref"] for row in geoparquet_exporter.rows] == ["1", "2"]
+
+
+def test_feature_encoding_shared_between_exporters():
+    class ExampleSpider(Spider):
+        name = "example"
+
+    crawler = get_crawler(ExampleSpider, {"FEED_EXPORT_ENCODING": "utf-8"})
+    geojson_exporter = build_from_crawler(GeoJsonExporter, crawler, io.BytesIO(), encoding="utf-8")
+    ld_geojson_exporter = build_from_crawler(LineDelimitedGeoJsonExporter, crawler, io.BytesIO(), encoding="utf-8")
+
+    item = Feature(ref="1", name="Café", lat=1.5, lon=2.25, extras={"@spider": "example", "level": 3})
+    expected = []
+    for exporter in [geojson_exporter, ld_geojson_exporter]:
+        exporter.export_item(item)
+        expected.append(exporter.encoder.encode(dict(exporter._get_serialized_fields(item))))
+
+    assert geojson_exporter.file.getvalue().endswith(expected[0].encode("utf-8"))
+    assert ld_geojson_exporter.file.getvalue() == (expected[1] + "\n").encode("utf-8")
+    # Properties were encoded once, for both exporters.
+    feature_cache = geojson_exporter.get_feature_cache()
+    assert len([key for key in feature_cache.values if isinstance(key, tuple) and key[0] == "properties"]) == 1
+
+
 def test_item_socials():
     item = Feature()
     item["ref"] = "a"
@@ -147,3 +237,34 @@ def test_geoparquet_exporter_with_bytesio():
     exporter.finish_exporting()
 
     assert len(output.getvalue()) > 0, "BytesIO output should not be empty"
+
+
+def test_geoparquet_exporter_row_groups():
+    """Test that geoparquet exporter writes row groups and the union of all attributes"""
+    import json
+
+    import geopandas
+    import pyarrow.parquet
+
+    output = io.BytesIO()
+    exporter = GeoparquetExporter(output, row_group_size=2)
+    for i in range(5):
+        item = Feature(ref=str(i))
+        set_lat_lon(item, float(i), float(i * 2))
+        if i == 3:
+            item["extras"]["late_attribute"] = i
+        exporter.export_item(item)
+    exporter.export_item(Feature(ref="no_geometry"))
+    exporter.finish_exporting()
+
+    parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(output.getvalue()))
+    assert parquet_file.num_row_groups == 3
+    assert parquet_file.schema_arrow.field("late_attribute").type == pyarrow.string()
+    geo_metadata = json.loads(parquet_file.metadata.metadata[b"geo"])
+    assert geo_metadata["columns"]["geometry"]["bbox"] == [0.0, 0.0, 8.0, 4.0]
+    assert geo_metadata["columns"]["geometry"]["geometry_types"] == ["Point"]
+
+    gdf = geopandas.read_parquet(io.BytesIO(output.getvalue()))
+    assert gdf["ref"].tolist() == ["0", "1", "2", "3", "4", "no_geometry"]
+    assert gdf.iloc[3]["late_attribute"] == "3"
+    assert gdf.iloc[5]["geometry"] is None
@@ -7,9 +7,11 @@ from locations.geo import (
     convert_gj2008_to_rfc7946_point_geometry,
     country_iseadgg_centroids,
     extract_geojson_point_geometry,
+    haversine_distance,
     make_subdivisions,
     point_locations,
     postal_regions,
+    vincenty_distance,
 )
 
 
@@ -110,6 +112,26 @@ def test_postal_regions():
     assert 3000 < us_codes < 3500
 
 
+def test_postal_regions_population_filter():
+    us_codes = list(postal_regions("US"))
+    min_population_codes = list(postal_regions("US", min_population=20000))
+    # Filtered postal regions are in file order.
+    kept = {code["postal_region"] for code in min_population_codes}
+    assert [code for code in us_codes if code["postal_region"] in kept] == min_population_codes
+
+    cities = list(postal_regions("US", min_population=50000, consolidate_cities=True))
+    assert {code["postal_region"] for code in cities} <= {
+        code["postal_region"] for code in postal_regions("US", min_population=50000)
+    }
+
+
+def test_postal_regions_missing_values():
+    fr_codes = list(postal_regions("FR"))
+    assert 39000 < len(fr_codes) < 40000
+    assert any(code["longitude"] is None for code in fr_codes)
+    assert all(isinstance(code["postal_region"], str) for code in fr_codes)
+
+
 def test_make_subdivisions():
     out = make_subdivisions((0, 0, 100, 100), 2)
     assert len(out) == 4
@@ -326,3 +348,11 @@ def test_bbox_split():
         ((80.05, 179.9), (74.95, -169.9)),
         ((75.05, 179.9), (69.95, -169.9)),
     ]
+
+
+def test_haversine_distance():
+    assert haversine_distance(51.5, -0.1, 51.5, -0.1) == 0
+    # London to Paris.
+    assert round(haversine_distance(51.5074, -0.1278, 48.8566, 2.3522)) == 344
+    lat, lon = vincenty_distance(-33.87, 151.21, 100, 45)
+    assert abs(haversine_distance(-33.87, 151.21, lat, lon) - 100) < 0.001
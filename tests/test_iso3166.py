@@ -0,0 +1,53 @@
+import pycountry
+
+from locations.iso3166 import fold, get_country_code, get_subdivision_code, is_iso_3166_1_alpha_2
+from locations.items import Feature
+
+
+def test_fold():
+    assert fold(" Québec ") == "quebec"
+    assert fold("BADEN-WÜRTTEMBERG") == "baden-wurttemberg"
+
+
+def test_is_iso_3166_1_alpha_2():
+    assert is_iso_3166_1_alpha_2("AU")
+    assert not is_iso_3166_1_alpha_2("au")
+    assert not is_iso_3166_1_alpha_2("UK")
+
+
+def test_get_country_code():
+    assert get_country_code("AUS") == "AU"
+    assert get_country_code("czech republic") == "CZ"
+    assert get_country_code("Türkiye") == "TR"
+    assert get_country_code("Nowhere") is None
+
+
+def test_get_subdivision_code():
+    assert get_subdivision_code("CA", "ON") == "CA-ON"
+    assert get_subdivision_code("CA", "Ontario") == "CA-ON"
+    assert get_subdivision_code("CA", "ontario") is None
+    assert get_subdivision_code("CA", "ontario", folded=True) == "CA-ON"
+    assert get_subdivision_code("DE", "Baden-Wurttemberg", folded=True) == "DE-BW"
+    assert get_subdivision_code("XX", "ON") is None
+
+
+def test_feature_iso_3166_2_code():
+    assert Feature(country="AU", state="NSW").get_iso_3166_2_code() == "AU-NSW"
+    assert Feature(country="AU", state="New South Wales").get_iso_3166_2_code() == "AU-NSW"
+    assert Feature(country="AU", state="Nowhere").get_iso_3166_2_code() is None
+    assert Feature(country="UK", state="England").get_iso_3166_2_code() is None
+    assert Feature(country=["AU"]).has_valid_country_code() is False
+
+
+def test_subdivision_code_matches_pycountry_scan():
+    for country in pycountry.countries:
+        subdivisions = pycountry.subdivisions.get(country_code=country.alpha_2) or []
+        for state in {
+            key for subdivision in subdivisions for key in [subdivision.code.split("-", 1)[1], subdivision.name]
+        }:
+            expected = next(
+                subdivision.code
+                for subdivision in subdivisions
+                if state in [subdivision.code.split("-", 1)[1], subdivision.name]
+            )
+            assert get_subdivision_code(country.alpha_2, state) == expected
@@ -1,4 +1,4 @@
-from locations.items import Feature, merge_items
+from locations.items import Feature, ItemMerger, merge_items
 
 
 def return_first_merged(language_dict, main_language) -> Feature:
@@ -152,3 +152,25 @@ def test_translatable_prefix():
             "website:menu:fr": "example.com/fr/menu",
         },
     }
+
+
+def test_item_merger_merges_when_complete():
+    merger = ItemMerger(["en", "fr"], "en")
+    assert list(merger.add({"ref": "1", "name": "Magasin", "extras": {}}, "fr")) == []
+    assert list(merger.add({"ref": "2", "name": "Shop 2", "extras": {}}, "en")) == []
+    assert list(merger.add({"ref": "1", "name": "Shop", "extras": {}}, "en")) == [
+        {"ref": "1", "name": "Shop", "extras": {"name:en": "Shop", "name:fr": "Magasin"}}
+    ]
+    assert list(merger.pending) == ["2"]
+
+
+def test_item_merger_flush():
+    merger = ItemMerger(["en", "fr"], "en")
+    list(merger.add({"ref": "1", "name": "Magasin", "extras": {}}, "fr"))
+    list(merger.add({"ref": "2", "name": "Shop", "extras": {}}, "en"))
+    assert list(merger.flush()) == [
+        {"ref": "2", "name": "Shop", "extras": {}},
+        {"ref": "1", "name": "Magasin", "extras": {}},
+    ]
+    assert merger.pending == {}
+    assert list(merger.flush()) == []
@@ -1,4 +1,7 @@
-from locations.name_suggestion_index import NSI
+import json
+
+from locations import name_suggestion_index
+from locations.name_suggestion_index import NSI, NSISnapshot
 
 
 def test_nsi_lookup_wikidata():
@@ -49,3 +52,119 @@ def test_iter_nsi():
     i = matches[0]
     assert i["displayName"] == "Greggs"
     assert i["tags"]["amenity"] == "fast_food"
+
+
+def get_fixture_nsi() -> NSI:
+    # Bypass the singleton so that fixture data does not leak into other tests.
+    nsi = NSI.__new__(NSI)
+    nsi.__init__()
+    nsi.wikidata_json = {
+        "Q1": {"label": "Greggs", "officialWebsites": ["https://www.greggs.co.uk/"]},
+        "Q2": {"label": "Café Greggs & Co", "officialWebsites": ["https://shop.greggs.com/", "https://greggs.ie"]},
+        "Q3": {"label": "Tesco", "officialWebsites": ["https://www.tesco.com"]},
+        "Q4": {"officialWebsites": ["https://example.org"]},
+    }
+    nsi.nsi_json = {
+        "brands/shop/bakery": {
+            "items": [
+                {"id": "a", "locationSet": {"include": ["gb"]}, "tags": {"brand:wikidata": "Q1"}},
+                {"id": "b", "locationSet": {"include": ["ie", "gb"]}, "tags": {"brand:wikidata": "Q2"}},
+            ]
+        },
+        "operators/amenity/toilets": {
+            "items": [
+                {
+                    "id": "c",
+                    "locationSet": {"include": ["001"]},
+                    "tags": {"brand:wikidata": "Q3", "operator:wikidata": "Q1"},
+                },
+                {
+                    "id": "d",
+                    "locationSet": {"include": ["gb"]},
+                    "tags": {"brand:wikidata": "Q1", "operator:wikidata": "Q1"},
+                },
+            ]
+        },
+    }
+    nsi.loaded = True
+    return nsi
+
+
+def test_iter_nsi_index():
+    nsi = get_fixture_nsi()
+    assert [i["id"] for i in nsi.iter_nsi("Q1")] == ["a", "c", "d"]
+    assert [i["id"] for i in nsi.iter_nsi("Q3")] == ["c"]
+    assert list(nsi.iter_nsi("Q404")) == []
+    assert [i["id"] for i in nsi.iter_nsi()] == ["a", "b", "c", "d"]
+
+
+def test_iter_country_index():
+    nsi = get_fixture_nsi()
+    assert [i["id"] for i in nsi.iter_country("GB")] == ["a", "b", "d"]
+    assert [i["id"] for i in nsi.iter_country("001")] == ["c"]
+    assert len(list(nsi.iter_country())) == 4
+
+
+def test_get_wikidata_code_from_url_index():
+    nsi = get_fixture_nsi()
+    # Exact FQDN match
+    assert nsi.get_wikidata_code_from_url("https://shop.greggs.com/menu") == "Q2"
+    # Match excluding "www." prefix
+    assert nsi.get_wikidata_code_from_url("https://tesco.com/stores") == "Q3"
+    # Registered domain match
+    assert nsi.get_wikidata_code_from_url("https://stores.greggs.ie/") == "Q2"
+    assert nsi.get_wikidata_code_from_url("https://stores.example.org/") == "Q4"
+    assert nsi.get_wikidata_code_from_url("https://example.com/") is None
+
+
+def test_iter_wikidata_index():
+    nsi = get_fixture_nsi()
+    assert [k for k, v in nsi.iter_wikidata("greggs")] == ["Q1", "Q2"]
+    assert [k for k, v in nsi.iter_wikidata("Cafe Greggs and")] == ["Q2"]
+    assert [k for k, v in nsi.iter_wikidata("gst")] == []
+    assert [k for k, v in nsi.iter_wikidata("s")] == ["Q1", "Q2", "Q3"]
+    assert [k for k, v in nsi.iter_wikidata("!")] == ["Q1", "Q2", "Q3"]
+    assert [k for k, v in nsi.iter_wikidata()] == ["Q1", "Q2", "Q3", "Q4"]
+
+
+def test_get_wikidata_codes_from_label():
+    nsi = get_fixture_nsi()
+    assert nsi.get_wikidata_codes_from_label("GREGGS") == ["Q1"]
+    assert nsi.get_wikidata_codes_from_label("Café Greggs and Co.") == ["Q2"]
+    assert nsi.get_wikidata_codes_from_label("Gregg") == []
+
+
+def test_nsi_snapshot(tmp_path, monkeypatch):
+    fixture = get_fixture_nsi()
+    nsi_file = tmp_path / "nsi.json"
+    wikidata_file = tmp_path / "nsi-wikidata.json"
+    snapshot_file = tmp_path / "nsi.snapshot"
+    nsi_file.write_text(json.dumps({"nsi": fixture.nsi_json}))
+    wikidata_file.write_text(json.dumps({"wikidata": fixture.wikidata_json}))
+    monkeypatch.setattr(name_suggestion_index, "NSI_FILE_PATH", nsi_file)
+    monkeypatch.setattr(name_suggestion_index, "WIKIDATA_FILE_PATH", wikidata_file)
+
+    assert NSISnapshot.open_if_fresh(snapshot_file) is None
+    NSISnapshot.write(snapshot_file)
+    snapshot = NSISnapshot.open_if_fresh(snapshot_file)
+    assert snapshot is not None
+    assert dict(snapshot.wikidata.items()) == fixture.wikidata_json
+    assert {k: v for k, v in snapshot.nsi.items()} == fixture.nsi_json
+    assert snapshot.nsi_items[-1]["id"] == "d"
+
+    nsi = NSI.__new__(NSI)
+    nsi.__init__()
+    monkeypatch.setattr(name_suggestion_index, "NSI_SNAPSHOT_FILE_PATH", snapshot_file)
+    nsi._ensure_loaded()
+    assert nsi._snapshot is not None
+    assert [i["id"] for i in nsi.iter_nsi("Q1")] == ["a", "c", "d"]
+    assert [i["id"] for i in nsi.iter_country("gb")] == ["a", "b", "d"]
+    assert nsi.get_wikidata_code_from_url("https://stores.greggs.ie/") == "Q2"
+    assert [k for k, v in nsi.iter_wikidata("greggs")] == ["Q1", "Q2"]
+    assert nsi.get_wikidata_codes_from_label("Tesco") == ["Q3"]
+    assert nsi.lookup_wikidata("Q3") == fixture.wikidata_json["Q3"]
+    assert nsi.lookup_wikidata("Q404") is None
+
+    # Changing the source JSON invalidates the snapshot.
+    nsi_file.write_text(json.dumps({"nsi": {}}))
+    assert NSISnapshot.open_if_fresh(snapshot_file) is None
@@ -18,7 +18,9 @@ from locations.hours import (
     NAMED_TIMES_RU,
     OpeningHours,
     day_range,
+    minutes_to_time,
     sanitise_day,
+    time_to_minutes,
 )
 
 
@@ -398,3 +400,53 @@ def test_oh_as_bool():
     o = OpeningHours()
     o.set_closed("Mo")
     assert o
+
+
+def test_extract_hours_from_string_cache():
+    OpeningHours._extract_hours_from_string.cache_clear()
+    results = OpeningHours.extract_hours_from_string("Mon-Fri 9am-5pm, Sun closed")
+    assert results == [(["Mo", "Tu", "We", "Th", "Fr"], "09:00", "17:00"), (["Su"], "closed", "closed")]
+
+    # Modifying the results must not affect later calls.
+    results[0][0].clear()
+    assert OpeningHours.extract_hours_from_string("Mon-Fri 9am-5pm, Sun closed")[0][0] == ["Mo", "Tu", "We", "Th", "Fr"]
+    assert OpeningHours._extract_hours_from_string.cache_info().hits == 1
+
+    # Locales are compared by content, not identity.
+    days = dict(DAYS_DE)
+    assert OpeningHours.extract_hours_from_string("Mo-Fr 09:00-17:00", days=days) == [
+        (["Mo", "Tu", "We", "Th", "Fr"], "09:00", "17:00")
+    ]
+    days["Montag"] = "Tu"
+    assert OpeningHours.extract_hours_from_string("Montag 09:00-17:00", days=days) == [(["Tu"], "09:00", "17:00")]
+
+
+def test_time_to_minutes():
+    assert time_to_minutes("9:05") == 545
+    assert time_to_minutes("09:05:59", "%H:%M:%S") == 545
+    assert time_to_minutes("9:5") == 545
+    assert time_to_minutes("9:05 PM", "%I:%M %p") == 1265
+    assert time_to_minutes(time.strptime("23:59", "%H:%M")) == 1439
+    assert minutes_to_time(545) == "09:05"
+
+
+def test_add_range_struct_time():
+    o = OpeningHours()
+    o.add_range("Mo", time.strptime("09:00", "%H:%M"), time.strptime("17:00", "%H:%M"))
+    o.add_range("Tu", "09:00", "17:00")
+    o.add_range("We", "9:00:00", "17:00:00", "%H:%M:%S")
+    o.add_range("Th", "22:00", "0:00")
+    assert o.day_hours["Mo"] == {(540, 1020)}
+    assert o.as_opening_hours() == "Mo-We 09:00-17:00; Th 22:00-24:00"
+
+
+def test_add_range_seconds_ignored():
+    # Ranges are kept to the minute, so ranges differing only by seconds are
+    # one range, and ranges are ordered by their minutes.
+    o = OpeningHours()
+    o.add_range("Mo", "10:00:00", "17:00:00", "%H:%M:%S")
+    o.add_range("Mo", "10:00:30", "17:00:59", "%H:%M:%S")
+    o.add_range("Tu", "10:00:00", "17:00:00", "%H:%M:%S")
+    o.add_range("Tu", "10:00:30", "12:00:00", "%H:%M:%S")
+    assert o.day_hours["Mo"] == {(600, 1020)}
+    assert o.as_opening_hours() == "Mo 10:00-17:00; Tu 10:00-12:00,10:00-17:00"
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from scrapy import Request
+from scrapy.core.spidermw import SpiderMiddlewareManager
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.pipelines import ItemPipelineManager
+from scrapy.utils.spider import DefaultSpider
+from scrapy.utils.test import get_crawler
+
+from locations.extensions.perf_stats import ComponentTimer, PerfStatsExtension
+from locations.items import Feature
+
+
+def get_objects(settings: dict):
+    crawler = get_crawler(
+        DefaultSpider,
+        {
+            "PERF_STATS_ENABLED": True,
+            "ITEM_PIPELINES": {"locations.pipelines.count_brands.CountBrandsPipeline": 810},
+            "SPIDER_MIDDLEWARES": {"locations.middlewares.track_sources.TrackSourcesMiddleware": 500},
+        }
+        | settings,
+    )
+    crawler.spider = crawler._create_spider()
+    extension = PerfStatsExtension.from_crawler(crawler)
+    itemproc = ItemPipelineManager.from_crawler(crawler)
+    spidermw = SpiderMiddlewareManager.from_crawler(crawler)
+    crawler.engine = SimpleNamespace(scraper=SimpleNamespace(itemproc=itemproc, spidermw=spidermw))
+    asyncio.run(itemproc.open_spider_async())
+    extension.spider_opened(crawler.spider)
+    return crawler, itemproc, spidermw
+
+
+def parse_store(response):
+    for ref in range(3):
+        time.sleep(0.002)
+        yield Feature(ref=ref, brand="Example")
+
+
+def scrape(crawler, itemproc, spidermw) -> list:
+    request = Request("https://example.com/", callback=parse_store)
+    response = HtmlResponse("https://example.com/", body=b"", request=request)
+
+    async def call_spider(response, request):
+        return request.callback(response)
+
+    async def crawl():
+        items = [item async for item in await spidermw.scrape_response_async(call_spider, response, request)]
+        return [await itemproc.process_item_async(item) for item in items]
+
+    return asyncio.run(crawl())
+
+
+def test_disabled():
+    with pytest.raises(NotConfigured):
+        PerfStatsExtension.from_crawler(get_crawler(DefaultSpider))
+
+
+def test_component_timer():
+    crawler = get_crawler(DefaultSpider)
+    timer = ComponentTimer(crawler.stats, "atp/perf/pipeline/Example", sample_every=2)
+    assert [timer.sample() for _ in range(4)] == [False, True, False, True]
+    timer.record(50_000)
+    timer.record(2_000_000_000)
+    assert crawler.stats.get_value("atp/perf/pipeline/Example/count") == 2
+    assert crawler.stats.get_value("atp/perf/pipeline/Example/time_ns") == 2_000_050_000
+    assert crawler.stats.get_value("atp/perf/pipeline/Example/latency/le_100us") == 1
+    assert crawler.stats.get_value("atp/perf/pipeline/Example/latency/gt_1s") == 1
+
+
+def test_components_timed():
+    crawler, itemproc, spidermw = get_objects({})
+    items = scrape(crawler, itemproc, spidermw)
+
+    assert [item["ref"] for item in items] == [0, 1, 2]
+    assert items[0]["extras"]["@source_uri"] == "https://example.com/"
+    assert crawler.stats.get_value("atp/brand/Example") == 3
+    assert crawler.stats.get_value("atp/perf/pipeline/CountBrandsPipeline/count") == 3
+    assert crawler.stats.get_value("atp/perf/spider_output/TrackSourcesMiddleware/count") == 1
+    assert crawler.stats.get_value("atp/perf/callback/parse_store/count") == 1
+    assert crawler.stats.get_value("atp/perf/callback/parse_store/time_ns") >= 6_000_000
+    # Middlewares exclude the time of the callback.
+    assert crawler.stats.get_value("atp/perf/spider_output/TrackSourcesMiddleware/time_ns") < 6_000_000
+
+
+def test_sampled():
+    crawler, itemproc, spidermw = get_objects({"PERF_STATS_SAMPLE_EVERY": 2})
+    scrape(crawler, itemproc, spidermw)
+
+    assert crawler.stats.get_value("atp/perf/sample_every") == 2
+    assert crawler.stats.get_value("atp/perf/pipeline/CountBrandsPipeline/count") == 1
+    assert crawler.stats.get_value("atp/perf/spider_output/TrackSourcesMiddleware/count") is None
+    assert crawler.stats.get_value("atp/brand/Example") == 3
+
+
+def test_fused_pipelines_timed():
+    crawler, itemproc, spidermw = get_objects(
+        {
+            "ITEM_PIPELINES": {"locations.pipelines.fused.FusedItemPipeline": 200},
+            "FUSED_ITEM_PIPELINES": {
+                "locations.pipelines.apply_spider_name.ApplySpiderNamePipeline": 350,
+                "locations.pipelines.count_brands.CountBrandsPipeline": 810,
+            },
+        }
+    )
+    items = scrape(crawler, itemproc, spidermw)
+
+    assert items[0]["extras"]["@spider"] == "default"
+    assert crawler.stats.get_value("atp/brand/Example") == 3
+    assert crawler.stats.get_value("atp/perf/pipeline/FusedItemPipeline/count") == 3
+    assert crawler.stats.get_value("atp/perf/pipeline/ApplySpiderNamePipeline/count") == 3
+    assert crawler.stats.get_value("atp/perf/pipeline/CountBrandsPipeline/count") == 3
@@ -310,3 +310,51 @@ def test_brand_state_not_required():
     )
     pipeline.process_item(item)
     assert item.get("nsi_id")
+
+
+def test_nsi_entry_includes_location():
+    nsi_entry = {"locationSet": {"include": ["us", "au-nsw.geojson"], "exclude": ["us-tx"]}}
+    assert ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "US")
+    assert ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "US-CA")
+    assert not ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "US-TX")
+    assert ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "AU-NSW")
+    assert not ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "AU")
+    assert not ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, None)
+
+    nsi_entry = {"locationSet": {"include": ["001"], "exclude": ["gb"]}}
+    assert ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, None)
+    assert ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "FR")
+    assert not ApplyNSICategoriesPipeline.nsi_entry_includes_location(nsi_entry, "GB-ENG")
+
+    assert not ApplyNSICategoriesPipeline.nsi_entry_includes_location({"locationSet": {"include": []}}, None)
+    assert not ApplyNSICategoriesPipeline.nsi_entry_includes_location({}, "US")
+
+
+def test_match_cache(monkeypatch):
+    nsi_entry = {
+        "id": "example-8bc4d5",
+        "locationSet": {"include": ["us"]},
+        "tags": {"brand": "Example", "brand:wikidata": "Q0", "shop": "supermarket"},
+    }
+    monkeypatch.setattr(ApplyNSICategoriesPipeline, "wikidata_cache", {"Q0": [nsi_entry]})
+    monkeypatch.setattr(ApplyNSICategoriesPipeline, "match_cache", {})
+    monkeypatch.setattr(ApplyNSICategoriesPipeline, "location_set_cache", {})
+
+    crawler = get_crawler()
+    pipeline = ApplyNSICategoriesPipeline.from_crawler(crawler)
+    for _ in range(3):
+        item = Feature(brand_wikidata="Q0", country="US", state="TX")
+        apply_category(Categories.SHOP_SUPERMARKET, item)
+        pipeline.process_item(item)
+        assert item["nsi_id"] == "example-8bc4d5"
+        assert item["brand"] == "Example"
+
+    item = Feature(brand_wikidata="Q0", country="GB")
+    apply_category(Categories.SHOP_SUPERMARKET, item)
+    pipeline.process_item(item)
+    assert not item.get("nsi_id")
+
+    assert len(ApplyNSICategoriesPipeline.match_cache) == 2
+    assert crawler.stats.get_value("atp/nsi/match_perfect") == 3
+    assert crawler.stats.get_value("atp/nsi/location_unknown") == 1
+    assert crawler.stats.get_value("atp/nsi/match_failed") == 1
@@ -0,0 +1,178 @@
+import pytest
+from scrapy import Spider
+from scrapy.crawler import Crawler
+from scrapy.exceptions import DropItem
+from scrapy.utils.misc import build_from_crawler
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.test import get_crawler
+
+from locations.address_spider import AddressSpider
+from locations.categories import Categories, apply_category
+from locations.items import Feature
+from locations.pipelines.apply_spider_level_attributes import ApplySpiderLevelAttributesPipeline
+from locations.pipelines.apply_spider_name import ApplySpiderNamePipeline
+from locations.pipelines.check_item_properties import CheckItemPropertiesPipeline
+from locations.pipelines.clean_strings import CleanStringsPipeline
+from locations.pipelines.count_categories import CountCategoriesPipeline
+from locations.pipelines.country_code_clean_up import CountryCodeCleanUpPipeline
+from locations.pipelines.drop_attributes import DropAttributesPipeline
+from locations.pipelines.duplicates import DuplicatesPipeline
+from locations.pipelines.fused import FusedItemPipeline, ItemContext, get_fused_step
+from locations.pipelines.state_clean_up import StateCodeCleanUpPipeline
+from locations.pipelines.tag_duplicator import TagDuplicatorPipeline
+
+PIPELINES = [
+    DuplicatesPipeline,
+    DropAttributesPipeline,
+    ApplySpiderLevelAttributesPipeline,
+    ApplySpiderNamePipeline,
+    CountryCodeCleanUpPipeline,
+    StateCodeCleanUpPipeline,
+    CountCategoriesPipeline,
+    TagDuplicatorPipeline,
+]
+
+
+class ExampleSpider(Spider):
+    name = "example"
+    item_attributes = {"brand": "Example", "extras": {"shop": "florist"}}
+
+
+def get_items() -> list[Feature]:
+    items = [
+        Feature(ref="1", country="GB", email="info@example.com"),
+        Feature(ref="2", lat=29.76, lon=-95.36, state="Texas"),
+        Feature(ref="3", lat=51.5, lon=-0.12),
+        Feature(ref="1", country="GB"),
+    ]
+    apply_category(Categories.PHARMACY, items[1])
+    return items
+
+
+def get_pipeline(spider_class: type[Spider], settings: dict | None = None) -> FusedItemPipeline:
+    crawler = get_crawler(
+        spider_class,
+        {
+            "ITEM_PIPELINES": {"locations.pipelines.fused.FusedItemPipeline": 200},
+            "FUSED_ITEM_PIPELINES": {pipeline: order for order, pipeline in enumerate(PIPELINES)},
+        }
+        | (settings or {}),
+    )
+    crawler.spider = crawler._create_spider()
+    pipeline = FusedItemPipeline.from_crawler(crawler)
+    pipeline.open_spider()
+    return pipeline
+
+
+def process_items(pipeline, items: list[Feature]) -> list[Feature | None]:
+    results = []
+    for item in items:
+        try:
+            results.append(pipeline.process_item(item))
+        except DropItem:
+            results.append(None)
+    return results
+
+
+def get_stats(crawler) -> dict:
+    return {k: v for k, v in crawler.stats.get_stats().items() if k.startswith("atp/")}
+
+
+def test_same_as_pipelines():
+    fused = get_pipeline(ExampleSpider)
+    fused_results = process_items(fused, get_items())
+
+    crawler = get_crawler(ExampleSpider)
+    crawler.spider = crawler._create_spider()
+    pipelines = [build_from_crawler(pipeline_class, crawler) for pipeline_class in PIPELINES]
+    results = []
+    for item in get_items():
+        try:
+            for pipeline in pipelines:
+                item = pipeline.process_item(item)
+            results.append(item)
+        except DropItem:
+            results.append(None)
+
+    assert fused_results == results
+    assert fused_results[3] is None
+    assert fused_results[1]["state"] == "TX"
+    assert fused_results[2]["country"] == "GB"
+    assert fused_results[0]["extras"] == {"shop": "florist", "@spider": "example"}
+    assert get_stats(fused.crawler) == get_stats(crawler)
+
+
+def test_spider_attributes_resolved():
+    class NoRefsSpider(Spider):
+        name = "no_refs"
+        no_refs = True
+        drop_attributes = {"email"}
+
+    pipeline = get_pipeline(NoRefsSpider)
+    left_out = [type(p) for p in pipeline.pipelines if get_fused_step(p, pipeline.crawler.spider) is None]
+    assert left_out == [DuplicatesPipeline, ApplySpiderLevelAttributesPipeline]
+    assert len(pipeline.methods["process_item"]) == len(PIPELINES) - 2
+
+    results = process_items(pipeline, get_items())
+    assert None not in results
+    assert "email" not in results[0]
+
+
+def test_disabled_pipelines():
+    pipeline = get_pipeline(
+        ExampleSpider,
+        {
+            "ITEM_PIPELINES": {
+                "locations.pipelines.fused.FusedItemPipeline": 200,
+                "locations.pipelines.duplicates.DuplicatesPipeline": None,
+                "locations.pipelines.tag_duplicator.TagDuplicatorPipeline": 900,
+            }
+        },
+    )
+    assert DuplicatesPipeline not in [type(p) for p in pipeline.pipelines]
+    # Enabled separately, so not run twice.
+    assert TagDuplicatorPipeline not in [type(p) for p in pipeline.pipelines]
+    assert None not in process_items(pipeline, get_items())
+
+
+def test_item_context():
+    item = Feature(lat=51.5, lon=-0.12)
+    apply_category(Categories.PHARMACY, item)
+    context = ItemContext(item)
+    assert context.get_category_tags() == {"amenity": "pharmacy"}
+    assert context.get_lat_lon() == (51.5, -0.12)
+
+    item["extras"]["shop"] = "chemist"
+    assert context.get_category_tags() == {"amenity": "pharmacy"}
+    context.retain(frozenset({"lat_lon"}))
+    assert context.get_category_tags() == {"amenity": "pharmacy", "shop": "chemist"}
+    context.forget("lat_lon")
+    assert "lat_lon" not in context.values
+
+
+@pytest.mark.parametrize("spider_name,country", [("example_gb", "GB"), ("example_gb_ie", None)])
+def test_country_from_spider_name(spider_name, country):
+    class CountrySpider(Spider):
+        name = spider_name
+
+    pipeline = get_pipeline(CountrySpider)
+    assert pipeline.process_item(Feature(ref="1")).get("country") == country
+
+
+def test_address_spider_pipelines_fused():
+    class ExampleAddressSpider(AddressSpider):
+        name = "example_addresses"
+
+    # Spiders are created before the settings are frozen.
+    crawler = Crawler(ExampleAddressSpider, get_project_settings())
+    crawler.spider = crawler._create_spider()
+    crawler._apply_settings()
+    assert crawler.settings.getdict("ITEM_PIPELINES") == {"locations.pipelines.fused.FusedItemPipeline": 200}
+    pipeline = FusedItemPipeline.from_crawler(crawler)
+    assert [type(p) for p in pipeline.pipelines] == [
+        DropAttributesPipeline,
+        ApplySpiderLevelAttributesPipeline,
+        ApplySpiderNamePipeline,
+        CleanStringsPipeline,
+        CheckItemPropertiesPipeline,
+    ]
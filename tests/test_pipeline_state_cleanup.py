@@ -24,6 +24,12 @@ def test_state_name_to_code():
     pipeline.process_item(item)
     assert item["state"] == "CA"
 
+    item = Feature()
+    item["country"] = "CA"
+    item["state"] = "québec"
+    pipeline.process_item(item)
+    assert item["state"] == "QC"
+
 
 def test_coords_to_state():
     item, pipeline, spider = get_objects()
@@ -0,0 +1,52 @@
+from pyproj import Transformer
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
+
+from locations import reprojection
+from locations.geo import convert_gj2008_to_rfc7946_point_geometry
+from locations.items import Feature
+from locations.middlewares.geometry_reprojection_batch import GeometryReprojectionBatchMiddleware
+from locations.pipelines.geojson_geometry_reprojection import GeoJSONGeometryReprojectionPipeline
+from locations.reprojection import get_transformer, reproject_point, reproject_points
+from locations.spiders.greggs_gb import GreggsGBSpider
+
+# Points in Swiss LV95 (EPSG:2056)
+POINTS_2056 = [(2600000.0, 1200000.0), (2683000.0, 1248000.0), (2500000.0, 1118000.0)]
+
+
+def gj2008_geometry(x: float, y: float, epsg: int) -> dict:
+    return {"type": "Point", "coordinates": [x, y], "crs": {"type": "name", "properties": {"name": f"EPSG:{epsg}"}}}
+
+
+def test_get_transformer():
+    assert get_transformer(2056) is get_transformer(2056)
+    assert get_transformer(2056) is not get_transformer(2056, 3857)
+
+
+def test_reproject_points():
+    transformer = Transformer.from_crs(2056, 4326)
+    lats, lons = reproject_points(2056, [x for x, _ in POINTS_2056], [y for _, y in POINTS_2056])
+    for (x, y), lat, lon in zip(POINTS_2056, lats, lons):
+        assert reproject_point(2056, x, y) == transformer.transform(x, y) == (lat, lon)
+
+
+def test_batch_middleware():
+    crawler = get_crawler(GreggsGBSpider, {"GEOMETRY_REPROJECTION_BATCH_SIZE": 2})
+    middleware = GeometryReprojectionBatchMiddleware.from_crawler(crawler)
+    response = TextResponse("https://example.com/")
+
+    items = [Feature(ref="wgs84", geometry={"type": "Point", "coordinates": [8.5, 47.4]})]
+    items.extend(Feature(ref=str(i), geometry=gj2008_geometry(x, y, 2056)) for i, (x, y) in enumerate(POINTS_2056))
+    items.append(Feature(ref="web_mercator", geometry=gj2008_geometry(950000.0, 6000000.0, 3857)))
+    geometries = [dict(item["geometry"]) for item in items]
+    expected = [convert_gj2008_to_rfc7946_point_geometry(geometry) for geometry in geometries]
+
+    result = list(middleware.process_spider_output(response, iter(items)))
+    assert [item["ref"] for item in result] == ["wgs84", "0", "1", "2", "web_mercator"]
+    # Left for GeoJSONGeometryReprojectionPipeline, after the clean up pipelines.
+    assert [item["geometry"] for item in result] == geometries
+    for x, y in POINTS_2056:
+        assert (2056, x, y, 4326) in reprojection._cache
+
+    pipeline = GeoJSONGeometryReprojectionPipeline()
+    assert [pipeline.process_item(item)["geometry"] for item in result] == expected
@@ -0,0 +1,92 @@
+import reverse_geocoder
+from scrapy import Spider
+from scrapy.http import Request, TextResponse
+from scrapy.utils.test import get_crawler
+
+from locations.items import Feature
+from locations.middlewares.reverse_geocoding_batch import ReverseGeocodingBatchMiddleware
+from locations.reverse_geocoding import reverse_geocode, reverse_geocode_batch
+from locations.spiders.greggs_gb import GreggsGBSpider
+
+
+class ExampleSpider(Spider):
+    name = "example"
+
+
+def get_middleware(spider_class: type[Spider], settings: dict | None = None) -> ReverseGeocodingBatchMiddleware:
+    crawler = get_crawler(spider_class, settings)
+    crawler.spider = crawler._create_spider()
+    return ReverseGeocodingBatchMiddleware.from_crawler(crawler)
+
+
+COORDINATES = [(43.0, -80.0), (31.0, -97.0), (51.5, -0.12), (-33.87, 151.21), (31.0, -97.0)]
+
+
+def test_reverse_geocode_matches_reverse_geocoder():
+    for lat, lon in COORDINATES:
+        assert reverse_geocode(lat, lon) == reverse_geocoder.get((lat, lon), mode=1, verbose=False)
+
+
+def test_reverse_geocode_batch():
+    results = reverse_geocode_batch(COORDINATES)
+    assert [result["cc"] for result in results] == ["CA", "US", "GB", "AU", "US"]
+    assert results == [reverse_geocode(lat, lon) for lat, lon in COORDINATES]
+    assert reverse_geocode_batch([]) == []
+
+
+def test_batch_middleware_preserves_order():
+    middleware = get_middleware(ExampleSpider, {"REVERSE_GEOCODING_BATCH_SIZE": 2})
+    response = TextResponse("https://example.com/")
+
+    output = [Feature(ref="0", country="GB", state="England")]
+    output.extend(Feature(ref=str(i), lat=lat, lon=lon) for i, (lat, lon) in enumerate(COORDINATES, start=1))
+    output.insert(3, Request("https://example.com/next"))
+
+    result = list(middleware.process_spider_output(response, iter(output)))
+    assert [x["ref"] for x in result if isinstance(x, Feature)] == ["0", "1", "2", "3", "4", "5"]
+    assert len([x for x in result if isinstance(x, Request)]) == 1
+
+
+def test_batch_middleware_needs_processing():
+    middleware = get_middleware(ExampleSpider)
+    assert middleware.needs_processing(Feature(lat=51.5, lon=-0.12))
+    assert middleware.needs_processing(Feature(lat=31.0, lon=-97.0, country="US"))
+    assert middleware.needs_processing(Feature(lat=31.0, lon=-97.0, country="US", state="Nowhere"))
+    assert not middleware.needs_processing(Feature(lat=31.0, lon=-97.0, country="US", state="Texas"))
+    assert not middleware.needs_processing(Feature(lat=51.5, lon=-0.12, country="GB"))
+    assert not middleware.needs_processing(Feature(lat=51.5, lon=-0.12, website="https://example.co.uk/"))
+    assert not middleware.needs_processing(Feature(country="US"))
+
+    # The country is taken from the spider name.
+    assert not get_middleware(GreggsGBSpider).needs_processing(Feature(lat=51.5, lon=-0.12))
+
+    class SkipGeocoderSpider(Spider):
+        name = "skip_geocoder"
+        skip_auto_cc_geocoder = True
+
+    assert not get_middleware(SkipGeocoderSpider).needs_processing(Feature(lat=51.5, lon=-0.12))
+
+    class SkipSpider(Spider):
+        name = "skip_us"
+        skip_auto_cc = True
+
+    assert not get_middleware(SkipSpider).needs_processing(Feature(lat=31.0, lon=-97.0))
+
+    class AttributesSpider(Spider):
+        name = "attributes"
+        item_attributes = {"country": "US", "state": "TX"}
+
+    assert not get_middleware(AttributesSpider).needs_processing(Feature(lat=31.0, lon=-97.0))
+
+
+def test_batch_middleware_skips_items_with_country(monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        "locations.middlewares.reverse_geocoding_batch.reverse_geocode_batch",
+        lambda coordinates: batches.append(coordinates),
+    )
+    middleware = get_middleware(ExampleSpider, {"REVERSE_GEOCODING_BATCH_SIZE": 2})
+    output = [Feature(ref=str(i), lat=lat, lon=lon, country="GB") for i, (lat, lon) in enumerate(COORDINATES)]
+
+    assert list(middleware.process_spider_output(TextResponse("https://example.com/"), iter(output))) == output
+    assert batches == []
@@ -0,0 +1,77 @@
+import math
+
+from locations.geo import haversine_distance, vincenty_distance
+from locations.search_planner import SearchBox, SearchCircle, SearchPlanner, subdivide_box, subdivide_circle
+
+
+def test_subdivide_circle_covers_circle():
+    circle = SearchCircle(51.5, -0.1, 100)
+    children = subdivide_circle(circle)
+    assert len(children) == 7
+    assert all(child.depth == 1 and child.radius < circle.radius for child in children)
+    for distance in [0, 25, 50, 75, 99.9]:
+        for bearing in range(0, 360, 15):
+            lat, lon = vincenty_distance(circle.lat, circle.lon, distance, bearing)
+            assert any(haversine_distance(child.lat, child.lon, lat, lon) <= child.radius for child in children)
+
+
+def test_subdivide_circle_antimeridian():
+    for child in subdivide_circle(SearchCircle(-17.7, 179.9, 100)):
+        assert -180 <= child.lon <= 180
+
+
+def test_subdivide_box():
+    boxes = subdivide_box(SearchBox(((10, 10), (-10, 30))))
+    assert len(boxes) == 4
+    assert all(box.depth == 1 for box in boxes)
+
+
+def test_refine_unsaturated():
+    planner = SearchPlanner(max_results=50)
+    assert planner.refine(SearchCircle(51.5, -0.1, 100), 49) == []
+    assert planner.refine(SearchBox(((10, 10), (-10, 30))), 49) == []
+
+
+def test_refine_saturated():
+    planner = SearchPlanner(max_results=50)
+    assert len(planner.refine(SearchCircle(51.5, -0.1, 100), 50)) == 7
+    assert len(planner.refine(SearchBox(((10, 10), (-10, 30))), 50)) == 4
+    assert all(isinstance(child, SearchCircle) for child in planner.refine_circle(SearchCircle(-33.9, 151.2, 100), 50))
+    assert all(isinstance(child, SearchBox) for child in planner.refine_box(SearchBox(((10, 10), (-10, 30))), 50))
+
+
+def test_refine_limits():
+    planner = SearchPlanner(max_results=50, min_radius=10, max_depth=2)
+    assert planner.refine(SearchCircle(51.5, -0.1, 19), 50) == []
+    assert planner.refine(SearchCircle(51.5, -0.1, 100, depth=2), 50) == []
+    assert planner.refine(SearchBox(((10, 10), (-10, 30)), depth=2), 50) == []
+
+
+def test_refine_skips_covered_circles():
+    planner = SearchPlanner(max_results=50)
+    # A completed search containing the northern child circle.
+    lat, lon = vincenty_distance(51.5, -0.1, 60, 0)
+    planner.refine(SearchCircle(lat, lon, 90), 10)
+    children = planner.refine(SearchCircle(51.5, -0.1, 100), 50)
+    assert len(children) == 6
+    assert max(child.lat for child in children) < lat
+
+
+def test_refine_nearest_first():
+    circle = SearchCircle(51.5, -0.1, 100)
+    # The nearest 50 features are all within 70km.
+    locations = [vincenty_distance(circle.lat, circle.lon, 70 * math.sqrt(i / 50), i * 7) for i in range(50)]
+    assert len(SearchPlanner(max_results=50).refine(circle, 50, locations)) == 7
+    children = SearchPlanner(max_results=50, nearest_first=True).refine(circle, 50, locations)
+    # The centre circle lies within 70km of the centre.
+    assert len(children) == 6
+    assert (circle.lat, circle.lon) not in [(child.lat, child.lon) for child in children]
+
+
+def test_is_new():
+    planner = SearchPlanner(max_results=50)
+    assert planner.is_new("1")
+    assert not planner.is_new("1")
+    assert planner.is_new("2")
+    assert planner.is_new(None)
+    assert planner.is_new(None)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from locations.geo import point_locations
+from locations.searchable_points.store import SearchablePointsFiles, SearchablePointsStore, read_points_csv
+
+FILES = [
+    "ca_centroids_100mile_radius_territory.csv",
+    "germany_grid_15km.csv",
+    "iseadgg/nz_centroids_iseadgg_94km_radius.csv",
+]
+
+
+def test_get_points():
+    store = SearchablePointsStore.build(FILES)
+    for file in FILES:
+        latitudes, longitudes, _ = read_points_csv(file)
+        assert list(store.get_points(file)) == list(zip(latitudes, longitudes))
+
+
+def test_get_points_areas():
+    store = SearchablePointsStore.build(FILES)
+    file = "ca_centroids_100mile_radius_territory.csv"
+    latitudes, longitudes, areas = read_points_csv(file)
+    assert sorted(store.get_areas(file)) == sorted(set(areas))
+    assert store.get_areas("germany_grid_15km.csv") is None
+
+    for selected in [["ON"], ["QC", "ON"], ["ON", "XX"], ["XX"]]:
+        expected = [(lat, lon) for lat, lon, area in zip(latitudes, longitudes, areas) if area in selected]
+        assert list(store.get_points(file, selected)) == expected
+
+    # Points of a single area are a view of the store.
+    assert np.shares_memory(store.get_points(file, ["ON"]).latitudes, store.latitudes)
+
+
+def test_get_points_unsupported_area_filter():
+    store = SearchablePointsStore.build(FILES)
+    with pytest.raises(Exception, match="does not support area field filters"):
+        store.get_points("germany_grid_15km.csv", ["DE"])
+    with pytest.raises(FileNotFoundError):
+        store.get_points("missing.csv")
+
+
+def test_save_and_load(tmp_path):
+    store = SearchablePointsStore.build(FILES)
+    path = str(tmp_path / "store")
+    store.save(path, "fingerprint")
+    assert SearchablePointsStore.load(path, "other fingerprint") is None
+    loaded = SearchablePointsStore.load(path, "fingerprint")
+    assert isinstance(loaded.latitudes, np.memmap)
+    for file in FILES:
+        assert list(loaded.get_points(file)) == list(store.get_points(file))
+    assert list(loaded.get_points(FILES[0], ["ON", "QC"])) == list(store.get_points(FILES[0], ["ON", "QC"]))
+
+
+def test_files_packed_when_used(tmp_path):
+    files = SearchablePointsFiles(str(tmp_path))
+    file = "ca_centroids_100mile_radius_territory.csv"
+    latitudes, longitudes, areas = read_points_csv(file)
+    assert list(files.get_points(file)) == list(zip(latitudes, longitudes))
+    # Only the file used is packed.
+    assert [path.name for path in tmp_path.iterdir()] == [file]
+
+    loaded = SearchablePointsFiles(str(tmp_path)).get_store(file)
+    assert isinstance(loaded.latitudes, np.memmap)
+    assert sorted(SearchablePointsFiles(str(tmp_path)).get_areas(file)) == sorted(set(areas))
+    assert list(files.get_points("iseadgg/../" + file, ["ON"])) == list(loaded.get_points(file, ["ON"]))
+    with pytest.raises(FileNotFoundError):
+        files.get_points("missing.csv")
+
+
+def test_spatial_queries():
+    store = SearchablePointsStore.build(FILES)
+    points = store.get_points("germany_grid_15km.csv")
+    bounds = (10.0, 50.0, 12.0, 52.0)
+    in_bbox = points.within_bbox(bounds)
+    assert 0 < len(in_bbox) < len(points)
+    assert all(50.0 <= lat <= 52.0 and 10.0 <= lon <= 12.0 for lat, lon in in_bbox)
+
+    polygon = {"type": "Polygon", "coordinates": [[[10, 50], [12, 50], [12, 52], [10, 52], [10, 50]]]}
+    assert list(points.within_polygon(polygon)) == list(in_bbox)
+
+    assert len(store.get_points("iseadgg/nz_centroids_iseadgg_94km_radius.csv").within_country("NZ")) > 0
+    assert len(points.within_country("NZ")) == 0
+
+
+def test_point_locations_uses_store():
+    assert list(point_locations("germany_grid_15km.csv")) == list(zip(*read_points_csv("germany_grid_15km.csv")[:2]))
@@ -0,0 +1,65 @@
+import json
+
+from scrapy.settings import Settings
+
+from locations.spider_loader import SPIDER_INDEX_VERSION, IndexedSpiderLoader, build_spider_index, write_spider_index
+
+SPIDER_MODULES = ["locations.spiders.addresses"]
+
+
+def get_settings(index_file) -> Settings:
+    return Settings({"SPIDER_MODULES": SPIDER_MODULES, "SPIDER_INDEX_FILE": str(index_file)})
+
+
+def write_index(index_file):
+    loader = IndexedSpiderLoader(get_settings(index_file))
+    spider_classes = [loader.load(spider_name) for spider_name in loader.list()]
+    write_spider_index(build_spider_index(spider_classes, SPIDER_MODULES), index_file)
+    return loader
+
+
+def test_missing_index_walks_modules(tmp_path):
+    loader = IndexedSpiderLoader(get_settings(tmp_path / "spider_index.json"))
+    assert loader.index is None
+    assert len(loader.list()) > 0
+
+
+def test_index_loads_single_spider(tmp_path):
+    index_file = tmp_path / "spider_index.json"
+    walking_loader = write_index(index_file)
+
+    loader = IndexedSpiderLoader(get_settings(index_file))
+    assert loader.index is not None
+    assert sorted(loader.list()) == sorted(walking_loader.list())
+
+    spider_name = loader.list()[0]
+    assert loader.load(spider_name) is walking_loader.load(spider_name)
+    assert list(loader._spiders.keys()) == [spider_name]
+    assert loader.group(spider_name) == "addresses"
+
+
+def test_stale_index_is_ignored(tmp_path):
+    index_file = tmp_path / "spider_index.json"
+    write_index(index_file)
+    index = json.loads(index_file.read_text())
+    index["_meta"]["fingerprint"] = "stale"
+    index_file.write_text(json.dumps(index))
+
+    loader = IndexedSpiderLoader(get_settings(index_file))
+    assert loader.index is None
+    assert len(loader.list()) > 0
+
+
+def test_index_mismatch_falls_back_to_walk(tmp_path):
+    index_file = tmp_path / "spider_index.json"
+    write_index(index_file)
+    index = json.loads(index_file.read_text())
+    assert index["_meta"]["version"] == SPIDER_INDEX_VERSION
+    spider_name, entry = next(iter(index["spiders"].items()))
+    entry["class"] = "NoSuchSpider"
+    index_file.write_text(json.dumps(index))
+
+    loader = IndexedSpiderLoader(get_settings(index_file))
+    assert loader.index is not None
+    assert loader.load(spider_name).name == spider_name
+    assert loader.index is None